@@ -0,0 +1,106 @@
+"""Per-sample server cost of single-sample frames vs. batch envelopes.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_batch --batch 1 10 50 --format json binary
+
+A reactor sampling at 10 Hz sends ``--samples`` samples, either one JSON
+object per frame (``--batch 1``) or ``{"batch": [...]}`` envelopes of the
+given size, or the same batches as binary frames. Each frame is decoded and
+ingested through ``DataManager``, as the websocket endpoint does; the time
+covers decode, WAL encoding and the column-buffer append.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import isolated_settings  # noqa: E402
+from benchmarks.bench_protocol import encode_binary  # noqa: E402
+
+SAMPLE = {
+    "temperature": 612.5,
+    "fuel_level": 80.0,
+    "coolant_level": 95.0,
+    "waste_level": 3.0,
+    "status": True,
+    "burn_rate": 1.5,
+    "actual_burn_rate": 1.5,
+    "alert_status": 1,
+}
+
+
+def frames(samples: int, batch: int, binary: bool) -> list[str] | list[bytes]:
+    if batch == 1 and not binary:
+        return [json.dumps(SAMPLE)] * samples
+    tick = int(time.time() * 1000) - samples * 100
+    items = [{**SAMPLE, "seq": n + 1, "tick": tick + n * 100} for n in range(samples)]
+    chunks = [items[i : i + batch] for i in range(0, samples, batch)]
+    if binary:
+        return [encode_binary(chunk) for chunk in chunks]
+    return [json.dumps({"batch": chunk}) for chunk in chunks]
+
+
+async def simulate(samples: int, batch: int, binary: bool) -> float:
+    import main  # noqa: PLC0415 - imported after LOG_DIR/WAL_DIR are set
+    from ingest import SequencedTelemetry, TelemetryBatch, decode_binary_frame, decode_frame  # noqa: PLC0415
+
+    manager = main.data_manager
+    payloads = frames(samples, batch, binary)
+    decode = decode_binary_frame if binary else decode_frame
+    started = time.process_time()
+    for payload in payloads:
+        frame = decode(payload)  # pyright: ignore[reportArgumentType]
+        if isinstance(frame, TelemetryBatch):
+            await manager.add_log_batch("1", frame)
+        elif isinstance(frame, SequencedTelemetry):
+            await manager.add_sequenced_entry("1", frame)
+        else:
+            await manager.add_log_entry("1", frame)
+    cpu = time.process_time() - started
+    manager.close()
+    return cpu / samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--batch", type=int, nargs="+", default=[1, 10, 50])
+    _ = parser.add_argument("--format", nargs="+", choices=["json", "binary"], default=["json"])
+    _ = parser.add_argument("--samples", type=int, default=100_000)
+    _ = parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(asyncio.run(simulate(args.samples, args.child, args.format == ["binary"])))
+        return
+
+    import subprocess  # noqa: PLC0415
+
+    print(f"{'format':>7} {'batch':>6} {'us/sample':>10} {'frames/s @10Hz':>15} {'speedup':>8}")
+    baseline: float | None = None
+    for fmt in args.format:
+        for batch in args.batch:
+            with tempfile.TemporaryDirectory() as tmp:
+                env = {**os.environ, **isolated_settings(tmp)}
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", str(batch), "--samples", str(args.samples),
+                     "--format", fmt],
+                    check=True, capture_output=True, text=True, env=env,
+                )
+            per_sample = float(out.stdout.splitlines()[-1])
+            baseline = baseline or per_sample
+            print(
+                f"{fmt:>7} {batch:>6} {per_sample * 1e6:>10.2f} {10 / batch:>15.2f} "
+                f"{baseline / per_sample:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
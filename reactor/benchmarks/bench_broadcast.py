@@ -0,0 +1,107 @@
+"""Display emit cost per sample vs. per tick for a fleet of reactors.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_broadcast --reactors 200 --rates 1 5 20
+
+Every reactor produces samples at each rate for ``--seconds`` of real time.
+"per-sample" packs and emits every sample, as ``send_to_esp8266`` used to;
+"broadcaster" offers them to ``Broadcaster`` at ``--max-hz``. ``sio.emit`` is
+replaced by a stand-in costing ``--client-us`` of CPU per connected client.
+CPU is the time spent packing and emitting. With ``--subscribed N`` the
+display follows only the first N reactors, and the broadcaster is offered
+only samples of followed reactors, as ``process_frames`` does.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import FakeDisplays, connect_display, isolated_settings  # noqa: E402
+
+os.environ.update(isolated_settings())
+
+import main  # noqa: E402
+from broadcast import Broadcaster  # noqa: E402
+from ingest import Telemetry  # noqa: E402
+
+
+async def produce(reactors: int, rate: float, seconds: float, offer):  # pyright: ignore[reportMissingParameterType, reportUnknownParameterType]
+    samples = [Telemetry(temperature=500 + n, fuel_level=80, coolant_level=90, status=True) for n in range(reactors)]
+    ids = [str(n) for n in range(reactors)]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + seconds
+    next_round = loop.time()
+    count = 0
+    while loop.time() < deadline:
+        for computer_id, sample in zip(ids, samples):
+            await offer(computer_id, sample)
+        count += reactors
+        next_round += 1 / rate
+        await asyncio.sleep(max(next_round - loop.time(), 0))
+    return count
+
+
+async def per_sample(reactors: int, rate: float, seconds: float) -> tuple[int, int, float]:
+    emits = 0
+    cpu = 0.0
+
+    async def offer(computer_id: str, sample: Telemetry):
+        nonlocal emits, cpu
+        started = time.perf_counter()
+        await main.send_to_esp8266({computer_id: main.pack_display_record(computer_id, sample)})
+        cpu += time.perf_counter() - started
+        emits += 1
+
+    count = await produce(reactors, rate, seconds, offer)
+    return count, emits, cpu
+
+
+async def coalesced(reactors: int, rate: float, seconds: float, max_hz: float) -> tuple[int, int, float]:
+    broadcaster = Broadcaster(max_hz, main.pack_display_record, main.send_to_esp8266)
+    task = asyncio.create_task(broadcaster.run())
+
+    async def offer(computer_id: str, sample: Telemetry):
+        if main.conn_manager.has_subscribers(computer_id):
+            broadcaster.offer(computer_id, sample)
+
+    count = await produce(reactors, rate, seconds, offer)
+    await asyncio.sleep(broadcaster.interval * 2)
+    _ = task.cancel()
+    return count, broadcaster.packets, broadcaster.tick_stats.total
+
+
+async def run(args: argparse.Namespace):
+    subscriptions = main.parse_subscriptions(None if args.subscribed is None else [*map(str, range(args.subscribed))])
+    sid = await connect_display(main.sio, FakeDisplays(args.clients, args.client_us, yield_each=False))
+    await main.conn_manager.add_display(sid, "hex", subscriptions)
+    print(f"{'rate Hz':>8} {'mode':>12} {'samples':>8} {'emits':>7} {'emit CPU ms/s':>14}")
+    for rate in args.rates:
+        for mode in ("per-sample", "broadcaster"):
+            if mode == "per-sample":
+                count, emits, cpu = await per_sample(args.reactors, rate, args.seconds)
+            else:
+                count, emits, cpu = await coalesced(args.reactors, rate, args.seconds, args.max_hz)
+            print(f"{rate:>8g} {mode:>12} {count:>8} {emits:>7} {cpu / args.seconds * 1000:>14.1f}")
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--reactors", type=int, default=200)
+    _ = parser.add_argument("--rates", type=float, nargs="+", default=[1, 5, 20])
+    _ = parser.add_argument("--seconds", type=float, default=3)
+    _ = parser.add_argument("--max-hz", type=float, default=2)
+    _ = parser.add_argument("--clients", type=int, default=10)
+    _ = parser.add_argument("--client-us", type=float, default=10)
+    _ = parser.add_argument("--subscribed", type=int, help="reactors the display follows (default: all)")
+    asyncio.run(run(parser.parse_args()))
+    main.data_manager.close()
+
+
+if __name__ == "__main__":
+    main_()
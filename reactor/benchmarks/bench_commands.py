@@ -0,0 +1,77 @@
+"""Time for a command to reach every ComputerCraft computer when some sockets stall.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_commands --computers 100 --stalled 0 1 5
+
+Each fake connection takes ``--send-ms`` to accept a send; stalled ones never
+accept it. "sequential" awaits each send in turn, as ``control_command`` used
+to, with the same per-send timeout; "concurrent" uses ``CommandDispatcher``.
+"reached" is when the last healthy computer had the command, "done" when the
+dispatch returned.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from commands import CommandDispatcher  # noqa: E402
+
+
+class FakeSocket:
+    def __init__(self, send_seconds: float, stalled: bool):
+        self.send_seconds: float = send_seconds
+        self.stalled: bool = stalled
+        self.received_at: float | None = None
+
+    async def send_text(self, data: str):
+        if self.stalled:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.send_seconds)
+        self.received_at = time.perf_counter()
+
+
+async def sequential(connections: dict[str, FakeSocket], data: str, timeout: float):
+    for websocket in connections.values():
+        try:
+            async with asyncio.timeout(timeout):
+                await websocket.send_text(data)
+        except TimeoutError:
+            pass
+
+
+async def run(args: argparse.Namespace):
+    timeout = args.timeout_ms / 1000
+    print(f"{'stalled':>8} {'mode':>11} {'reached ms':>11} {'done ms':>8} {'delivered':>10}")
+    for stalled in args.stalled:
+        for mode in ("sequential", "concurrent"):
+            connections = {
+                str(n): FakeSocket(args.send_ms / 1000, n < stalled) for n in range(args.computers)
+            }
+            started = time.perf_counter()
+            if mode == "sequential":
+                await sequential(connections, '{"command":"emergency_stop"}', timeout)
+            else:
+                dispatcher = CommandDispatcher(connections, timeout, ack_timeout=1, max_retries=0)
+                _ = await dispatcher.dispatch({"command": "emergency_stop"})
+            done = time.perf_counter() - started
+            arrivals = [ws.received_at for ws in connections.values() if ws.received_at is not None]
+            reached = max(arrivals) - started if arrivals else 0.0
+            print(f"{stalled:>8} {mode:>11} {reached * 1000:>11.1f} {done * 1000:>8.1f} {len(arrivals):>10}")
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--computers", type=int, default=100)
+    _ = parser.add_argument("--stalled", type=int, nargs="+", default=[0, 1, 5])
+    _ = parser.add_argument("--send-ms", type=float, default=2)
+    _ = parser.add_argument("--timeout-ms", type=float, default=500)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,124 @@
+"""Hot-log chunk count, and scan/save cost, with and without background compaction.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_compaction --reactors 16 --hours 24 --flush-seconds 60
+
+Feeds a ``DataManager`` ``--hours`` of 1 Hz samples from ``--reactors``
+reactors, flushing every ``--flush-seconds`` of samples as the periodic save
+does. "append-only" never compacts, as before; "tiered" runs
+``DataManager.compact`` after every flush, as the background task would.
+"merge max ms" is the slowest single merge, "merge total ms" all of them.
+The scan columns are medians over ``--repeat`` runs on the final log.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import polars as pl
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import isolated_settings  # noqa: E402
+
+os.environ.update(isolated_settings())
+
+from compaction import LogCompactor  # noqa: E402
+from ingest import Telemetry, local_now_us  # noqa: E402
+from main import DataManager  # noqa: E402
+from wal import WriteAheadLog  # noqa: E402
+
+
+def median_ms(fn: Callable[[], object], repeat: int) -> float:
+    timings: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _ = fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+async def fill(manager: DataManager, args: argparse.Namespace, compact: bool) -> list[float]:
+    """Ingest the synthetic history; returns the time spent compacting after each flush."""
+    start_us = local_now_us() - int(args.hours * 3600e6)
+    values = np.zeros((args.flush_seconds, len(Telemetry._fields)))
+    values[:, Telemetry._fields.index("temperature")] = np.linspace(500, 900, args.flush_seconds)
+    merges: list[float] = []
+    for flush in range(int(args.hours * 3600 / args.flush_seconds)):
+        timestamps = start_us + (flush * args.flush_seconds + np.arange(args.flush_seconds)) * 1_000_000
+        for reactor in range(args.reactors):
+            shard = manager.shard(str(reactor))
+            manager.next_seq += shard.buffer.extend(manager.next_seq, str(reactor), timestamps, values)
+        manager._flush_locked()  # pyright: ignore[reportPrivateUsage]
+        if compact:
+            started = time.perf_counter()
+            while await manager.compact():
+                pass
+            merges.append(time.perf_counter() - started)
+    return merges
+
+
+async def run(args: argparse.Namespace, mode: str) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DataManager(
+            log_file=Path(tmp) / "none.parquet",
+            log_dir=Path(tmp) / "log",
+            hot_window=timedelta(hours=args.hours + 1),
+            buffer_size=args.flush_seconds,
+            wal=WriteAheadLog(Path(tmp) / "wal", 0.05),
+            feed_size=1000,
+            compactor=LogCompactor(fanout=args.fanout),
+        )
+        started = time.perf_counter()
+        merges = await fill(manager, args, compact=mode == "tiered")
+        fill_ms = (time.perf_counter() - started) * 1000
+        log = manager.data_log
+        result = {
+            "rows": log.height,
+            "chunks": log.n_chunks(),
+            "fill_ms": fill_ms,
+            "merge_max_ms": max(merges, default=0.0) * 1000,
+            "merge_total_ms": sum(merges) * 1000,
+            "filter_ms": median_ms(lambda: log.filter(pl.col("temperature") > 800).height, args.repeat),
+            "group_ms": median_ms(
+                lambda: log.group_by("computer_id").agg(pl.col("temperature").mean()), args.repeat
+            ),
+            "parquet_ms": median_ms(lambda: log.write_parquet(io.BytesIO()), max(args.repeat // 4, 1)),
+        }
+        manager.close()
+        return result
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--reactors", type=int, default=16)
+    _ = parser.add_argument("--hours", type=float, default=24)
+    _ = parser.add_argument("--flush-seconds", type=int, default=60)
+    _ = parser.add_argument("--fanout", type=int, default=4)
+    _ = parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':>12} {'rows':>10} {'chunks':>7} {'fill ms':>8} {'merge max ms':>13} {'merge total ms':>15} "
+        + f"{'filter ms':>10} {'group_by ms':>12} {'parquet ms':>11}"
+    )
+    for mode in ("append-only", "tiered"):
+        r = asyncio.run(run(args, mode))
+        print(
+            f"{mode:>12} {r['rows']:>10,} {r['chunks']:>7} {r['fill_ms']:>8.0f} {r['merge_max_ms']:>13.1f} "
+            + f"{r['merge_total_ms']:>15.0f} {r['filter_ms']:>10.2f} {r['group_ms']:>12.2f} {r['parquet_ms']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,111 @@
+"""Serve many live dashboards from one process: push deltas vs. polling /status.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_dashboard --dashboards 500 --reactors 200
+
+Reactors report at ``--rate`` Hz for ``--seconds``; ``DashboardHub`` pushes
+deltas to ``--dashboards`` simulated clients. Each send costs ``--send-us``
+of CPU; ``--slow`` clients take ``--slow-ms`` per message and get resynced.
+"poll" calls ``get_status`` once per dashboard per second, the load the same
+dashboards would put on the server by polling.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import isolated_settings  # noqa: E402
+
+os.environ.update(isolated_settings())
+
+import main  # noqa: E402
+from dashboard import DashboardClient, DashboardHub  # noqa: E402
+from ingest import Telemetry  # noqa: E402
+
+
+async def dashboard(client: DashboardClient, send_us: float, slow_ms: float, received: list[int]):
+    while True:
+        _ = await client.queue.get()
+        if slow_ms:
+            await asyncio.sleep(slow_ms / 1000)
+        else:
+            deadline = time.perf_counter() + send_us / 1e6
+            while time.perf_counter() < deadline:
+                pass
+            await asyncio.sleep(0)
+        received[0] += 1
+
+
+async def push(args: argparse.Namespace) -> dict[str, float]:
+    hub = DashboardHub(args.max_hz, args.queue_size)
+    received = [0]
+    clients = [hub.connect() for _ in range(args.dashboards)]
+    tasks = [
+        asyncio.create_task(dashboard(client, args.send_us, args.slow_ms if n < args.slow else 0, received))
+        for n, client in enumerate(clients)
+    ]
+    tasks.append(asyncio.create_task(hub.run()))
+    loop = asyncio.get_running_loop()
+    started_cpu = time.process_time()
+    deadline = loop.time() + args.seconds
+    tick = 0
+    while loop.time() < deadline:
+        for n in range(args.reactors):
+            # Temperature changes every sample, fuel every tenth, the rest stays put.
+            hub.offer(str(n), Telemetry(temperature=500 + tick + n, fuel_level=80 - tick // 10, status=True))
+        tick += 1
+        await asyncio.sleep(1 / args.rate)
+    cpu = time.process_time() - started_cpu
+    for task in tasks:
+        _ = task.cancel()
+    return {
+        "cpu_ms_per_s": cpu / args.seconds * 1000,
+        "encodes_per_s": hub.seq / args.seconds,
+        "delivered_per_s": received[0] / args.seconds,
+        "publish_ms": hub.broadcaster.tick_stats.total / max(hub.broadcaster.ticks, 1) * 1000,
+        "resyncs": hub.resyncs,
+    }
+
+
+async def poll(args: argparse.Namespace) -> float:
+    for n in range(args.reactors):
+        _ = await main.data_manager.add_log_entry(str(n), Telemetry(temperature=500 + n, status=True))
+    started = time.process_time()
+    rounds = 5
+    for _ in range(rounds):
+        for _ in range(args.dashboards):
+            _ = await main.get_status()
+    return (time.process_time() - started) / rounds * 1000
+
+
+async def run(args: argparse.Namespace):
+    result = await push(args)
+    print(f"push: {args.dashboards} dashboards, {args.reactors} reactors at {args.rate:g} Hz")
+    for name, value in result.items():
+        print(f"  {name:>16}: {value:,.2f}")
+    print(f"poll /status once a second: {await poll(args):,.1f} CPU ms/s")
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--dashboards", type=int, default=500)
+    _ = parser.add_argument("--reactors", type=int, default=200)
+    _ = parser.add_argument("--rate", type=float, default=5)
+    _ = parser.add_argument("--seconds", type=float, default=5)
+    _ = parser.add_argument("--max-hz", type=float, default=4)
+    _ = parser.add_argument("--queue-size", type=int, default=32)
+    _ = parser.add_argument("--send-us", type=float, default=20)
+    _ = parser.add_argument("--slow", type=int, default=5)
+    _ = parser.add_argument("--slow-ms", type=float, default=500)
+    asyncio.run(run(parser.parse_args()))
+    main.data_manager.close()
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,127 @@
+"""Telemetry frame decoding throughput: pydantic model vs. ``decode_telemetry``.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_decode --frames 200000
+
+"before" is the old path (``ReactorDataModel.model_validate_json`` and then
+attribute reads into the column buffer); "after" parses with ``from_json``,
+coerces each field into a ``Telemetry`` tuple and splats it into
+``IngestBuffer.append``. Decoding is also timed on its own, and every path on
+a stream where 10% of the frames are malformed.
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from pydantic import BaseModel, ValidationError
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ingest import IngestBuffer, MalformedFrame, decode_telemetry  # noqa: E402
+
+
+class ReactorDataModel(BaseModel):
+    timestamp: datetime | None = None
+    temperature: float = 0.0
+    fuel_level: float = 0.0
+    coolant_level: float = 0.0
+    waste_level: float = 0.0
+    status: bool | str = False
+    burn_rate: float = 0.0
+    actual_burn_rate: float = 0.0
+    alert_status: int = 0
+
+
+FRAME = json.dumps(
+    {
+        "temperature": 612.5,
+        "fuel_level": 80.0,
+        "coolant_level": 95.0,
+        "waste_level": 3.0,
+        "status": True,
+        "burn_rate": 1.5,
+        "actual_burn_rate": 1.5,
+        "alert_status": 1,
+    }
+)
+MALFORMED = ['{"temperature": "hot"}', '{"fuel_level": 80', "[]", "null"]
+
+
+def before_decode(_buffer: IngestBuffer, frame: str):
+    try:
+        _ = ReactorDataModel.model_validate_json(frame)
+    except ValidationError:
+        pass
+
+
+def after_decode(_buffer: IngestBuffer, frame: str):
+    try:
+        _ = decode_telemetry(frame)
+    except MalformedFrame:
+        pass
+
+
+def before(buffer: IngestBuffer, frame: str):
+    try:
+        data = ReactorDataModel.model_validate_json(frame)
+    except ValidationError:
+        return
+    if buffer.append(
+        0,
+        "1",
+        0,
+        data.temperature,
+        data.fuel_level,
+        data.coolant_level,
+        data.waste_level,
+        data.status is True,
+        data.burn_rate,
+        data.actual_burn_rate,
+        data.alert_status,
+    ):
+        buffer.size = 0
+
+
+def after(buffer: IngestBuffer, frame: str):
+    try:
+        data = decode_telemetry(frame)
+    except MalformedFrame:
+        return
+    if buffer.append(0, "1", 0, *data):
+        buffer.size = 0
+
+
+def rate(step: Callable[[IngestBuffer, str], None], frames: list[str]) -> float:
+    buffer = IngestBuffer(4096)
+    started = time.perf_counter()
+    for frame in frames:
+        step(buffer, frame)
+    return len(frames) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--frames", type=int, default=200_000)
+    args = parser.parse_args()
+
+    valid = [FRAME] * args.frames
+    mixed = [MALFORMED[i % len(MALFORMED)] if i % 10 == 0 else FRAME for i in range(args.frames)]
+    print(f"{'path':>14} {'stream':>8} {'before msg/s':>14} {'after msg/s':>14} {'speedup':>8}")
+    for path, old_step, new_step in (
+        ("decode", before_decode, after_decode),
+        ("decode+append", before, after),
+    ):
+        for name, frames in (("valid", valid), ("10% bad", mixed)):
+            _ = rate(old_step, frames[:10_000]), rate(new_step, frames[:10_000])  # warm up
+            old, new = rate(old_step, frames), rate(new_step, frames)
+            print(f"{path:>14} {name:>8} {old:>14,.0f} {new:>14,.0f} {new / old:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Wire size and server CPU of the hex and binary display formats.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_display --reactors 1 10 200 --rate 2
+
+Every tick, each reactor has a new sample. ``sio.emit`` is replaced by the
+Socket.IO packet encoding it performs once per emit; bytes are what one
+client receives over a websocket (Engine.IO adds one byte to text messages).
+CPU covers packing, framing and Socket.IO encoding.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+from socketio import packet
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import connect_display, isolated_settings  # noqa: E402
+
+os.environ.update(isolated_settings())
+
+import main  # noqa: E402
+from ingest import Telemetry  # noqa: E402
+
+wire_bytes = 0
+
+
+async def encoding_emit(event: str, data: object = None, **_kwargs: object) -> None:
+    global wire_bytes
+    encoded = packet.Packet(packet.EVENT, data=[event, data], namespace="/").encode()
+    if isinstance(encoded, str):
+        wire_bytes += len(encoded) + 1
+    else:
+        wire_bytes += len(encoded[0]) + 1 + sum(len(attachment) for attachment in encoded[1:])
+
+
+async def measure(sid: str, wire_format: str, reactors: int, ticks: int) -> tuple[float, float]:
+    """Bytes and CPU seconds per tick."""
+    global wire_bytes
+    await main.conn_manager.add_display(sid, wire_format, main.parse_subscriptions(None))
+    samples = [
+        (str(n), Telemetry(temperature=500 + n, fuel_level=80, coolant_level=90, status=True))
+        for n in range(reactors)
+    ]
+    wire_bytes = 0
+    started = time.process_time()
+    for _ in range(ticks):
+        await main.send_to_esp8266({cid: main.pack_display_record(cid, sample) for cid, sample in samples})
+    cpu = time.process_time() - started
+    await main.conn_manager.remove_display(sid)
+    return wire_bytes / ticks, cpu / ticks
+
+
+async def run(args: argparse.Namespace):
+    sid = await connect_display(main.sio, encoding_emit)
+    print(f"{'reactors':>8} {'format':>7} {'bytes/s':>9} {'CPU ms/s':>9} {'µs/reactor':>11}")
+    for reactors in args.reactors:
+        for wire_format in ("hex", "binary"):
+            size, cpu = await measure(sid, wire_format, reactors, args.ticks)
+            print(
+                f"{reactors:>8} {wire_format:>7} {size * args.rate:>9.0f} "
+                f"{cpu * args.rate * 1000:>9.3f} {cpu / reactors * 1e6:>11.2f}"
+            )
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--reactors", type=int, nargs="+", default=[1, 10, 200])
+    _ = parser.add_argument("--rate", type=float, default=2, help="broadcast ticks per second")
+    _ = parser.add_argument("--ticks", type=int, default=2000)
+    asyncio.run(run(parser.parse_args()))
+    main.data_manager.close()
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,89 @@
+"""Memory and throughput of ``/export`` compared with collecting the range first.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_export --rows 20000000
+
+Fills a store with ``--rows`` on-disk samples from 4 reactors at 1 Hz (20M
+rows is about two months), then exports the whole history. "collect" reads
+it with ``query_range`` and writes one Parquet file into memory, the way a
+non-streaming endpoint would. "arrow" and "parquet" drain the body of
+``/export/arrow`` and ``/export/parquet``. Each mode runs in a fresh process;
+"rss MB" is how much its peak RSS grew during the export.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import isolated_settings  # noqa: E402
+
+MODES = ("collect", "arrow", "parquet")
+
+
+async def export(mode: str) -> int:
+    import main  # noqa: PLC0415 - imported after LOG_DIR/WAL_DIR are set
+
+    if mode == "collect":
+        out = io.BytesIO()
+        (await main.data_manager.query_range(None, None)).write_parquet(out)
+        return out.tell()
+    response = await main.export_data(mode, start=None, end=None, computer_id=None)
+    size = 0
+    async for chunk in response.body_iterator:
+        size += len(chunk)
+    return size
+
+
+def run(mode: str) -> dict[str, float]:
+    import main  # noqa: PLC0415
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    size = asyncio.run(export(mode))
+    seconds = time.perf_counter() - started
+    main.data_manager.close()
+    return {
+        "seconds": seconds,
+        "mb": size / 1e6,
+        "rss_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024,
+    }
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--rows", type=int, default=20_000_000)
+    _ = parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run(args.child)))
+        return
+
+    from benchmarks.fixtures import populate  # noqa: PLC0415
+    from storage import PartitionedParquetStore  # noqa: PLC0415
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _ = populate(PartitionedParquetStore(Path(tmp) / "log"), args.rows)
+        print(f"{'mode':>8} {'seconds':>8} {'out MB':>8} {'MB/s':>7} {'rss MB':>8}")
+        for mode in MODES:
+            env = {**os.environ, **isolated_settings(tmp)}
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode], check=True, capture_output=True, text=True, env=env
+            )
+            r = json.loads(out.stdout.splitlines()[-1])
+            print(f"{mode:>8} {r['seconds']:>8.2f} {r['mb']:>8.1f} {r['mb'] / r['seconds']:>7.0f} {r['rss_mb']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,136 @@
+"""Per-sample allocations and flush latency: pydantic list buffer vs. IngestBuffer.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_ingest --samples 4096
+
+"before" replays the old path (``model_copy`` per sample into a list, then
+``model_dump`` + ``pl.DataFrame`` + ``pl.concat`` on flush); "after" appends
+into the preallocated column buffer and builds the frame from array slices.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+import polars as pl
+from pydantic import BaseModel
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ingest import IngestBuffer, local_now_us  # noqa: E402
+from storage import LOG_SCHEMA  # noqa: E402
+
+
+class ReactorDataModel(BaseModel):
+    timestamp: datetime | None = None
+    temperature: float = 0.0
+    fuel_level: float = 0.0
+    coolant_level: float = 0.0
+    waste_level: float = 0.0
+    status: bool | str = False
+    burn_rate: float = 0.0
+    actual_burn_rate: float = 0.0
+    alert_status: int = 0
+
+
+SAMPLE = ReactorDataModel(
+    temperature=612.5,
+    fuel_level=80.0,
+    coolant_level=95.0,
+    waste_level=3.0,
+    status=True,
+    burn_rate=1.5,
+    actual_burn_rate=1.5,
+    alert_status=1,
+)
+
+
+class Before:
+    def __init__(self, _capacity: int):
+        self.buffer: list[dict[str, Any]] = []  # pyright: ignore[reportExplicitAny]
+        self.log: pl.DataFrame = pl.DataFrame(schema=LOG_SCHEMA)
+
+    def append(self, computer_id: str):
+        entry = SAMPLE.model_copy(update={"timestamp": datetime.now()}).model_dump()
+        entry["computer_id"] = computer_id
+        self.buffer.append(entry)
+
+    def flush(self):
+        self.log = pl.concat([self.log, pl.DataFrame(self.buffer, schema=LOG_SCHEMA)])
+        self.buffer.clear()
+
+
+class After:
+    def __init__(self, capacity: int):
+        self.buffer: IngestBuffer = IngestBuffer(capacity)
+        self.log: pl.DataFrame = pl.DataFrame(schema=LOG_SCHEMA)
+
+    def append(self, computer_id: str):
+        s = SAMPLE
+        _ = self.buffer.append(
+            0,
+            computer_id,
+            local_now_us(),
+            s.temperature,
+            s.fuel_level,
+            s.coolant_level,
+            s.waste_level,
+            s.status is True,
+            s.burn_rate,
+            s.actual_burn_rate,
+            s.alert_status,
+        )
+
+    def flush(self):
+        self.log = pl.concat([self.log, self.buffer.to_frame()])
+
+
+def measure(factory: Callable[[int], Before | After], samples: int, rounds: int) -> dict[str, float]:
+    impl = factory(samples)
+    ids = [str(n % 8) for n in range(samples)]
+    append_times: list[float] = []
+    flush_times: list[float] = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for computer_id in ids:
+            impl.append(computer_id)
+        append_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        impl.flush()
+        flush_times.append(time.perf_counter() - started)
+
+    # Tracing slows everything down, so allocations are measured in a separate round.
+    tracemalloc.start()
+    for computer_id in ids:
+        impl.append(computer_id)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    impl.flush()
+    return {
+        "append_us": statistics.median(append_times) / samples * 1e6,
+        "bytes_per_sample": retained / samples,
+        "flush_ms": statistics.median(flush_times) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--samples", type=int, default=4096)
+    _ = parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'path':>7} {'append us/sample':>17} {'alloc B/sample':>15} {'flush ms':>9}")
+    for name, factory in (("before", Before), ("after", After)):
+        r = measure(factory, args.samples, args.rounds)
+        print(f"{name:>7} {r['append_us']:>17.2f} {r['bytes_per_sample']:>15.1f} {r['flush_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Latency and memory of ``/data`` responses: per-row dicts vs. JSON written by Polars.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_json --rows 1000000 --limits 100 10000 100000
+
+The hot log holds ``--rows`` synthetic samples. "dicts" is what ``/data``
+did before: ``to_dicts()``, then FastAPI's ``jsonable_encoder`` and
+``JSONResponse``. "rows" and "columns" call the handler as shipped, with
+``layout=rows`` and ``layout=columns``. Latency is the median time to a
+finished response body. "py peak MB" is the largest Python heap growth
+during one request (tracemalloc), "rss MB" how much the peak RSS of a fresh
+process grew while serving ``--repeat`` requests.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import isolated_settings, synthetic_log  # noqa: E402
+
+MODES = ("dicts", "rows", "columns")
+
+
+async def respond(mode: str, limit: int) -> bytes:
+    import main  # noqa: PLC0415
+    from fastapi.encoders import jsonable_encoder  # noqa: PLC0415
+    from fastapi.responses import JSONResponse  # noqa: PLC0415
+
+    if mode == "dicts":
+        frame = await main.data_manager.tail(limit)
+        return bytes(JSONResponse(jsonable_encoder(frame.to_dicts())).body)
+    response = await main.get_data_log(limit=limit, start=None, end=None, computer_id=None, layout=mode)
+    return bytes(response.body)
+
+
+async def run(mode: str, args: argparse.Namespace) -> dict[str, float]:
+    import main  # noqa: PLC0415 - imported after LOG_DIR/WAL_DIR are set
+
+    manager = main.data_manager
+    log = synthetic_log(args.rows, datetime.now().replace(microsecond=0), args.computers)
+    async with manager._lock:  # pyright: ignore[reportPrivateUsage]
+        manager.data_log = log
+        manager.index.append(log)
+        manager.compactor.reset(log)
+        manager._publish()  # pyright: ignore[reportPrivateUsage]
+
+    body = await respond(mode, args.limit)  # warm-up
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings: list[float] = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        body = await respond(mode, args.limit)
+        timings.append(time.perf_counter() - started)
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    tracemalloc.start()
+    _ = await respond(mode, args.limit)
+    py_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    manager.close()
+    return {
+        "rows": len(json.loads(body)) if mode != "columns" else len(json.loads(body)["seq"]),
+        "ms": statistics.median(timings) * 1000,
+        "py_peak_mb": py_peak / 1e6,
+        "rss_mb": rss_growth / 1024,
+        "body_mb": len(body) / 1e6,
+    }
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--rows", type=int, default=1_000_000)
+    _ = parser.add_argument("--computers", type=int, default=16)
+    _ = parser.add_argument("--limits", type=int, nargs="+", default=[100, 10_000, 100_000])
+    _ = parser.add_argument("--repeat", type=int, default=10)
+    _ = parser.add_argument("--limit", type=int, help=argparse.SUPPRESS)
+    _ = parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run(args.child, args))))
+        return
+
+    print(f"{'limit':>8} {'mode':>8} {'rows':>8} {'ms':>9} {'py peak MB':>11} {'rss MB':>7} {'body MB':>8}")
+    for limit in args.limits:
+        for mode in MODES:
+            # A fresh process per case, so peak RSS is not inherited from the previous one.
+            with tempfile.TemporaryDirectory() as tmp:
+                env = {**os.environ, **isolated_settings(tmp)}
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, "--limit", str(limit), *sys.argv[1:]],
+                    check=True, capture_output=True, text=True, env=env,
+                )
+            r = json.loads(out.stdout.splitlines()[-1])
+            print(
+                f"{limit:>8,} {mode:>8} {r['rows']:>8,} {r['ms']:>9.2f} {r['py_peak_mb']:>11.1f} "
+                + f"{r['rss_mb']:>7.1f} {r['body_mb']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main_()
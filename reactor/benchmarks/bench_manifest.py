@@ -0,0 +1,108 @@
+"""Manifest load and query cost with one file per save vs. merged partitions.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_manifest --days 7 --computers 4
+
+Writes ``--days`` of 1 Hz samples from ``--computers`` reactors ending now,
+one file per reactor per ``--save-seconds`` save, as the server does, with
+the 1m and 1h rollup buckets each save finalizes. Then ``merge_closed`` runs
+on the raw and rollup stores until nothing is left to merge: past days
+become one file per reactor, today one file per finished hour. For both
+layouts the table shows the raw store's file count, manifest size and time
+to open, and the median time of a one-hour range read, of
+``/data?computer_id=``'s ``tail``, of a ``/data/page`` cursor page in the
+middle of the history, and of a one-day ``resolution=1m`` and ``1h`` query.
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import populate_saves  # noqa: E402
+from index import Cursor, to_us  # noqa: E402
+from rollups import RollupManager  # noqa: E402
+from storage import PartitionedParquetStore  # noqa: E402
+
+
+def median_ms(fn: Callable[[], object], repeat: int) -> float:
+    timings: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _ = fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def measure(root: Path, middle: datetime, now: datetime, repeat: int) -> dict[str, float]:
+    started = time.perf_counter()
+    store = PartitionedParquetStore(root)
+    load_ms = (time.perf_counter() - started) * 1000
+    cursor = Cursor(to_us(middle) or 0, 0)
+    rollups = RollupManager(root / "rollups")
+    day = (middle - timedelta(hours=12), middle + timedelta(hours=12))
+    return {
+        "files": len(store.entries),
+        "manifest_kb": store.manifest_path.stat().st_size / 1024,
+        "load_ms": load_ms,
+        "range_ms": median_ms(
+            lambda: store.scan(middle, middle + timedelta(hours=1), computer_id="1").collect(), repeat
+        ),
+        "tail_ms": median_ms(lambda: store.tail(100, now, computer_id="1"), repeat),
+        "page_ms": median_ms(lambda: store.page(cursor, 1000, now), repeat),
+        "rollup_1m_ms": median_ms(lambda: rollups.query("1m", *day).collect(), repeat),
+        "rollup_1h_ms": median_ms(lambda: rollups.query("1h", *day).collect(), repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--days", type=float, default=7)
+    _ = parser.add_argument("--computers", type=int, default=4)
+    _ = parser.add_argument("--save-seconds", type=int, default=60)
+    _ = parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    now = datetime.now().replace(microsecond=0)
+    start = now - timedelta(days=args.days)
+    middle = start + timedelta(days=args.days / 2)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        saves = populate_saves(
+            PartitionedParquetStore(root), start, now, args.computers, args.save_seconds, RollupManager(root / "rollups")
+        )
+        print(f"{saves:,} saves of {args.computers} reactors")
+        print(
+            f"{'layout':>9} {'files':>8} {'manifest KB':>12} {'load ms':>8} {'range ms':>9} "
+            + f"{'tail ms':>8} {'page ms':>8} {'1m day ms':>10} {'1h day ms':>10}"
+        )
+        rows: list[tuple[str, dict[str, float]]] = [("per-save", measure(root, middle, now, args.repeat))]
+
+        stores = [PartitionedParquetStore(root), *(t.store for t in RollupManager(root / "rollups").tiers.values())]
+        started = time.perf_counter()
+        passes = 0
+        for store in stores:
+            while store.merge_closed(now):
+                passes += 1
+        merge_s = time.perf_counter() - started
+        # A restart deletes the merged-away files; not timed.
+        _ = PartitionedParquetStore(root), RollupManager(root / "rollups")
+        rows.append(("merged", measure(root, middle, now, args.repeat)))
+        for layout, r in rows:
+            print(
+                f"{layout:>9} {r['files']:>8,.0f} {r['manifest_kb']:>12,.0f} {r['load_ms']:>8.1f} "
+                + f"{r['range_ms']:>9.2f} {r['tail_ms']:>8.2f} {r['page_ms']:>8.2f} "
+                + f"{r['rollup_1m_ms']:>10.2f} {r['rollup_1h_ms']:>10.2f}"
+            )
+        print(f"merging took {merge_s:.1f} s in {passes} passes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Cost of a ``/data/page`` page at different depths in the history.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_paging --rows 20000000 --limit 1000
+
+Fills a store with ``--rows`` on-disk samples from 4 reactors at 1 Hz, then
+reads one ``--limit``-row page forward from cursors at several depths
+("depth" is the share of the history that lies after the cursor). "cursor"
+is ``DataManager.page``; "tail" is reaching the same rows with
+``/data?limit=`` as before, i.e. ``tail(rows after the cursor)``, which is
+only run up to ``--tail-max`` rows.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import isolated_settings, populate  # noqa: E402
+
+os.environ.update(isolated_settings())
+
+from index import Cursor, to_us  # noqa: E402
+from storage import PartitionedParquetStore  # noqa: E402
+
+DEPTHS = (0.0001, 0.01, 0.5, 0.9999)
+
+
+async def median_ms(fn: Callable[[], Awaitable[object]], repeat: int) -> float:
+    timings: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _ = await fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+async def run(args: argparse.Namespace):
+    import main  # noqa: PLC0415 - the store must exist before the data manager loads it
+
+    manager = main.data_manager
+    history = manager.store.scan().select("timestamp", "seq").sort("timestamp", "seq").collect()
+    print(f"{'depth':>7} {'rows after':>11} {'cursor ms':>10} {'tail ms':>9}")
+    for depth in DEPTHS:
+        after = int(history.height * depth)
+        row = history.height - after - 1
+        cursor = Cursor(to_us(history.item(row, "timestamp")) or 0, history.item(row, "seq"))
+        cursor_ms = await median_ms(lambda: manager.page(cursor, args.limit), args.repeat)
+        tail_ms = (
+            f"{await median_ms(lambda: manager.tail(after), max(args.repeat // 5, 1)):>9.1f}"
+            if after <= args.tail_max
+            else f"{'-':>9}"
+        )
+        print(f"{depth:>7.2%} {after:>11,} {cursor_ms:>10.2f} {tail_ms}")
+    manager.close()
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--rows", type=int, default=20_000_000)
+    _ = parser.add_argument("--limit", type=int, default=1000)
+    _ = parser.add_argument("--repeat", type=int, default=20)
+    _ = parser.add_argument("--tail-max", type=int, default=1_000_000)
+    args = parser.parse_args()
+    _ = populate(PartitionedParquetStore(Path(os.environ["LOG_DIR"])), args.rows)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,77 @@
+"""Save latency of the partitioned store vs. the legacy full-file rewrite.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_persistence --sizes 10000 1000000 50000000
+
+For every history size the store is pre-populated with that many rows, then a
+batch of ``--batch`` new rows (one save interval of one reactor at 1 Hz) is
+appended ``--repeat`` times. The legacy column rewrites the whole history plus
+the batch with ``write_parquet``, which is what ``save_log_to_disk`` used to do.
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import polars as pl
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import populate, synthetic_log  # noqa: E402
+from storage import PartitionedParquetStore  # noqa: E402
+
+
+def time_store_saves(root: Path, history: int, batch: int, repeat: int) -> list[float]:
+    store = PartitionedParquetStore(root)
+    next_ts = populate(store, history)
+    timings: list[float] = []
+    for n in range(repeat):
+        new_rows = synthetic_log(batch, next_ts + timedelta(minutes=n))
+        started = time.perf_counter()
+        _ = store.append(new_rows)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def time_legacy_saves(root: Path, history: int, batch: int, repeat: int) -> list[float]:
+    data_log = synthetic_log(history, datetime(2020, 1, 1))
+    next_ts = datetime(2020, 1, 1) + timedelta(seconds=history // 4 + 1)
+    log_file = root / "reactor_log.parquet"
+    timings: list[float] = []
+    for n in range(repeat):
+        data_log = pl.concat([data_log, synthetic_log(batch, next_ts + timedelta(minutes=n))])
+        started = time.perf_counter()
+        data_log.write_parquet(log_file)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000, 50_000_000])
+    _ = parser.add_argument("--batch", type=int, default=60)
+    _ = parser.add_argument("--repeat", type=int, default=10)
+    _ = parser.add_argument("--legacy-max", type=int, default=10_000_000, help="skip the legacy rewrite above this size")
+    args = parser.parse_args()
+
+    print(f"{'history rows':>14} {'append p50 ms':>14} {'append max ms':>14} {'rewrite p50 ms':>15}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            store_times = time_store_saves(Path(tmp) / "store", size, args.batch, args.repeat)
+            legacy = "-"
+            if size <= args.legacy_max:
+                legacy_times = time_legacy_saves(Path(tmp), size, args.batch, args.repeat)
+                legacy = f"{statistics.median(legacy_times) * 1000:.2f}"
+        print(
+            f"{size:>14,} {statistics.median(store_times) * 1000:>14.2f} "
+            f"{max(store_times) * 1000:>14.2f} {legacy:>15}"
+        )
+
+
+if __name__ == "__main__":
+    main()
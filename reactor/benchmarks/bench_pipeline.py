@@ -0,0 +1,104 @@
+"""Ingest throughput with 0 vs. N display clients: inline forwarding vs. staged pipeline.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_pipeline --clients 0 50
+
+A fake websocket feeds ``--frames`` JSON samples as fast as the endpoint
+reads them. Display clients are simulated by replacing ``sio.emit``: every
+client costs ``--client-us`` of CPU and a yield, and one client is slow,
+taking ``--slow-ms`` to accept each packet. "inline" is the old endpoint,
+which awaited ``send_to_esp8266`` for every sample; "pipeline" is
+``websocket_endpoint`` with its decode/store worker and the coalescing
+``broadcaster``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import FakeDisplays, connect_display, isolated_settings  # noqa: E402
+
+FRAME = json.dumps({"temperature": 612.5, "fuel_level": 80.0, "coolant_level": 95.0, "status": True})
+
+
+class FakeWebSocket:
+    def __init__(self, frames: int):
+        self.remaining: int = frames
+
+    async def accept(self):
+        pass
+
+    async def receive(self) -> dict[str, Any]:  # pyright: ignore[reportExplicitAny]
+        await asyncio.sleep(0)  # a real ASGI receive yields to the loop
+        if self.remaining == 0:
+            return {"type": "websocket.disconnect", "code": 1000}
+        self.remaining -= 1
+        return {"type": "websocket.receive", "text": FRAME}
+
+
+async def run(mode: str, frames: int, clients: int, client_us: float, slow_ms: float) -> float:
+    import main  # noqa: PLC0415 - imported after LOG_DIR/WAL_DIR are set
+    from ingest import decode_frame  # noqa: PLC0415
+
+    displays = FakeDisplays(clients, client_us, slow_ms)
+    if clients:
+        sid = await connect_display(main.sio, displays)
+        await main.conn_manager.add_display(sid, "hex", main.parse_subscriptions(None))
+    else:
+        main.sio.emit = displays  # pyright: ignore[reportAttributeAccessIssue]
+    fan_out = asyncio.create_task(main.broadcaster.run())
+    websocket = FakeWebSocket(frames)
+    started = time.perf_counter()
+    if mode == "inline":
+        while (message := await websocket.receive())["type"] != "websocket.disconnect":
+            reactor_data = await main.data_manager.add_frame("1", decode_frame(message["text"]))
+            if main.conn_manager.has_subscribers("1"):
+                await main.send_to_esp8266({"1": main.pack_display_record("1", reactor_data)})
+    else:
+        await main.websocket_endpoint(websocket, "1")  # pyright: ignore[reportArgumentType]
+    elapsed = time.perf_counter() - started
+    _ = fan_out.cancel()
+    main.data_manager.close()
+    return frames / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--clients", type=int, nargs="+", default=[0, 50])
+    _ = parser.add_argument("--frames", type=int, default=20_000)
+    _ = parser.add_argument("--client-us", type=float, default=10.0)
+    _ = parser.add_argument("--slow-ms", type=float, default=5.0)
+    _ = parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, clients = args.child[0], int(args.child[1])
+        print(asyncio.run(run(mode, args.frames, clients, args.client_us, args.slow_ms)))
+        return
+
+    import subprocess  # noqa: PLC0415
+
+    print(f"{'mode':>9} {'clients':>8} {'frames/s':>10}")
+    for mode in ("inline", "pipeline"):
+        for clients in args.clients:
+            with tempfile.TemporaryDirectory() as tmp:
+                env = {**os.environ, **isolated_settings(tmp)}
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, str(clients), "--frames", str(args.frames),
+                     "--client-us", str(args.client_us), "--slow-ms", str(args.slow_ms)],
+                    check=True, capture_output=True, text=True, env=env,
+                )
+            print(f"{mode:>9} {clients:>8} {float(out.stdout.splitlines()[-1]):>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
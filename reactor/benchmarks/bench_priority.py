@@ -0,0 +1,175 @@
+"""Emergency-stop latency while the server ingests at a multiple of the normal rate.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_priority --reactors 200 --load 10 --budget-ms 50
+
+Every reactor normally sends one frame per second (``UPDATE_INTERVAL`` and
+``BATCH_INTERVAL`` of 1 s); here each fake ComputerCraft connection sends
+``--load`` times that, through ``websocket_endpoint``. Display clients
+(``sio.emit`` replaced by a stand-in costing ``--client-us`` per client) and
+dashboards are attached, so fan-out runs too. Every ``--interval`` seconds an
+``emergency_stop`` is issued through ``control_command``. Its latency is the
+time from issuing it until the last reactor received it, and every fake
+computer acks it. "baseline" disables ``priority_gate``, so ingest workers
+keep the loop between frames as before, and skips the startup ``gc.freeze()``;
+"priority" is the server as shipped.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import FakeDisplays, connect_display, isolated_settings  # noqa: E402
+
+FRAME = json.dumps({"temperature": 612.5, "fuel_level": 80.0, "coolant_level": 95.0, "status": True})
+
+
+class LoadedWebSocket:
+    """A ComputerCraft connection sending ``rate`` frames per second until ``deadline``."""
+
+    def __init__(self, computer_id: str, rate: float, deadline: float, arrivals: dict[int, list[float]]):
+        self.computer_id: str = computer_id
+        self.interval: float = 1 / rate
+        self.deadline: float = deadline
+        self.arrivals: dict[int, list[float]] = arrivals
+        self.next_frame: float = 0.0
+        self.frames: int = 0
+
+    async def accept(self):
+        self.next_frame = asyncio.get_running_loop().time()
+
+    async def receive(self) -> dict[str, Any]:  # pyright: ignore[reportExplicitAny]
+        now = asyncio.get_running_loop().time()
+        if now >= self.deadline:
+            return {"type": "websocket.disconnect", "code": 1000}
+        # Like uvicorn's receive, only suspend when no frame is waiting.
+        if self.next_frame > now:
+            await asyncio.sleep(self.next_frame - now)
+        self.next_frame += self.interval
+        self.frames += 1
+        return {"type": "websocket.receive", "text": FRAME}
+
+    async def send_text(self, data: str):
+        import main  # noqa: PLC0415
+        from commands import CommandAck  # noqa: PLC0415
+
+        await asyncio.sleep(0)  # the ASGI send yields
+        command_id: int = json.loads(data)["id"]
+        self.arrivals.setdefault(command_id, []).append(time.perf_counter())
+        main.command_dispatcher.acknowledge(self.computer_id, CommandAck(command_id, True))
+
+
+async def drain_dashboard(queue: asyncio.Queue[str]):
+    while True:
+        _ = await queue.get()
+
+
+async def run(mode: str, args: argparse.Namespace) -> dict[str, float]:
+    import main  # noqa: PLC0415 - imported after LOG_DIR/WAL_DIR are set
+
+    if mode == "baseline":
+
+        async def no_checkpoint():
+            pass
+
+        main.priority_gate.checkpoint = no_checkpoint  # pyright: ignore[reportAttributeAccessIssue]
+        main.priority_gate.urgent = nullcontext  # pyright: ignore[reportAttributeAccessIssue]
+    else:
+        # As lifespan does at startup.
+        _ = gc.collect()
+        gc.freeze()
+    sid = await connect_display(main.sio, FakeDisplays(args.displays, args.client_us))
+    await main.conn_manager.add_display(sid, "hex", main.parse_subscriptions(None))
+    background = [
+        asyncio.create_task(main.broadcaster.run()),
+        asyncio.create_task(main.dashboard_hub.run()),
+        asyncio.create_task(main.command_dispatcher.run()),
+        *(asyncio.create_task(drain_dashboard(main.dashboard_hub.connect().queue)) for _ in range(args.dashboards)),
+    ]
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + args.seconds
+    arrivals: dict[int, list[float]] = {}
+    sockets = [LoadedWebSocket(str(n), args.load, deadline, arrivals) for n in range(args.reactors)]
+    endpoints = [asyncio.create_task(main.websocket_endpoint(ws, ws.computer_id)) for ws in sockets]  # pyright: ignore[reportArgumentType]
+
+    issued: dict[int, float] = {}
+
+    async def emergency_stop(started: float):
+        result: dict[str, Any] = await main.control_command("bench", {"command": "emergency_stop"})  # pyright: ignore[reportExplicitAny, reportAny]
+        issued[result["id"]] = started
+
+    await asyncio.sleep(1)  # let every connection register and ingest settle
+    stops: list[asyncio.Task[None]] = []
+    while loop.time() < deadline - 1:
+        stops.append(asyncio.create_task(emergency_stop(time.perf_counter())))
+        await asyncio.sleep(args.interval)
+    _ = await asyncio.gather(*stops)
+    _ = await asyncio.gather(*endpoints)
+    for task in background:
+        _ = task.cancel()
+    main.data_manager.close()
+
+    latencies = [max(arrivals[command_id]) - started for command_id, started in issued.items()]
+    latencies.sort()
+    return {
+        "frames_per_s": sum(ws.frames for ws in sockets) / args.seconds,
+        "stops": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "within_budget": sum(latency * 1000 <= args.budget_ms for latency in latencies) / len(latencies),
+    }
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--reactors", type=int, default=200)
+    _ = parser.add_argument("--load", type=float, default=10, help="frames/s per reactor (normal: 1)")
+    _ = parser.add_argument("--seconds", type=float, default=10)
+    _ = parser.add_argument("--interval", type=float, default=0.1, help="seconds between emergency stops")
+    _ = parser.add_argument("--budget-ms", type=float, default=50)
+    _ = parser.add_argument("--displays", type=int, default=20)
+    _ = parser.add_argument("--client-us", type=float, default=10.0)
+    _ = parser.add_argument("--dashboards", type=int, default=20)
+    _ = parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run(args.child, args))))
+        return
+
+    import subprocess  # noqa: PLC0415
+
+    print(
+        f"{'mode':>9} {'frames/s':>9} {'stops':>6} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7} "
+        + f"{'<= ' + format(args.budget_ms, 'g') + ' ms':>9}"
+    )
+    for mode in ("baseline", "priority"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, **isolated_settings(tmp)}
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, *sys.argv[1:]],
+                check=True, capture_output=True, text=True, env=env,
+            )
+        result = json.loads(out.stdout.splitlines()[-1])
+        print(
+            f"{mode:>9} {result['frames_per_s']:>9,.0f} {result['stops']:>6} {result['p50_ms']:>7.1f} "
+            + f"{result['p99_ms']:>7.1f} {result['max_ms']:>7.1f} {result['within_budget']:>9.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main_()
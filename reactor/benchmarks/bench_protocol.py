@@ -0,0 +1,108 @@
+"""Bytes on the wire and parse CPU per sample: JSON vs. binary telemetry frames.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_protocol --batch 1 10 50
+
+For each batch size the same samples are encoded the way ``reactor_monitor.lua``
+does (``textutils.serializeJSON`` output, or ``PROTOCOL = "binary"``) and decoded
+with ``ingest.decode_frame`` / ``ingest.decode_binary_frame``.
+"""
+
+import argparse
+import binascii
+import json
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ingest import decode_binary_frame, decode_frame  # noqa: E402
+
+_HEADER = struct.Struct("<BBHIq")
+_SAMPLE = struct.Struct("<HIffffffBB")
+
+
+def samples(count: int) -> list[dict[str, Any]]:  # pyright: ignore[reportExplicitAny]
+    tick = int(time.time() * 1000)
+    return [
+        {
+            "temperature": 612.5 + n % 7,
+            "fuel_level": 81.23456789,
+            "coolant_level": 95.0 - n % 3,
+            "waste_level": 3.14159,
+            "status": True,
+            "burn_rate": 1.5,
+            "actual_burn_rate": 1.5,
+            "alert_status": 1,
+            "seq": n + 1,
+            "tick": tick + n * 100,
+        }
+        for n in range(count)
+    ]
+
+
+def encode_json(batch: list[dict[str, Any]]) -> str:  # pyright: ignore[reportExplicitAny]
+    if len(batch) == 1:
+        return json.dumps({k: v for k, v in batch[0].items() if k not in ("seq", "tick")})
+    return json.dumps({"batch": batch})
+
+
+def encode_binary(batch: list[dict[str, Any]]) -> bytes:  # pyright: ignore[reportExplicitAny]
+    first = batch[0]
+    body = _HEADER.pack(0xB7, 1, len(batch), first["seq"], first["tick"]) + b"".join(
+        _SAMPLE.pack(
+            s["seq"] - first["seq"],
+            s["tick"] - first["tick"],
+            s["temperature"],
+            s["fuel_level"],
+            s["coolant_level"],
+            s["waste_level"],
+            s["burn_rate"],
+            s["actual_burn_rate"],
+            1 if s["status"] is True else 0,
+            s["alert_status"],
+        )
+        for s in batch
+    )
+    return body + struct.pack("<H", binascii.crc_hqx(body, 0))
+
+
+def parse_us(decode: Callable[[Any], object], frames: list[Any], samples: int) -> float:  # pyright: ignore[reportExplicitAny]
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for frame in frames:
+            _ = decode(frame)
+        best = min(best, time.perf_counter() - started)
+    return best / samples * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--batch", type=int, nargs="+", default=[1, 10, 50])
+    _ = parser.add_argument("--samples", type=int, default=50_000)
+    args = parser.parse_args()
+
+    data = samples(args.samples)
+    print(f"{'batch':>6} {'format':>7} {'bytes/sample':>13} {'parse us/sample':>16} {'vs json':>8}")
+    for batch in args.batch:
+        chunks = [data[i : i + batch] for i in range(0, len(data), batch)]
+        json_frames = [encode_json(chunk) for chunk in chunks]
+        binary_frames = [encode_binary(chunk) for chunk in chunks]
+        json_bytes = sum(len(frame.encode()) for frame in json_frames) / len(data)
+        binary_bytes = sum(len(frame) for frame in binary_frames) / len(data)
+        json_us = parse_us(decode_frame, json_frames, len(data))
+        binary_us = parse_us(decode_binary_frame, binary_frames, len(data))
+        print(f"{batch:>6} {'json':>7} {json_bytes:>13.1f} {json_us:>16.2f} {'':>8}")
+        print(
+            f"{batch:>6} {'binary':>7} {binary_bytes:>13.1f} {binary_us:>16.2f} "
+            f"{json_bytes / binary_bytes:>4.1f}x/{json_us / binary_us:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
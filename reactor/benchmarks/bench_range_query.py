@@ -0,0 +1,77 @@
+"""Range-query latency: TimeIndex/binary search vs. a full-frame filter.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_range_query --sizes 1000000 10000000 100000000
+
+Each size builds an in-memory log of 1 Hz samples from ``--computers``
+reactors, then queries a one-hour window in the middle of it, for all
+reactors and for a single one. 100M rows need roughly 6 GB of RAM.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable
+
+import polars as pl
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from index import TimeIndex, sorted_range, to_us  # noqa: E402
+
+from benchmarks.fixtures import synthetic_log  # noqa: E402
+
+
+def best_of(fn: Callable[[], pl.DataFrame], repeat: int) -> tuple[float, int]:
+    timings: list[float] = []
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = fn().height
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000, 100_000_000])
+    _ = parser.add_argument("--computers", type=int, default=16)
+    _ = parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'query':>9} {'k':>7} {'indexed ms':>11} {'filter ms':>10}")
+    for size in args.sizes:
+        start_ts = datetime(2024, 1, 1)
+        log = synthetic_log(size, start_ts, args.computers)
+        index = TimeIndex()
+        index.append(log)
+
+        middle = start_ts + timedelta(seconds=size // args.computers // 2)
+        start, end = middle, middle + timedelta(hours=1)
+        queries: dict[str, tuple[Callable[[], pl.DataFrame], Callable[[], pl.DataFrame]]] = {
+            "all": (
+                lambda: sorted_range(log, to_us(start), to_us(end)),
+                lambda: log.filter(pl.col("timestamp").is_between(start, end, closed="left")),
+            ),
+            "reactor": (
+                lambda: log[index.rows("3", to_us(start), to_us(end))],
+                lambda: log.filter(
+                    pl.col("timestamp").is_between(start, end, closed="left"),
+                    pl.col("computer_id") == "3",
+                ),
+            ),
+        }
+        for name, (indexed, scan) in queries.items():
+            indexed_ms, k = best_of(indexed, args.repeat)
+            scan_ms, k_scan = best_of(scan, max(args.repeat // 4, 1))
+            assert k == k_scan, (k, k_scan)
+            print(f"{size:>12,} {name:>9} {k:>7,} {indexed_ms:>11.3f} {scan_ms:>10.2f}")
+        del log, index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Ingest CPU cost for a fleet of reactors sampling at 1 Hz.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_reactors --reactors 100 300 1000
+
+Every simulated second each reactor submits one sample through
+``DataManager.add_log_entry``; the log is flushed every ``--flush-every``
+seconds, as the periodic saver would. The ``core %`` column is the share of
+one core that ingest needs at 1 Hz per reactor.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import isolated_settings  # noqa: E402
+
+
+async def simulate(reactors: int, seconds: int, flush_every: int) -> float:
+    import main  # noqa: PLC0415 - imported after LOG_DIR/WAL_DIR are set
+
+    manager = main.data_manager
+    samples = [
+        main.Telemetry(temperature=500 + n, fuel_level=80, coolant_level=90, status=True)
+        for n in range(reactors)
+    ]
+    ids = [str(n) for n in range(reactors)]
+    started = time.process_time()
+    for second in range(seconds):
+        for computer_id, sample in zip(ids, samples):
+            await manager.add_log_entry(computer_id, sample)
+        if (second + 1) % flush_every == 0:
+            await manager.flush_buffer_to_log()
+    await manager.flush_buffer_to_log()
+    cpu = time.process_time() - started
+    manager.close()
+    return cpu / (reactors * seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--reactors", type=int, nargs="+", default=[100, 300, 1000])
+    _ = parser.add_argument("--seconds", type=int, default=60)
+    _ = parser.add_argument("--flush-every", type=int, default=10)
+    _ = parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        per_sample = asyncio.run(simulate(args.child, args.seconds, args.flush_every))
+        print(per_sample)
+        return
+
+    import subprocess  # noqa: PLC0415
+
+    print(f"{'reactors':>9} {'us/sample':>10} {'core % @1Hz':>12} {'max reactors/core':>18}")
+    for reactors in args.reactors:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, **isolated_settings(tmp)}
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", str(reactors), "--seconds", str(args.seconds),
+                 "--flush-every", str(args.flush_every)],
+                check=True, capture_output=True, text=True, env=env,
+            )
+        per_sample = float(out.stdout.splitlines()[-1])
+        print(
+            f"{reactors:>9} {per_sample * 1e6:>10.2f} {reactors * per_sample * 100:>12.2f} "
+            f"{1 / per_sample:>18,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Ingest latency and hot-log fragmentation under heavy ``/data`` polling.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_snapshot --reactors 200 --rate 10 --pollers 0 20
+
+Every reactor records ``--rate`` samples per second through
+``DataManager.add_log_entry`` while ``--pollers`` clients call the ``/data``
+handler back to back (``--limit`` rows, with and without a time range).
+"ingest p99" is the latency of one ``add_log_entry`` call, "chunks" the
+number of chunks in the hot log afterwards.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import isolated_settings  # noqa: E402
+
+os.environ.update(isolated_settings())
+
+import main  # noqa: E402
+from ingest import Telemetry  # noqa: E402
+
+
+async def ingest(reactors: int, rate: float, deadline: float, latencies: list[float]):
+    loop = asyncio.get_running_loop()
+    samples = [Telemetry(temperature=500 + n, fuel_level=80, coolant_level=90, status=True) for n in range(reactors)]
+    next_round = loop.time()
+    while loop.time() < deadline:
+        for n, sample in enumerate(samples):
+            started = time.perf_counter()
+            await main.data_manager.add_log_entry(str(n), sample)
+            latencies.append(time.perf_counter() - started)
+        next_round += 1 / rate
+        await asyncio.sleep(max(next_round - loop.time(), 0))
+
+
+async def poll(limit: int, deadline: float) -> int:
+    loop = asyncio.get_running_loop()
+    polls = 0
+    while loop.time() < deadline:
+        if polls % 2:
+            start = datetime.now() - timedelta(seconds=10)
+            _ = await main.get_data_log(limit=limit, start=start, end=None, computer_id="1")
+        else:
+            _ = await main.get_data_log(limit=limit, start=None, end=None, computer_id=None)
+        polls += 1
+        await asyncio.sleep(0)
+    return polls
+
+
+async def run(args: argparse.Namespace, pollers: int) -> dict[str, float]:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + args.seconds
+    latencies: list[float] = []
+    monitor = asyncio.create_task(main.loop_monitor.run())
+    main.loop_monitor.max_lag = 0.0
+    chunks_before = main.data_manager.data_log.n_chunks()
+    _, polls = await asyncio.gather(
+        ingest(args.reactors, args.rate, deadline, latencies),
+        asyncio.gather(*(poll(args.limit, deadline) for _ in range(pollers))),
+    )
+    _ = monitor.cancel()
+    latencies.sort()
+    return {
+        "polls_per_s": sum(polls) / args.seconds,
+        "p50_us": statistics.median(latencies) * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+        "chunks": main.data_manager.data_log.n_chunks() - chunks_before,
+        "max_lag_ms": main.loop_monitor.max_lag * 1000,
+    }
+
+
+async def run_all(args: argparse.Namespace):
+    print(f"{'pollers':>8} {'polls/s':>8} {'ingest p50 us':>14} {'ingest p99 us':>14} {'new chunks':>11} {'loop lag ms':>12}")
+    for pollers in args.pollers:
+        result = await run(args, pollers)
+        print(
+            f"{pollers:>8} {result['polls_per_s']:>8,.0f} {result['p50_us']:>14.1f} {result['p99_us']:>14.1f} "
+            + f"{result['chunks']:>11} {result['max_lag_ms']:>12.1f}"
+        )
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--reactors", type=int, default=200)
+    _ = parser.add_argument("--rate", type=float, default=10)
+    _ = parser.add_argument("--pollers", type=int, nargs="+", default=[0, 20])
+    _ = parser.add_argument("--limit", type=int, default=100)
+    _ = parser.add_argument("--seconds", type=float, default=5)
+    asyncio.run(run_all(parser.parse_args()))
+    main.data_manager.close()
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,134 @@
+"""Cold-start time of the server on a store written one save at a time, before and after merging.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_startup --days 7 --computers 4
+
+Writes ``--days`` of 1 Hz samples from ``--computers`` reactors ending now
+the way the server does: one raw file per reactor per ``--save-seconds``
+save, plus the rollup buckets finalized by that save. "per-save" is that
+store as written. "merged" is a copy after ``merge_closed`` has run on the
+raw and rollup stores until nothing is left to merge. Each layout then
+starts a ``DataManager`` in a fresh interpreter. That covers opening the
+manifests, loading the hot window, rebuilding open rollup buckets and
+replaying an empty WAL. The table shows wall time, hot rows and peak RSS.
+
+The stores go to a temporary directory, or to ``--root`` if given. They are
+kept between runs there, so a long history is only generated once.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import isolated_settings, populate_saves  # noqa: E402
+from rollups import RollupManager  # noqa: E402
+from storage import PartitionedParquetStore  # noqa: E402
+
+LAYOUTS = ("per-save", "merged")
+
+
+def peak_rss_mb() -> float:
+    """High-water RSS of this process (ru_maxrss would include the parent's)."""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def stores(root: Path) -> list[PartitionedParquetStore]:
+    """The raw store under ``root`` and every rollup tier's store."""
+    return [PartitionedParquetStore(root), *(tier.store for tier in RollupManager(root / "rollups").tiers.values())]
+
+
+def prepare(root: Path, args: argparse.Namespace):
+    per_save, merged = root / "per-save", root / "merged"
+    now = datetime.now().replace(microsecond=0)
+    if not (per_save / PartitionedParquetStore.MANIFEST_NAME).exists():
+        print(f"Writing {args.days} days of {args.save_seconds} s saves to {per_save} ...")
+        start = now.replace(second=0) - timedelta(days=args.days)
+        _ = populate_saves(
+            PartitionedParquetStore(per_save), start, now, args.computers, args.save_seconds,
+            RollupManager(per_save / "rollups"),
+        )
+    if not (merged / PartitionedParquetStore.MANIFEST_NAME).exists():
+        _ = shutil.copytree(per_save, merged)
+        for store in stores(merged):
+            while store.merge_closed(now):
+                pass
+
+
+def startup(root: Path, hot_window: int) -> dict[str, float]:
+    import main  # noqa: PLC0415 - imported after LOG_DIR/WAL_DIR point at empty directories
+    from wal import WriteAheadLog  # noqa: PLC0415
+
+    _ = stores(root)  # deletes files merges left behind, as the previous run would have
+    with tempfile.TemporaryDirectory() as wal_dir:
+        started = time.perf_counter()
+        manager = main.DataManager(
+            log_file=root / "none.parquet",
+            log_dir=root,
+            hot_window=timedelta(seconds=hot_window),
+            buffer_size=4096,
+            wal=WriteAheadLog(Path(wal_dir), 0.05),
+            feed_size=1000,
+        )
+        elapsed = time.perf_counter() - started
+        manager.close()
+    return {
+        "seconds": elapsed,
+        "files": sum(len(store.entries) for store in stores(root)),
+        "rows": manager.data_log.height,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--days", type=float, default=7)
+    _ = parser.add_argument("--computers", type=int, default=4)
+    _ = parser.add_argument("--save-seconds", type=int, default=60)
+    _ = parser.add_argument("--hot-window", type=int, default=3600)
+    _ = parser.add_argument("--root", type=Path)
+    _ = parser.add_argument("--child", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(startup(args.child, args.hot_window)))
+        return
+
+    if args.root is None:
+        with tempfile.TemporaryDirectory() as tmp:
+            compare(Path(tmp), args)
+    else:
+        compare(args.root, args)
+
+
+def compare(root: Path, args: argparse.Namespace):
+    prepare(root, args)
+    print(f"{'layout':>9} {'files':>8} {'seconds':>8} {'hot rows':>9} {'peak RSS MB':>12}")
+    for layout in LAYOUTS:
+        with tempfile.TemporaryDirectory() as empty:
+            env = {**os.environ, **isolated_settings(empty)}
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", str(root / layout), "--hot-window", str(args.hot_window)],
+                check=True,
+                capture_output=True,
+                text=True,
+                env=env,
+            )
+        r = json.loads(out.stdout.splitlines()[-1])
+        print(f"{layout:>9} {r['files']:>8,} {r['seconds']:>8.3f} {r['rows']:>9,} {r['peak_rss_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main_()
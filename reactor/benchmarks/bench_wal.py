@@ -0,0 +1,89 @@
+"""WAL throughput at different group-commit (fsync batch) windows.
+
+Run from the ``reactor`` directory:
+
+    python -m benchmarks.bench_wal --windows 1 5 20 50 200 --producers 100
+
+Each producer models one websocket connection: it appends a sample and waits
+until it is durable before sending the next one. A wider window lets one fsync
+cover more samples, trading per-sample latency for throughput. The
+``no-wait`` row shows the append cost alone, which is what ingest pays when
+it does not wait for durability. Before timing, records and blocks with the
+longest allowed computer_id are round-tripped through the encoder and
+``decode_records``.
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ingest import MAX_COMPUTER_ID_BYTES, Telemetry, local_now_us  # noqa: E402
+from wal import WriteAheadLog, decode_records, encode_block, encode_record  # noqa: E402
+
+
+def sample(seq: int, computer_id: str) -> bytes:
+    return encode_record(seq, computer_id, local_now_us(), 612.5, 80.0, 95.0, 3.0, True, 1.5, 1.5, 1)
+
+
+def check_round_trip():
+    """Long ids come back unchanged; ids too long for a block are refused, not cut."""
+    longest = "é" * (MAX_COMPUTER_ID_BYTES // 2) + "x" * (MAX_COMPUTER_ID_BYTES % 2)
+    values = np.tile(np.array(Telemetry(612.5, 80.0, 95.0, 3.0, True, 1.5, 1.5, 1), dtype=np.float64), (3, 1))
+    data = sample(1, longest) + encode_block(2, longest, np.arange(3, dtype=np.int64), values)
+    records = list(decode_records(data))
+    assert [(seq, computer_id) for seq, computer_id, *_ in records] == [(n, longest) for n in (1, 2, 3, 4)]
+    try:
+        _ = encode_block(1, longest + "x", np.arange(3, dtype=np.int64), values)
+    except ValueError:
+        return
+    raise AssertionError("encode_block accepted a computer_id longer than a block can hold")
+
+
+async def producer(wal: WriteAheadLog, computer_id: str, deadline: float, durable: bool) -> int:
+    count = 0
+    while time.perf_counter() < deadline:
+        count += 1
+        wal.append(sample(count, computer_id))
+        if durable:
+            await wal.wait_durable()
+        elif count % 256 == 0:
+            await asyncio.sleep(0)
+    return count
+
+
+async def run(window_ms: float, producers: int, seconds: float, durable: bool) -> tuple[float, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        wal = WriteAheadLog(Path(tmp), window_ms / 1000)
+        deadline = time.perf_counter() + seconds
+        counts = await asyncio.gather(
+            *(producer(wal, str(n), deadline, durable) for n in range(producers))
+        )
+        wal.close()
+        return sum(counts) / seconds, wal.fsyncs / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--windows", type=float, nargs="+", default=[1, 5, 20, 50, 200])
+    _ = parser.add_argument("--producers", type=int, default=100)
+    _ = parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    check_round_trip()
+    print(f"{'window ms':>10} {'samples/s':>12} {'fsyncs/s':>9}")
+    for window in args.windows:
+        rate, fsyncs = asyncio.run(run(window, args.producers, args.seconds, durable=True))
+        print(f"{window:>10g} {rate:>12,.0f} {fsyncs:>9.1f}")
+    rate, fsyncs = asyncio.run(run(args.windows[-1], 1, args.seconds, durable=False))
+    print(f"{'no-wait':>10} {rate:>12,.0f} {fsyncs:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Helpers shared by the benchmarks: synthetic samples, stores filled with them
+and stand-in display clients."""
+
+import asyncio
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Protocol, cast
+
+import polars as pl
+import socketio
+
+from rollups import RollupManager
+from storage import LOG_SCHEMA, PartitionedParquetStore
+
+GENERATE_CHUNK_ROWS = 5_000_000
+
+Emit = Callable[..., Awaitable[None]]
+
+
+class _AsyncManager(Protocol):
+    async def connect(self, eio_sid: str | None, namespace: str) -> str: ...
+
+
+def isolated_settings(root: str | Path | None = None) -> dict[str, str]:
+    """Environment that points the server's log, WAL and legacy file into ``root``.
+
+    ``root`` defaults to a fresh temporary directory. Apply it to
+    ``os.environ`` before ``import main``, or pass it to a child process.
+    """
+    root = Path(tempfile.mkdtemp() if root is None else root)
+    return {"LOG_DIR": str(root / "log"), "WAL_DIR": str(root / "wal"), "LOG_FILE": str(root / "none.parquet")}
+
+
+class FakeDisplays:
+    """Stand-in for ``sio.emit`` that costs ``client_us`` of CPU per display client.
+
+    With ``yield_each`` the loop yields after every client, as a fan-out that
+    awaits each socket would; ``slow_ms`` then waits on the slowest client.
+    """
+
+    def __init__(self, clients: int, client_us: float, slow_ms: float = 0.0, yield_each: bool = True):
+        self.clients: int = clients
+        self.client_us: float = client_us
+        self.slow_ms: float = slow_ms
+        self.yield_each: bool = yield_each
+
+    async def __call__(self, event: str, data: object = None, **_kwargs: object) -> None:
+        if not self.yield_each:
+            deadline = time.perf_counter() + self.clients * self.client_us / 1e6
+            while time.perf_counter() < deadline:
+                pass
+            return
+        for _ in range(self.clients):
+            deadline = time.perf_counter() + self.client_us / 1e6
+            while time.perf_counter() < deadline:
+                pass
+            await asyncio.sleep(0)
+        if self.clients and self.slow_ms:
+            await asyncio.sleep(self.slow_ms / 1000)
+
+
+async def connect_display(sio: socketio.AsyncServer, emit: Emit) -> str:
+    """Replace ``sio.emit`` with ``emit`` and register one display client; return its sid."""
+    sio.emit = emit  # pyright: ignore[reportAttributeAccessIssue]
+    return await cast(_AsyncManager, sio.manager).connect("bench", "/")
+
+
+def synthetic_log(rows: int, start: datetime, computers: int = 4, first_seq: int = 1) -> pl.DataFrame:
+    """Generate ``rows`` samples at 1 Hz spread over ``computers`` reactors."""
+    index = pl.int_range(0, rows, eager=True)
+    return (
+        pl.DataFrame({"i": index})
+        .select(
+            timestamp=pl.lit(start) + pl.duration(seconds=pl.col("i") // computers),
+            computer_id=(pl.col("i") % computers).cast(pl.String),
+            temperature=(300 + pl.col("i") % 700).cast(pl.Float32),
+            fuel_level=(pl.col("i") % 100).cast(pl.Float32),
+            coolant_level=(100 - pl.col("i") % 100).cast(pl.Float32),
+            waste_level=(pl.col("i") % 50).cast(pl.Float32),
+            status=pl.col("i") % 10 != 0,
+            burn_rate=pl.lit(1.5, dtype=pl.Float32),
+            actual_burn_rate=pl.lit(1.5, dtype=pl.Float32),
+            alert_status=(pl.col("i") % 3).cast(pl.UInt8),
+            seq=pl.col("i") + first_seq,
+        )
+        .cast(LOG_SCHEMA)  # pyright: ignore[reportArgumentType]
+    )
+
+
+def populate(store: PartitionedParquetStore, rows: int, start: datetime = datetime(2020, 1, 1)) -> datetime:
+    """Fill ``store`` with ``rows`` historical rows; return the next timestamp."""
+    written = 0
+    while written < rows:
+        chunk = min(GENERATE_CHUNK_ROWS, rows - written)
+        df = synthetic_log(chunk, start + timedelta(seconds=written // 4), first_seq=written + 1)
+        _ = store.append(df)
+        written += chunk
+    return start + timedelta(seconds=rows // 4 + 1)
+
+
+def populate_saves(
+    store: PartitionedParquetStore,
+    start: datetime,
+    end: datetime,
+    computers: int = 4,
+    save_seconds: int = 60,
+    rollups: RollupManager | None = None,
+) -> int:
+    """Fill ``store`` from ``start`` to ``end`` one save at a time, as the server writes it.
+
+    Every save appends ``save_seconds`` of 1 Hz samples, i.e. one small file
+    per computer, and the rollup buckets of ``rollups`` it finalizes. Returns
+    the number of saves.
+    """
+    saves = int((end - start).total_seconds()) // save_seconds
+    batch = save_seconds * computers
+    for n in range(saves):
+        saved_until = start + timedelta(seconds=(n + 1) * save_seconds)
+        rows = synthetic_log(batch, saved_until - timedelta(seconds=save_seconds), computers, n * batch + 1)
+        _ = store.append(rows)
+        if rollups is not None:
+            rollups.update(rows)
+            for tier, buckets in rollups.take_finalized(saved_until):
+                _ = tier.store.append(buckets)
+    return saves
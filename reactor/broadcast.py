@@ -0,0 +1,136 @@
+import asyncio
+import binascii
+import struct
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Generic, TypeVar
+
+from loguru import logger
+
+from ingest import MAX_COMPUTER_ID_BYTES, Telemetry
+from pipeline import LatestValueQueue, PriorityGate, StageStats
+
+R = TypeVar("R")
+
+
+# --- Display wire formats ---
+# "hex" is the original per-reactor packet sent as a hex string in a JSON event;
+# "binary" sends one CRC-checked frame per tick as a Socket.IO binary attachment.
+DISPLAY_FORMATS: tuple[str, ...] = ("hex", "binary")
+DISPLAY_MAGIC = 0xD5
+DISPLAY_VERSION = 1
+
+_DISPLAY_VALUES = struct.Struct("!HHHHBB")
+_DISPLAY_HEADER = struct.Struct("!BBH")
+_DISPLAY_TRAILER = struct.Struct("!H")
+
+
+def pack_display_record(computer_id: str, data: Telemetry) -> bytes:
+    """Pack one reactor's sample as ``[id_len:1B][id][temp:2B][fuel:2B][coolant:2B][waste:2B][status:1B][alert:1B]``."""
+    key = computer_id.encode()
+    if len(key) > MAX_COMPUTER_ID_BYTES:
+        raise ValueError(f"computer_id is {len(key)} bytes, at most {MAX_COMPUTER_ID_BYTES} fit a display record")
+    return bytes((len(key),)) + key + _DISPLAY_VALUES.pack(
+        min(max(int(data.temperature * 10), 0), 65535),
+        min(max(int(data.fuel_level * 10), 0), 65535),
+        min(max(int(data.coolant_level * 10), 0), 65535),
+        min(max(int(data.waste_level * 10), 0), 65535),
+        1 if data.status is True else 0,
+        min(max(data.alert_status, 0), 255),
+    )
+
+
+def hex_packet(record: bytes) -> str:
+    """The legacy ``0xAA ... 0x55`` packet of a display record, hex encoded.
+
+    Hex clients check the constant trailer byte, so it stays 0x55.
+    """
+    return (b"\xaa" + record[record[0] + 1 :] + b"\x55").hex()
+
+
+def encode_display_frame(records: Sequence[bytes]) -> bytes:
+    """Frame display records as ``[magic][version][count:2B][records...][crc16:2B]``.
+
+    The CRC is CRC-16/XModem over everything before it, the same checksum the
+    ComputerCraft binary protocol uses.
+    """
+    frame = b"".join((_DISPLAY_HEADER.pack(DISPLAY_MAGIC, DISPLAY_VERSION, len(records)), *records))
+    return frame + _DISPLAY_TRAILER.pack(binascii.crc_hqx(frame, 0))
+
+
+class Broadcaster(Generic[R]):
+    """Coalesce display updates per reactor and emit them at a bounded rate.
+
+    ``offer`` only records the newest sample of a reactor. At most
+    ``max_rate_hz`` times per second, and only while something is pending,
+    the broadcaster takes every reactor that changed since the last tick,
+    packs each one once and hands the tick's records, keyed by computer_id,
+    to ``emit`` together, which encodes them once per wire format and room. Emit cost
+    therefore follows the number of ticks and reactors, not the number of
+    samples received. With a ``gate``, each tick waits while urgent work runs.
+    """
+
+    def __init__(
+        self,
+        max_rate_hz: float,
+        pack: Callable[[str, Telemetry], R],
+        emit: Callable[[dict[str, R]], Awaitable[None]],
+        gate: PriorityGate | None = None,
+    ):
+        self.interval: float = 1 / max_rate_hz
+        self.gate: PriorityGate | None = gate
+        self.pack: Callable[[str, Telemetry], R] = pack
+        self.emit: Callable[[dict[str, R]], Awaitable[None]] = emit
+        self.pending: LatestValueQueue[str, Telemetry] = LatestValueQueue()
+        self.ticks: int = 0
+        self.packets: int = 0
+        self.wait_stats: StageStats = StageStats()  # offer -> emit, per reactor
+        self.tick_stats: StageStats = StageStats()  # pack + emit, per tick
+
+    def offer(self, computer_id: str, sample: Telemetry):
+        self.pending.put(computer_id, sample)
+
+    @property
+    def coalesced(self) -> int:
+        """Samples replaced by a newer one before they were broadcast."""
+        return self.pending.dropped
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            await self.pending.wait()
+            delay = next_tick - loop.time()
+            if delay > 0:
+                # Updates arriving until the tick are folded into the same broadcast.
+                await asyncio.sleep(delay)
+            if self.gate is not None:
+                await self.gate.checkpoint()
+            next_tick = max(next_tick + self.interval, loop.time())
+            await self._tick()
+
+    async def _tick(self):
+        started = time.perf_counter()
+        records: dict[str, R] = {}
+        for computer_id, (sample, offered) in self.pending.drain().items():
+            self.wait_stats.observe(started - offered)
+            try:
+                records[computer_id] = self.pack(computer_id, sample)
+            except (ValueError, OverflowError, struct.error) as e:
+                logger.error(f"Failed to pack display update for {computer_id}: {e}")
+        if records:
+            await self.emit(records)
+        self.ticks += 1
+        self.packets += len(records)
+        self.tick_stats.observe(time.perf_counter() - started)
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "max_rate_hz": 1 / self.interval,
+            "ticks": self.ticks,
+            "packets": self.packets,
+            "coalesced": self.coalesced,
+            "pending": len(self.pending),
+            "wait": self.wait_stats.as_dict(),
+            "tick": self.tick_stats.as_dict(),
+        }
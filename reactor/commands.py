@@ -0,0 +1,305 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Collection, Mapping
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from loguru import logger
+from pydantic_core import to_json
+
+from ingest import parse_json_object
+from metrics import LatencyHistogram
+from pipeline import PriorityGate, StageStats
+
+# Commands sent through the priority lane: written ahead of anything queued,
+# dispatched while bulk stages stand aside, never merged or dropped.
+PRIORITY_COMMANDS = frozenset({"emergency_stop"})
+
+
+class CommandTarget(Protocol):
+    """The part of a ComputerCraft websocket that command dispatch uses."""
+
+    async def send_text(self, data: str) -> None: ...
+
+
+@dataclass(slots=True)
+class CommandAck:
+    """``{"ack": <command id>, "ok": <bool>, "error": <str>}`` sent back by a computer."""
+
+    command_id: int
+    ok: bool
+    error: str | None = None
+
+
+def parse_ack(text: str) -> CommandAck | None:
+    """Decode an ack frame; None for anything else, such as telemetry."""
+    if '"ack"' not in text:
+        return None
+    try:
+        payload = parse_json_object(text)
+    except (ValueError, TypeError):
+        return None
+    command_id = payload.get("ack")
+    if type(command_id) is not int:
+        return None
+    error = payload.get("error")
+    return CommandAck(command_id, payload.get("ok") is not False, None if error is None else str(error))
+
+
+class CommandOutbox:
+    """Writes to one computer's socket, one at a time, with a lane that jumps the queue.
+
+    Priority frames are written before any queued normal frame, in the order
+    they were sent. A single writer means frames never interleave on the
+    socket, and a send the caller gave up on is still finished instead of
+    being cancelled halfway through a frame.
+    """
+
+    def __init__(self, target: CommandTarget):
+        self.target: CommandTarget = target
+        self.priority: deque[tuple[str, asyncio.Future[float | Exception]]] = deque()
+        self.normal: deque[tuple[str, asyncio.Future[float | Exception]]] = deque()
+        self._writer: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self.priority) + len(self.normal)
+
+    def send(self, data: str, priority: bool) -> asyncio.Future[float | Exception]:
+        """Queue ``data``; the future resolves to the perf_counter time it was written, or the error."""
+        future: asyncio.Future[float | Exception] = asyncio.get_running_loop().create_future()
+        (self.priority if priority else self.normal).append((data, future))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write())
+        return future
+
+    async def _write(self):
+        while self.priority or self.normal:
+            data, future = (self.priority or self.normal).popleft()
+            try:
+                await self.target.send_text(data)
+            except Exception as e:
+                future.set_result(e)
+            else:
+                future.set_result(time.perf_counter())
+
+
+@dataclass(slots=True)
+class TargetStats:
+    """Dispatch outcomes for one computer.
+
+    ``latency`` is the time until a send completed; ``rtt`` the time from the
+    first send until the computer acked, across retries.
+    """
+
+    latency: StageStats = field(default_factory=StageStats)
+    rtt: LatencyHistogram = field(default_factory=LatencyHistogram)
+    timeouts: int = 0
+    errors: int = 0
+    retries: int = 0
+    rejected: int = 0  # acked with ok=false
+    expired: int = 0  # never acked within the retry budget
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            **self.latency.as_dict(),
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "rtt": self.rtt.as_dict(),
+        }
+
+
+@dataclass(slots=True)
+class PendingCommand:
+    """A command sent to one computer and not acked yet."""
+
+    command_id: int
+    computer_id: str
+    data: str
+    priority: bool
+    first_sent: float
+    deadline: float
+    attempts: int = 1
+
+
+@dataclass(slots=True)
+class DispatchResult:
+    """Which targets a command was sent to, by ``computer_id``."""
+
+    command_id: int
+    delivered: list[str] = field(default_factory=list)
+    timed_out: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+    missing: list[str] = field(default_factory=list)  # addressed but not connected
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "id": self.command_id,
+            "delivered": self.delivered,
+            "timed_out": self.timed_out,
+            "failed": self.failed,
+            "missing": self.missing,
+        }
+
+
+class CommandDispatcher:
+    """Send commands to ComputerCraft computers and track their acks.
+
+    Every send runs concurrently with its own ``send_timeout``, so a stuck
+    socket costs the other targets nothing and a dispatch finishes within the
+    timeout. Dispatch works on a snapshot of ``connections``, which may change
+    while sends are in flight.
+
+    Each dispatch gets a command id that is sent with the command. Until the
+    computer acks it, the command stays pending; ``run`` resends it over the
+    computer's current connection every ``ack_timeout``, up to ``max_retries``
+    times, so computers must treat a repeated id as already executed.
+
+    Writes go through one ``CommandOutbox`` per connection. Commands in
+    ``PRIORITY_COMMANDS`` take its priority lane and are sent inside
+    ``gate.urgent()``, so ingest and fan-out stages yield the loop to them.
+    """
+
+    def __init__(
+        self,
+        connections: Mapping[str, CommandTarget],
+        send_timeout: float,
+        ack_timeout: float,
+        max_retries: int,
+        gate: PriorityGate | None = None,
+    ):
+        self.connections: Mapping[str, CommandTarget] = connections
+        self.gate: PriorityGate = gate or PriorityGate()
+        self.outboxes: dict[str, CommandOutbox] = {}
+        self.send_timeout: float = send_timeout
+        self.ack_timeout: float = ack_timeout
+        self.max_retries: int = max_retries
+        # Ids keep increasing across restarts, so a computer never mistakes a
+        # new command for one it already executed.
+        self.next_id: int = time.time_ns() // 1_000_000
+        self.dispatches: int = 0
+        self.pending: dict[tuple[str, int], PendingCommand] = {}
+        self.stale_acks: int = 0  # acks for commands no longer pending
+        self.dispatch_stats: StageStats = StageStats()
+        self.targets: dict[str, TargetStats] = {}
+
+    async def dispatch(
+        self, command: dict[str, object], computer_ids: Collection[str] | None = None
+    ) -> DispatchResult:
+        """Send ``command`` to ``computer_ids``, or to every connection if None."""
+        snapshot = dict(self.connections)
+        result = DispatchResult(self.next_id)
+        self.next_id += 1
+        self.dispatches += 1
+        if computer_ids is None:
+            targets = snapshot
+        else:
+            targets = {computer_id: snapshot[computer_id] for computer_id in computer_ids if computer_id in snapshot}
+            result.missing = [computer_id for computer_id in computer_ids if computer_id not in snapshot]
+        data = to_json({"id": result.command_id, **command}).decode()
+        priority = command.get("command") in PRIORITY_COMMANDS
+        started = time.perf_counter()
+        # Pending before the first send, so an ack can never arrive ahead of it.
+        for computer_id in targets:
+            self.pending[computer_id, result.command_id] = PendingCommand(
+                result.command_id, computer_id, data, priority, started, started + self.ack_timeout
+            )
+        outcomes = await self._send_all(
+            [(computer_id, target, data, priority) for computer_id, target in targets.items()], started
+        )
+        by_outcome = {"delivered": result.delivered, "timed_out": result.timed_out, "failed": result.failed}
+        for computer_id, outcome in zip(targets, outcomes):
+            by_outcome[outcome].append(computer_id)
+        self.dispatch_stats.observe(time.perf_counter() - started)
+        return result
+
+    def acknowledge(self, computer_id: str, ack: CommandAck):
+        command = self.pending.pop((computer_id, ack.command_id), None)
+        if command is None:
+            # A retry raced the ack, or the command already expired.
+            self.stale_acks += 1
+            return
+        stats = self._stats(computer_id)
+        stats.rtt.observe(time.perf_counter() - command.first_sent)
+        if not ack.ok:
+            stats.rejected += 1
+            logger.warning(f"ComputerCraft {computer_id} rejected command {ack.command_id}: {ack.error}")
+
+    async def run(self):
+        """Resend commands whose ack is overdue and expire those out of retries."""
+        while True:
+            await asyncio.sleep(self.ack_timeout / 4)
+            now = time.perf_counter()
+            resends: list[tuple[str, CommandTarget, str, bool]] = []
+            for key, command in list(self.pending.items()):
+                if command.deadline > now:
+                    continue
+                stats = self._stats(command.computer_id)
+                if command.attempts > self.max_retries:
+                    del self.pending[key]
+                    stats.expired += 1
+                    logger.error(
+                        f"Command {command.command_id} to ComputerCraft {command.computer_id} "
+                        + f"was not acked after {command.attempts} attempts"
+                    )
+                    continue
+                command.attempts += 1
+                command.deadline = now + self.ack_timeout
+                stats.retries += 1
+                # The computer may be reconnecting; the attempt still counts.
+                target = self.connections.get(command.computer_id)
+                if target is not None:
+                    resends.append((command.computer_id, target, command.data, command.priority))
+            if resends:
+                _ = await self._send_all(resends, now)
+
+    def _stats(self, computer_id: str) -> TargetStats:
+        stats = self.targets.get(computer_id)
+        if stats is None:
+            stats = self.targets[computer_id] = TargetStats()
+        return stats
+
+    async def _send_all(self, sends: list[tuple[str, CommandTarget, str, bool]], started: float) -> list[str]:
+        """Queue ``(computer_id, target, data, priority)`` sends and wait for them; outcome per send."""
+        futures: list[asyncio.Future[float | Exception]] = []
+        for computer_id, target, data, priority in sends:
+            outbox = self.outboxes.get(computer_id)
+            if outbox is None or outbox.target is not target:
+                outbox = self.outboxes[computer_id] = CommandOutbox(target)
+            futures.append(outbox.send(data, priority))
+        if futures:
+            # Writes that miss the timeout are not cancelled; a late one still completes.
+            with self.gate.urgent() if any(send[3] for send in sends) else nullcontext():
+                _ = await asyncio.wait(futures, timeout=self.send_timeout)
+        outcomes: list[str] = []
+        for (computer_id, *_), future in zip(sends, futures):
+            stats = self._stats(computer_id)
+            if not future.done():
+                stats.timeouts += 1
+                logger.error(f"Command to ComputerCraft {computer_id} timed out after {self.send_timeout}s")
+                outcomes.append("timed_out")
+            elif isinstance(written := future.result(), Exception):
+                stats.errors += 1
+                logger.error(f"Failed to send command to ComputerCraft {computer_id}: {written}")
+                outcomes.append("failed")
+            else:
+                # Time from the start of the dispatch, so it includes waiting for the loop.
+                stats.latency.observe(written - started)
+                outcomes.append("delivered")
+        return outcomes
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "send_timeout_ms": self.send_timeout * 1000,
+            "ack_timeout_ms": self.ack_timeout * 1000,
+            "dispatches": self.dispatches,
+            "pending": len(self.pending),
+            "stale_acks": self.stale_acks,
+            "queued": sum(len(outbox) for outbox in self.outboxes.values()),
+            "dispatch": self.dispatch_stats.as_dict(),
+            "targets": {computer_id: stats.as_dict() for computer_id, stats in self.targets.items()},
+        }
@@ -0,0 +1,134 @@
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import polars as pl
+
+from pipeline import StageStats
+
+
+@dataclass(slots=True, eq=False)
+class Run:
+    """Consecutive hot-log rows stored as one chunk."""
+
+    rows: int
+    created: float  # monotonic time it was appended or merged
+
+
+@dataclass(slots=True)
+class Compaction:
+    """Neighbouring runs to merge into one chunk, starting at row ``offset``."""
+
+    runs: list[Run]
+    offset: int
+    rows: int
+
+
+class LogCompactor:
+    """Size-tiered merging of the chunks the hot log is appended in.
+
+    Every flush appends one chunk and eviction trims chunks at the front. A
+    run's tier is ``log_fanout(rows / min_rows)``. Once ``fanout`` neighbouring
+    runs share a tier, or at least two do and the oldest is ``max_age``
+    seconds old, they are merged into one run of the next tier. A run older
+    than a run of a higher tier (left behind when a merge jumped a tier, say)
+    is merged into that newer run, so tiers only go down from oldest to
+    newest and the number of runs stays logarithmic. A row is copied about
+    ``log_fanout(max_rows / min_rows)`` times in all; runs of ``max_rows`` or
+    more are left alone, so no merge copies more than ``fanout * max_rows``
+    rows however long the history grows.
+    """
+
+    def __init__(self, fanout: int = 4, max_age: float = 300.0, max_rows: int = 1_000_000, min_rows: int = 1024):
+        self.fanout: int = fanout
+        self.max_age: float = max_age
+        self.max_rows: int = max_rows
+        self.min_rows: int = min_rows
+        self.runs: deque[Run] = deque()
+        self.merge_stats: StageStats = StageStats()
+        self.merged_rows: int = 0
+        self.discarded: int = 0  # merges whose rows were evicted while they ran
+
+    def reset(self, log: pl.DataFrame):
+        """Track ``log`` as it is chunked now."""
+        now = time.monotonic()
+        lengths = log.to_series(0).chunk_lengths() if log.width and log.height else []
+        self.runs = deque(Run(rows, now) for rows in lengths if rows)
+
+    def append(self, rows: int):
+        if rows:
+            self.runs.append(Run(rows, time.monotonic()))
+
+    def evict(self, rows: int):
+        """Forget the first ``rows`` rows, which were sliced off the log."""
+        while rows and self.runs:
+            run = self.runs[0]
+            if run.rows > rows:
+                run.rows -= rows
+                return
+            rows -= run.rows
+            _ = self.runs.popleft()
+
+    def tier(self, run: Run) -> int:
+        if run.rows >= self.max_rows:
+            return -1
+        return int(math.log(max(run.rows / self.min_rows, 1), self.fanout))
+
+    def plan(self) -> Compaction | None:
+        """The newest group of runs due for a merge, if any."""
+        now = time.monotonic()
+        end = len(self.runs)
+        offset = sum(run.rows for run in self.runs)
+        while end > 1:
+            tier = self.tier(self.runs[end - 1])
+            start = end - 1
+            while tier >= 0 and start > 0 and self.tier(self.runs[start - 1]) == tier:
+                start -= 1
+            group = [self.runs[i] for i in range(start, end)]
+            offset -= sum(run.rows for run in group)
+            if len(group) >= self.fanout or (len(group) > 1 and now - group[0].created >= self.max_age):
+                # The oldest fanout runs; any newer ones wait for the next round.
+                group = group[: self.fanout]
+                return Compaction(group, offset, sum(run.rows for run in group))
+            # The front run is left alone: eviction keeps shrinking it and soon drops it.
+            if tier >= 0 and end < len(self.runs) and end > 1:
+                run, newer = group[-1], self.runs[end]
+                if self.tier(newer) > tier:
+                    return Compaction([run, newer], offset + sum(r.rows for r in group[:-1]), run.rows + newer.rows)
+            end = start
+        return None
+
+    def apply(self, log: pl.DataFrame, compaction: Compaction, merged: pl.DataFrame) -> pl.DataFrame | None:
+        """Splice ``merged`` into ``log``, which may have grown or been evicted from since ``plan``.
+
+        Returns None, and drops the merge, if eviction reached the planned runs.
+        """
+        offset = 0
+        for first, run in enumerate(self.runs):
+            if run is compaction.runs[0]:
+                break
+            offset += run.rows
+        else:
+            self.discarded += 1
+            return None
+        count = len(compaction.runs)
+        runs = [self.runs[i] for i in range(first, min(first + count, len(self.runs)))]
+        if sum(run.rows for run in runs) != compaction.rows:
+            self.discarded += 1
+            return None
+        for _ in range(count):
+            del self.runs[first]
+        self.runs.insert(first, Run(compaction.rows, time.monotonic()))
+        self.merged_rows += compaction.rows
+        return pl.concat([log.slice(0, offset), merged, log.slice(offset + compaction.rows)], rechunk=False)
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "runs": len(self.runs),
+            "fanout": self.fanout,
+            "max_age_s": self.max_age,
+            "merges": self.merge_stats.as_dict(),
+            "merged_rows": self.merged_rows,
+            "discarded": self.discarded,
+        }
@@ -5,7 +5,10 @@ local config = {
   -- Server connection settings
   SERVER_URL = "ws://localhost:8765/ws/computercraft/" .. os.getComputerID(),
   SECRET_KEY = "supersecretkey", -- IMPORTANT: Change this to match your server's SECRET_KEY
-  UPDATE_INTERVAL = 1, -- seconds
+  UPDATE_INTERVAL = 1, -- seconds between reactor samples
+  BATCH_INTERVAL = 1, -- seconds between frames; samples taken in between are sent as one batch
+  MAX_PENDING = 600, -- samples kept for resending while the server is unreachable
+  PROTOCOL = "binary", -- "binary" (compact fixed-width frames) or "json"
 
   -- Alert thresholds
   ALERT_THRESHOLDS = {
@@ -0,0 +1,101 @@
+import asyncio
+from dataclasses import dataclass
+
+from pydantic_core import to_json
+
+from broadcast import Broadcaster
+from ingest import Telemetry
+from pipeline import PriorityGate
+
+# Field values of one reactor as last sent to dashboards.
+ReactorFields = dict[str, object]
+
+
+@dataclass(slots=True, eq=False)
+class DashboardClient:
+    """Encoded messages waiting to be sent to one dashboard."""
+
+    queue: asyncio.Queue[str]
+    resyncs: int = 0
+
+
+class DashboardHub:
+    """Push live reactor state to dashboards: a snapshot, then field-level deltas.
+
+    Samples are coalesced per reactor and ticked at ``max_rate_hz`` by a
+    ``Broadcaster``. Each tick diffs the newest sample of every reactor that
+    reported against the state dashboards already have, encodes the changed
+    fields once, and queues the same string for every client. Reading state
+    never touches ``DataManager``.
+
+    Client queues hold at most ``queue_size`` messages. When a slow client's
+    queue is full, its queued deltas are dropped and replaced by one snapshot
+    of the current state, so it skips intermediate states but stays consistent.
+    """
+
+    def __init__(self, max_rate_hz: float, queue_size: int, gate: PriorityGate | None = None):
+        self.queue_size: int = queue_size
+        self.state: dict[str, ReactorFields] = {}
+        self.clients: set[DashboardClient] = set()
+        self.seq: int = 0  # deltas published; a snapshot covers every delta up to its seq
+        self.resyncs: int = 0
+        self.broadcaster: Broadcaster[ReactorFields] = Broadcaster(max_rate_hz, self._diff, self._publish, gate)
+
+    def offer(self, computer_id: str, sample: Telemetry):
+        self.broadcaster.offer(computer_id, sample)
+
+    async def run(self):
+        await self.broadcaster.run()
+
+    def connect(self) -> DashboardClient:
+        """Register a dashboard; its first message is a snapshot of the current state."""
+        client = DashboardClient(asyncio.Queue(self.queue_size))
+        # No await between the snapshot and registration, so no delta is missed.
+        client.queue.put_nowait(self._encode("snapshot", self.state))
+        self.clients.add(client)
+        return client
+
+    def disconnect(self, client: DashboardClient):
+        self.clients.discard(client)
+
+    def _encode(self, kind: str, reactors: dict[str, ReactorFields]) -> str:
+        return to_json({"type": kind, "seq": self.seq, "reactors": reactors}).decode()
+
+    def _diff(self, computer_id: str, sample: Telemetry) -> ReactorFields:
+        """Fields of ``sample`` that dashboards have not seen; updates ``state``."""
+        fields: ReactorFields = sample._asdict()
+        known = self.state.get(computer_id)
+        if known is None:
+            self.state[computer_id] = fields
+            return dict(fields)
+        changed = {name: value for name, value in fields.items() if known[name] != value}
+        known.update(changed)
+        return changed
+
+    async def _publish(self, deltas: dict[str, ReactorFields]):
+        changed = {computer_id: fields for computer_id, fields in deltas.items() if fields}
+        if not changed or not self.clients:
+            return
+        self.seq += 1
+        message = self._encode("delta", changed)
+        snapshot: str | None = None
+        for client in self.clients:
+            try:
+                client.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                if snapshot is None:
+                    snapshot = self._encode("snapshot", self.state)
+                while not client.queue.empty():
+                    _ = client.queue.get_nowait()
+                client.queue.put_nowait(snapshot)
+                client.resyncs += 1
+                self.resyncs += 1
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "clients": len(self.clients),
+            "seq": self.seq,
+            "resyncs": self.resyncs,
+            "max_queued": max((client.queue.qsize() for client in self.clients), default=0),
+            "broadcast": self.broadcaster.as_dict(),
+        }
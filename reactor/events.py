@@ -0,0 +1,129 @@
+import asyncio
+from bisect import bisect_right
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+from pydantic_core import to_json
+
+from index import from_us
+from ingest import Telemetry
+
+_STATUS = Telemetry._fields.index("status")
+_ALERT_STATUS = Telemetry._fields.index("alert_status")
+
+
+def sse_event(event: str, event_id: int, data: object) -> str:
+    """One Server-Sent Events message; ``data`` is JSON encoded on a single line."""
+    return f"id: {event_id}\nevent: {event}\ndata: {to_json(data).decode()}\n\n"
+
+
+def sample_event(seq: int, computer_id: str, timestamp: datetime, fields: dict[str, object]) -> str:
+    return sse_event(
+        "sample", seq, {"seq": seq, "computer_id": computer_id, "timestamp": timestamp, **fields}
+    )
+
+
+@dataclass(slots=True)
+class SampleBlock:
+    """Consecutive samples of one reactor, stored as the ingest call received them.
+
+    ``rows`` are ``Telemetry`` tuples or the rows of a batch's value matrix;
+    nothing is converted until a stream first reads the block, and then the
+    events are encoded once for every stream.
+    """
+
+    first_seq: int
+    computer_id: str
+    timestamp_us: Sequence[int] | np.ndarray
+    rows: Sequence[Sequence[float]] | np.ndarray
+    encoded: list[str] | None = None
+
+    @property
+    def end_seq(self) -> int:
+        return self.first_seq + len(self.timestamp_us)
+
+    def events(self) -> list[str]:
+        if self.encoded is None:
+            timestamps: list[int] = (
+                self.timestamp_us.tolist() if isinstance(self.timestamp_us, np.ndarray) else list(self.timestamp_us)
+            )
+            rows: list[Sequence[float]] = self.rows.tolist() if isinstance(self.rows, np.ndarray) else list(self.rows)
+            encoded: list[str] = []
+            for offset, (timestamp_us, row) in enumerate(zip(timestamps, rows)):
+                fields: dict[str, object] = dict(zip(Telemetry._fields, row))
+                # Batch rows are float64; restore the column types.
+                fields["status"] = bool(row[_STATUS])
+                fields["alert_status"] = int(row[_ALERT_STATUS])
+                encoded.append(sample_event(self.first_seq + offset, self.computer_id, from_us(timestamp_us), fields))
+            self.encoded = encoded
+        return self.encoded
+
+
+class SampleFeed:
+    """The most recent samples in ``seq`` order, for streams to read without the log lock.
+
+    Ingest publishes one block per call, so a batch costs one append. Roughly
+    the newest ``capacity`` samples are kept; a stream whose cursor falls
+    behind the oldest block resumes from the data log instead.
+    """
+
+    def __init__(self, capacity: int, next_seq: int):
+        self.capacity: int = capacity
+        self.end_seq: int = next_seq  # seq of the next sample to be published
+        self.size: int = 0
+        self._blocks: list[SampleBlock] = []
+        self._first_seqs: list[int] = []
+        self._head: int = 0  # blocks before _head were dropped
+        self._published: asyncio.Event = asyncio.Event()
+
+    @property
+    def oldest_seq(self) -> int:
+        return self._first_seqs[self._head] if self._head < len(self._blocks) else self.end_seq
+
+    def covers(self, after: int) -> bool:
+        """Whether every sample after ``after`` is still in the feed."""
+        return after + 1 >= self.oldest_seq
+
+    def publish(self, block: SampleBlock):
+        self._blocks.append(block)
+        self._first_seqs.append(block.first_seq)
+        self.end_seq = block.end_seq
+        self.size += len(block.timestamp_us)
+        while self.size - len(self._blocks[self._head].timestamp_us) >= self.capacity:
+            self.size -= len(self._blocks[self._head].timestamp_us)
+            self._head += 1
+        if self._head > len(self._blocks) // 2:
+            del self._blocks[: self._head]
+            del self._first_seqs[: self._head]
+            self._head = 0
+        # Waiting streams hold the old event; each publish wakes them once.
+        published, self._published = self._published, asyncio.Event()
+        published.set()
+
+    async def wait(self, after: int):
+        """Wait until a sample newer than ``after`` has been published."""
+        while self.end_seq <= after + 1:
+            _ = await self._published.wait()
+
+    def read(self, after: int, computer_id: str | None, limit: int) -> tuple[list[str], int]:
+        """Encoded events after ``after``, and the seq the caller has now seen up to.
+
+        Blocks of other reactors are skipped but still advance the cursor.
+        Reading stops at the first block boundary past ``limit`` events.
+        """
+        events: list[str] = []
+        index = max(bisect_right(self._first_seqs, after, lo=self._head) - 1, self._head)
+        while index < len(self._blocks) and len(events) < limit:
+            block = self._blocks[index]
+            index += 1
+            if block.end_seq <= after + 1:
+                continue
+            if computer_id is None or block.computer_id == computer_id:
+                events.extend(block.events()[max(after + 1 - block.first_seq, 0) :])
+            after = block.end_seq - 1
+        return events, after
+
+    def as_dict(self) -> dict[str, int]:
+        return {"oldest_seq": self.oldest_seq, "next_seq": self.end_seq, "samples": self.size}
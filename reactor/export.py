@@ -0,0 +1,91 @@
+import asyncio
+import io
+import threading
+from collections.abc import AsyncIterator, Callable
+from contextlib import suppress
+from typing import IO, cast
+
+import polars as pl
+
+# Media type and file suffix per export format.
+EXPORT_FORMATS: dict[str, tuple[str, str]] = {
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class ExportClosed(OSError):
+    """The client went away; raised inside the sink to stop the query."""
+
+
+class _ChunkSink(io.RawIOBase):
+    """File object a Polars sink writes to, handing each write to the event loop.
+
+    At most ``max_pending`` chunks wait for the client; after that the sink
+    thread blocks, so a slow reader slows the query instead of buffering it.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue[bytes | None], max_pending: int):
+        super().__init__()
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.queue: asyncio.Queue[bytes | None] = queue
+        self.slots: threading.Semaphore = threading.Semaphore(max_pending)
+        self.closed_by_client: bool = False
+        self.bytes: int = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: bytes | bytearray | memoryview) -> int:  # pyright: ignore[reportIncompatibleMethodOverride]
+        while not self.slots.acquire(timeout=0.1):
+            if self.closed_by_client:
+                raise ExportClosed
+        if self.closed_by_client:
+            raise ExportClosed
+        chunk = bytes(b)
+        self.bytes += len(chunk)
+        _ = self.loop.call_soon_threadsafe(self.queue.put_nowait, chunk)
+        return len(chunk)
+
+    def finish(self):
+        _ = self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+
+def _sink(frame: pl.LazyFrame, export_format: str) -> Callable[[IO[bytes]], object]:
+    if export_format == "parquet":
+        return lambda sink: frame.sink_parquet(sink, row_group_size=128 * 1024)
+    return lambda sink: frame.sink_ipc(sink)
+
+
+async def stream_export(frame: pl.LazyFrame, export_format: str, max_pending: int = 8) -> AsyncIterator[bytes]:
+    """Run ``frame`` through a streaming Polars sink and yield the file as it is written.
+
+    Parquet comes out one row group at a time and Arrow IPC one record batch
+    at a time, so memory stays bounded by ``max_pending`` chunks plus the
+    engine's working set, however many rows are exported.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[bytes | None] = asyncio.Queue()
+    sink = _ChunkSink(loop, queue, max_pending)
+    write = _sink(frame, export_format)
+    # Polars only calls write() on the target; the sink implements no more of IO[bytes].
+    target = cast(IO[bytes], cast(object, sink))
+
+    def run():
+        try:
+            _ = write(target)
+        finally:
+            sink.finish()
+
+    task = asyncio.ensure_future(asyncio.to_thread(run))
+    try:
+        while (chunk := await queue.get()) is not None:
+            sink.slots.release()
+            yield chunk
+        await task  # re-raises a failed query
+    finally:
+        if not task.done():
+            sink.closed_by_client = True
+            # Polars reports the failed write as an OSError or, from Parquet, a ComputeError.
+            with suppress(OSError, pl.exceptions.ComputeError):
+                await task
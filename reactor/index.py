@@ -0,0 +1,256 @@
+import base64
+import binascii
+import struct
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import cast, overload
+
+import numpy as np
+import polars as pl
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_CURSOR = struct.Struct(">qq?")
+# struct types what it unpacks as Any: (timestamp_us, seq, backward).
+_unpack_cursor: Callable[[bytes], tuple[int, int, bool]] = _CURSOR.unpack
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+
+def naive_local(value: datetime) -> datetime:
+    """The log stores naive local time; convert aware datetimes from queries to match."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+@overload
+def to_us(value: datetime) -> int: ...
+@overload
+def to_us(value: datetime | None) -> int | None: ...
+def to_us(value: datetime | None) -> int | None:
+    """Microseconds since the epoch as stored in the log's Datetime column."""
+    if value is None:
+        return None
+    return (naive_local(value) - _EPOCH) // _MICROSECOND
+
+
+def from_us(value: int) -> datetime:
+    """Inverse of ``to_us``: the naive local datetime of a log timestamp."""
+    return _EPOCH + timedelta(microseconds=value)
+
+
+class _GrowableArray:
+    """Append-only int64 array with amortized O(1) appends and O(1) head drops.
+
+    Appends only write past the end and growth copies into a new array, so a
+    ``values`` view taken earlier never changes.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._data: np.ndarray = np.empty(capacity, dtype=np.int64)
+        self._start: int = 0
+        self._stop: int = 0
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._data[self._start : self._stop]
+
+    def extend(self, values: np.ndarray):
+        needed = self._stop + len(values)
+        if needed > len(self._data):
+            live = self.values
+            capacity = max(len(self._data), 2 * (len(live) + len(values)))
+            data = np.empty(capacity, dtype=np.int64)
+            data[: len(live)] = live
+            self._data, self._start, self._stop = data, 0, len(live)
+            needed = self._stop + len(values)
+        self._data[self._stop : needed] = values
+        self._stop = needed
+
+    def drop_head(self, count: int):
+        self._start = min(self._start + count, self._stop)
+
+
+class TimeIndex:
+    """Row offsets into the timestamp-sorted hot log, globally and per reactor.
+
+    Rows are identified by their absolute position since the index was built;
+    ``base`` is the absolute position of ``data_log`` row 0, so evicting rows
+    from the head of the log only moves ``base``. Each reactor keeps its own
+    sorted timestamp array next to its row positions, so a range lookup is two
+    binary searches plus a gather of the ``k`` matching rows.
+    """
+
+    def __init__(self):
+        self.base: int = 0
+        self.total: int = 0
+        self._timestamps: dict[str, _GrowableArray] = {}
+        self._positions: dict[str, _GrowableArray] = {}
+
+    def append(self, new_rows: pl.DataFrame):
+        """Index rows that were just appended to the end of the log."""
+        if new_rows.is_empty():
+            return
+        indexed = new_rows.select(
+            (pl.int_range(pl.len(), dtype=pl.Int64) + self.total).alias("position"),
+            pl.col("timestamp").cast(pl.Int64),
+            pl.col("computer_id").cast(pl.String),
+        )
+        for group, part in indexed.partition_by("computer_id", as_dict=True).items():
+            (computer_id,) = cast(tuple[object], group)
+            key = str(computer_id)
+            if key not in self._timestamps:
+                self._timestamps[key] = _GrowableArray()
+                self._positions[key] = _GrowableArray()
+            self._timestamps[key].extend(part.get_column("timestamp").to_numpy())
+            self._positions[key].extend(part.get_column("position").to_numpy())
+        self.total += new_rows.height
+
+    def evict(self, count: int):
+        """Forget the first ``count`` rows of the log."""
+        self.base += count
+        for computer_id, positions in self._positions.items():
+            dropped = int(np.searchsorted(positions.values, self.base, side="left"))
+            positions.drop_head(dropped)
+            self._timestamps[computer_id].drop_head(dropped)
+
+    def rows(self, computer_id: str, start_us: int | None, end_us: int | None) -> np.ndarray:
+        """Log row numbers of ``computer_id`` with timestamps in ``[start_us, end_us)``."""
+        timestamps = self._timestamps.get(computer_id)
+        if timestamps is None:
+            return np.empty(0, dtype=np.int64)
+        return _rows_in_range(timestamps.values, self._positions[computer_id].values, self.base, start_us, end_us)
+
+    def snapshot(self) -> "IndexSnapshot":
+        """The index as it is now; later appends and evictions do not affect it."""
+        return IndexSnapshot(
+            self.base,
+            {computer_id: array.values for computer_id, array in self._timestamps.items()},
+            {computer_id: array.values for computer_id, array in self._positions.items()},
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class IndexSnapshot:
+    """Immutable ``TimeIndex`` view matching one generation of the hot log."""
+
+    base: int
+    timestamps: dict[str, np.ndarray]
+    positions: dict[str, np.ndarray]
+
+    def rows(self, computer_id: str, start_us: int | None, end_us: int | None) -> np.ndarray:
+        """Log row numbers of ``computer_id`` with timestamps in ``[start_us, end_us)``."""
+        timestamps = self.timestamps.get(computer_id)
+        if timestamps is None:
+            return np.empty(0, dtype=np.int64)
+        return _rows_in_range(timestamps, self.positions[computer_id], self.base, start_us, end_us)
+
+    def tail_rows(self, computer_id: str, count: int) -> np.ndarray:
+        """Log row numbers of the newest ``count`` rows of ``computer_id``."""
+        positions = self.positions.get(computer_id)
+        if positions is None:
+            return np.empty(0, dtype=np.int64)
+        return positions[max(len(positions) - count, 0) :] - self.base
+
+    def page_rows(self, computer_id: str, cursor: "Cursor", limit: int) -> np.ndarray:
+        """Log row numbers of ``computer_id`` that may be in the page beyond ``cursor``; see ``page_bounds``."""
+        timestamps = self.timestamps.get(computer_id)
+        if timestamps is None:
+            return np.empty(0, dtype=np.int64)
+        lo, hi = page_bounds(pl.Series(timestamps), cursor, limit)
+        return self.positions[computer_id][lo:hi] - self.base
+
+
+def _rows_in_range(
+    timestamps: np.ndarray, positions: np.ndarray, base: int, start_us: int | None, end_us: int | None
+) -> np.ndarray:
+    lo = 0 if start_us is None else int(np.searchsorted(timestamps, start_us, side="left"))
+    hi = len(timestamps) if end_us is None else int(np.searchsorted(timestamps, end_us, side="left"))
+    return positions[lo:hi] - base
+
+
+def sorted_range(log: pl.DataFrame, start: int | None, end: int | None) -> pl.DataFrame:
+    """Slice rows with ``start <= timestamp < end`` (µs) by binary search on the sorted column."""
+    timestamps = log.get_column("timestamp").cast(pl.Int64).set_sorted()
+    lo = 0 if start is None else int(timestamps.search_sorted(start, side="left"))
+    hi = log.height if end is None else int(timestamps.search_sorted(end, side="left"))
+    return log.slice(lo, max(hi - lo, 0))
+
+
+@dataclass(frozen=True, slots=True)
+class Cursor:
+    """A position in the log's ``(timestamp, seq)`` order and the direction to page from it.
+
+    Clients get it as an opaque URL-safe token. Rows without a seq sort as
+    seq -1. New rows are appended at the newest end of this order, so pages
+    already read never change.
+    """
+
+    timestamp_us: int
+    seq: int
+    backward: bool = False
+
+    @classmethod
+    def oldest(cls) -> "Cursor":
+        """Before every row; pages forward from the start of the history."""
+        return cls(_INT64_MIN, _INT64_MIN)
+
+    @classmethod
+    def before(cls, timestamp_us: int) -> "Cursor":
+        """Before every row at or after ``timestamp_us``; pages forward from there."""
+        return cls(timestamp_us, _INT64_MIN)
+
+    @classmethod
+    def newest(cls) -> "Cursor":
+        """After every row; pages backward from the newest one."""
+        return cls(_INT64_MAX, _INT64_MAX, backward=True)
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(_CURSOR.pack(self.timestamp_us, self.seq, self.backward)).rstrip(b"=").decode()
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        """Inverse of ``encode``; ValueError for anything it did not produce."""
+        try:
+            return cls(*_unpack_cursor(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))))
+        except (binascii.Error, struct.error) as e:
+            raise ValueError(f"invalid cursor {token!r}") from e
+
+    def turned(self, backward: bool) -> "Cursor":
+        return Cursor(self.timestamp_us, self.seq, backward)
+
+    def beyond(self) -> pl.Expr:
+        """Rows strictly past the cursor in its direction."""
+        timestamp = pl.col("timestamp").cast(pl.Int64)
+        seq = pl.col("seq").fill_null(-1)
+        if self.backward:
+            return (timestamp < self.timestamp_us) | ((timestamp == self.timestamp_us) & (seq < self.seq))
+        return (timestamp > self.timestamp_us) | ((timestamp == self.timestamp_us) & (seq > self.seq))
+
+
+def page_bounds(timestamps: pl.Series, cursor: Cursor, limit: int) -> tuple[int, int]:
+    """Slots ``[lo, hi)`` of sorted µs ``timestamps`` that hold the ``limit`` rows beyond ``cursor``.
+
+    Rows with equal timestamps are not ordered by seq, so the slots are widened
+    to whole runs of equal timestamps at both ends; filter with
+    ``cursor.beyond()``, sort and cut to ``limit`` afterwards. Costs two binary
+    searches plus the ties, however long the array.
+    """
+    timestamps = timestamps.set_sorted()
+    n = len(timestamps)
+    first = int(timestamps.search_sorted(cursor.timestamp_us, side="left"))
+    last = int(timestamps.search_sorted(cursor.timestamp_us, side="right"))
+    if cursor.backward:
+        lo = max(first - limit, 0)
+        if lo > 0:
+            lo = int(timestamps.search_sorted(cast(int, timestamps[lo]), side="left"))
+        return lo, last
+    hi = min(last + limit, n)
+    if hi > last:
+        hi = int(timestamps.search_sorted(cast(int, timestamps[hi - 1]), side="right"))
+    return first, hi
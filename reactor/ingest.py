@@ -0,0 +1,457 @@
+import binascii
+import struct
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import NamedTuple, cast
+
+import numpy as np
+import numpy.typing as npt
+import polars as pl
+from pydantic_core import from_json
+
+from storage import LOG_SCHEMA
+
+# Longest computer_id in UTF-8 bytes. WAL blocks and display records store its
+# length in one byte; longer ids are refused when the computer connects.
+MAX_COMPUTER_ID_BYTES = 255
+
+FLOAT_FIELDS: tuple[str, ...] = (
+    "temperature",
+    "fuel_level",
+    "coolant_level",
+    "waste_level",
+    "burn_rate",
+    "actual_burn_rate",
+)
+
+
+class Telemetry(NamedTuple):
+    """One reactor sample, in the column order of ``IngestBuffer.append``."""
+
+    temperature: float = 0.0
+    fuel_level: float = 0.0
+    coolant_level: float = 0.0
+    waste_level: float = 0.0
+    status: bool = False
+    burn_rate: float = 0.0
+    actual_burn_rate: float = 0.0
+    alert_status: int = 0
+
+
+class MalformedFrame(ValueError):
+    """A telemetry frame that is not a JSON object of numeric fields."""
+
+
+_TELEMETRY_COLUMNS: dict[str, int] = {name: i for i, name in enumerate(Telemetry._fields)}
+_make_telemetry = Telemetry._make
+_DECODE_ERRORS = (ValueError, TypeError, AttributeError, KeyError, OverflowError)
+# A parsed JSON object; its keys are always strings.
+_JsonObject = dict[str, object]
+# from_json is typed to return Any; what it returns is narrowed by _object.
+_parse_json: Callable[[str | bytes], object] = from_json
+
+
+def _object(value: object) -> _JsonObject:
+    """``value`` as a parsed JSON object."""
+    if not isinstance(value, dict):
+        raise TypeError(f"expected a JSON object, got {type(value).__name__}")
+    return cast(_JsonObject, value)
+
+
+def parse_json_object(frame: str | bytes) -> dict[str, object]:
+    """Parse a text frame that must hold a JSON object.
+
+    Raises ``ValueError`` for invalid JSON and ``TypeError`` for any other
+    JSON value.
+    """
+    return _object(_parse_json(frame))
+
+
+# What float() takes from parsed JSON, most common first; bool is an int.
+_NUMBER = (float, int, str)
+
+
+def _coerce(sample: _JsonObject) -> Telemetry:
+    """Build a ``Telemetry`` from a parsed JSON object.
+
+    The numeric fields are narrowed by one chained ``isinstance`` test rather
+    than a checking call per field, which would add half the decode cost.
+    """
+    get = sample.get
+    temperature = get("temperature", 0.0)
+    fuel_level = get("fuel_level", 0.0)
+    coolant_level = get("coolant_level", 0.0)
+    waste_level = get("waste_level", 0.0)
+    burn_rate = get("burn_rate", 0.0)
+    actual_burn_rate = get("actual_burn_rate", 0.0)
+    alert_status = get("alert_status", 0)
+    if not (
+        isinstance(temperature, _NUMBER)
+        and isinstance(fuel_level, _NUMBER)
+        and isinstance(coolant_level, _NUMBER)
+        and isinstance(waste_level, _NUMBER)
+        and isinstance(burn_rate, _NUMBER)
+        and isinstance(actual_burn_rate, _NUMBER)
+        and isinstance(alert_status, _NUMBER)
+    ):
+        raise TypeError("telemetry fields must be numbers")
+    return _make_telemetry(
+        (
+            float(temperature),
+            float(fuel_level),
+            float(coolant_level),
+            float(waste_level),
+            # The Lua collector reports "disassembled" instead of a bool for unformed reactors.
+            get("status") is True,
+            float(burn_rate),
+            float(actual_burn_rate),
+            int(alert_status),
+        )
+    )
+
+
+def decode_telemetry(frame: str | bytes) -> Telemetry:
+    """Decode one JSON telemetry frame into a ``Telemetry`` tuple.
+
+    The frame is parsed by ``pydantic_core.from_json`` and each field is
+    coerced with ``float``/``int`` directly; no model instance is built, which
+    roughly halves the per-frame cost of ``BaseModel.model_validate_json``.
+    Missing fields take their defaults. Anything that is not an object of
+    numbers raises ``MalformedFrame``.
+    """
+    try:
+        return _coerce(parse_json_object(frame))
+    except _DECODE_ERRORS as e:
+        raise MalformedFrame(str(e)) from None
+
+
+@dataclass(slots=True)
+class TelemetryBatch:
+    """Samples from one batch envelope, in the order the client took them.
+
+    ``values`` holds one row per sample with the ``Telemetry`` fields as
+    float64 columns, ready for ``IngestBuffer.extend``.
+    """
+
+    seq: npt.NDArray[np.int64]  # client sequence numbers
+    tick_ms: npt.NDArray[np.int64]  # client clock, ms since the epoch
+    values: npt.NDArray[np.float64]
+    latest: Telemetry
+
+    def __len__(self) -> int:
+        return len(self.seq)
+
+    def by_tick(self) -> "TelemetryBatch":
+        """The batch with its samples in tick order, ``latest`` being the newest tick's.
+
+        Clients normally send samples in order, in which case the batch is
+        returned as it is.
+        """
+        if bool((self.tick_ms[1:] >= self.tick_ms[:-1]).all()):
+            return self
+        order = np.argsort(self.tick_ms, kind="stable")
+        values = self.values[order]
+        return TelemetryBatch(
+            seq=self.seq[order],
+            tick_ms=self.tick_ms[order],
+            values=values,
+            latest=_row_telemetry(values, -1),
+        )
+
+
+def _row_telemetry(values: npt.NDArray[np.float64], row: int) -> Telemetry:
+    """The sample in row ``row`` of a ``TelemetryBatch.values`` array."""
+    item = values.item
+    return Telemetry(
+        item(row, 0),
+        item(row, 1),
+        item(row, 2),
+        item(row, 3),
+        item(row, 4) != 0,
+        item(row, 5),
+        item(row, 6),
+        int(item(row, 7)),
+    )
+
+
+def decode_frame(frame: str | bytes) -> Telemetry | TelemetryBatch:
+    """Decode a single-sample frame or a batch envelope.
+
+    A batch envelope is ``{"batch": [sample, ...]}`` where every sample is a
+    telemetry object with an integer ``seq`` and a ``tick`` timestamp in
+    milliseconds. Any other object is decoded as a single sample.
+    """
+    try:
+        payload = parse_json_object(frame)
+        items = payload.get("batch")
+        if items is None:
+            return _coerce(payload)
+        if not isinstance(items, list):
+            raise MalformedFrame("batch is not a list")
+        if not items:
+            raise MalformedFrame("empty batch")
+        samples = [_object(item) for item in cast(list[object], items)]
+        # One pass per column; numpy assignment coerces like float() but turns null into NaN.
+        values: np.ndarray = np.empty((len(samples), len(Telemetry._fields)), dtype=np.float64, order="F")
+        for column, name in enumerate(Telemetry._fields):
+            if name == "status":
+                values[:, column] = [sample.get(name) is True for sample in samples]
+            else:
+                values[:, column] = [sample.get(name, 0.0) for sample in samples]
+        if np.isnan(values).any():
+            raise MalformedFrame("null or NaN field in batch")
+        return TelemetryBatch(
+            seq=np.array([sample["seq"] for sample in samples], dtype=np.int64),
+            tick_ms=np.array([sample["tick"] for sample in samples], dtype=np.int64),
+            values=values,
+            latest=_coerce(samples[-1]),
+        )
+    except _DECODE_ERRORS as e:
+        raise MalformedFrame(str(e)) from None
+
+
+# --- Binary frames ---
+# Version 1, little-endian:
+#   header  [magic:u8=0xB7][version:u8][count:u16][base_seq:u32][base_tick:i64 ms]
+#   sample  [seq_delta:u16][tick_delta:u32 ms][6 x f32][status:u8][alert_status:u8]
+#   trailer [crc16:u16]  CRC-16/CCITT (XModem) of header + samples
+BINARY_MAGIC = 0xB7
+_BINARY_HEADER = struct.Struct("<BBHIq")
+_BINARY_TRAILER = struct.Struct("<H")
+# Per version: the sample layout as a struct (single samples) and a numpy dtype (batches).
+_BINARY_STRUCTS: dict[int, struct.Struct] = {1: struct.Struct("<HIffffffBB")}
+_BINARY_DTYPES: dict[int, np.dtype[np.void]] = {
+    1: np.dtype(
+        [
+            ("seq_delta", "<u2"),
+            ("tick_delta", "<u4"),
+            ("temperature", "<f4"),
+            ("fuel_level", "<f4"),
+            ("coolant_level", "<f4"),
+            ("waste_level", "<f4"),
+            ("burn_rate", "<f4"),
+            ("actual_burn_rate", "<f4"),
+            ("status", "u1"),
+            ("alert_status", "u1"),
+        ]
+    ),
+}
+# struct types what it unpacks as Any; these name the fields of the layouts above.
+_unpack_header: Callable[[bytes], tuple[int, int, int, int, int]] = _BINARY_HEADER.unpack_from
+_unpack_trailer: Callable[[bytes, int], tuple[int]] = _BINARY_TRAILER.unpack_from
+_BinarySample = tuple[int, int, float, float, float, float, float, float, int, int]
+_UNPACK_SAMPLE: dict[int, Callable[[bytes, int], _BinarySample]] = {
+    version: layout.unpack_from for version, layout in _BINARY_STRUCTS.items()
+}
+
+
+class SequencedTelemetry(NamedTuple):
+    """A single sample that carries the client's sequence number and tick."""
+
+    seq: int
+    tick_ms: int
+    telemetry: Telemetry
+
+
+def decode_binary_frame(frame: bytes) -> SequencedTelemetry | TelemetryBatch:
+    """Decode a binary telemetry frame with its version's precompiled layout.
+
+    A frame with several samples is viewed in place as a numpy structured
+    array, so every column is converted with one vectorized copy; a single
+    sample is unpacked with ``struct``, which is cheaper than setting up the
+    arrays. Raises ``MalformedFrame`` for an unknown version, a length that
+    does not match ``count`` or a CRC mismatch.
+    """
+    if len(frame) < _BINARY_HEADER.size + _BINARY_TRAILER.size:
+        raise MalformedFrame(f"binary frame too short ({len(frame)} bytes)")
+    magic, version, count, base_seq, base_tick = _unpack_header(frame)
+    layout = _BINARY_DTYPES.get(version)
+    if magic != BINARY_MAGIC or layout is None:
+        raise MalformedFrame(f"unknown binary frame magic/version {magic:#x}/{version}")
+    body_end = _BINARY_HEADER.size + count * layout.itemsize
+    if count == 0 or len(frame) != body_end + _BINARY_TRAILER.size:
+        raise MalformedFrame(f"binary frame of {len(frame)} bytes does not hold {count} samples")
+    (crc,) = _unpack_trailer(frame, body_end)
+    if binascii.crc_hqx(memoryview(frame)[:body_end], 0) != crc:
+        raise MalformedFrame("binary frame CRC mismatch")
+
+    if count == 1:
+        seq, tick, temp, fuel, coolant, waste, burn, actual, status, alert = _UNPACK_SAMPLE[version](
+            frame, _BINARY_HEADER.size
+        )
+        return SequencedTelemetry(
+            base_seq + seq,
+            base_tick + tick,
+            Telemetry(temp, fuel, coolant, waste, status != 0, burn, actual, alert),
+        )
+
+    rows = np.frombuffer(frame, dtype=layout, count=count, offset=_BINARY_HEADER.size)
+    values = np.empty((count, len(Telemetry._fields)), dtype=np.float64, order="F")
+    for column, name in enumerate(Telemetry._fields):
+        values[:, column] = rows[name]
+    return TelemetryBatch(
+        seq=rows["seq_delta"].astype(np.int64) + base_seq,
+        tick_ms=rows["tick_delta"].astype(np.int64) + base_tick,
+        values=values,
+        latest=_row_telemetry(values, -1),
+    )
+
+
+@dataclass(slots=True)
+class DecodeStats:
+    """Per-connection frame counters."""
+
+    received: int = 0
+    rejected: int = 0
+    last_error: str | None = None
+
+    def reject(self, error: MalformedFrame):
+        self.rejected += 1
+        self.last_error = str(error)
+
+
+def local_now_us() -> int:
+    """Current local wall-clock time in microseconds, matching naive ``datetime.now()``."""
+    now_ns = time.time_ns()
+    return now_ns // 1000 + time.localtime(now_ns // 1_000_000_000).tm_gmtoff * 1_000_000
+
+
+class IngestBuffer:
+    """Preallocated column-oriented buffer for incoming samples.
+
+    Every field is a typed numpy array sized ``capacity`` up front and reused
+    between flushes, so appending a sample only writes scalars into slots and
+    ``to_frame`` builds the DataFrame straight from array slices.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity: int = capacity
+        self.size: int = 0
+        self.timestamp: np.ndarray = np.empty(capacity, dtype=np.int64)
+        self.computer_code: np.ndarray = np.empty(capacity, dtype=np.uint32)
+        self.floats: dict[str, np.ndarray] = {
+            name: np.empty(capacity, dtype=np.float32) for name in FLOAT_FIELDS
+        }
+        self.status: np.ndarray = np.empty(capacity, dtype=np.bool_)
+        self.alert_status: np.ndarray = np.empty(capacity, dtype=np.uint8)
+        self.seq: np.ndarray = np.empty(capacity, dtype=np.int64)
+        # computer_id strings are interned once; rows store a small integer code.
+        self._computer_ids: list[str] = []
+        self._computer_codes: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def is_full(self) -> bool:
+        return self.size >= self.capacity
+
+    def _code_for(self, computer_id: str) -> int:
+        code = self._computer_codes.get(computer_id)
+        if code is None:
+            code = len(self._computer_ids)
+            self._computer_ids.append(computer_id)
+            self._computer_codes[computer_id] = code
+        return code
+
+    def append(
+        self,
+        seq: int,
+        computer_id: str,
+        timestamp_us: int,
+        temperature: float,
+        fuel_level: float,
+        coolant_level: float,
+        waste_level: float,
+        status: bool,
+        burn_rate: float,
+        actual_burn_rate: float,
+        alert_status: int,
+    ) -> bool:
+        """Write one sample into the next free slot; return True once the buffer is full."""
+        i = self.size
+        self.seq[i] = seq
+        self.timestamp[i] = timestamp_us
+        self.computer_code[i] = self._code_for(computer_id)
+        floats = self.floats
+        floats["temperature"][i] = temperature
+        floats["fuel_level"][i] = fuel_level
+        floats["coolant_level"][i] = coolant_level
+        floats["waste_level"][i] = waste_level
+        floats["burn_rate"][i] = burn_rate
+        floats["actual_burn_rate"][i] = actual_burn_rate
+        self.status[i] = status
+        self.alert_status[i] = min(max(alert_status, 0), 255)
+        self.size = i + 1
+        return self.size >= self.capacity
+
+    def extend(
+        self, first_seq: int, computer_id: str, timestamp_us: np.ndarray, values: np.ndarray
+    ) -> int:
+        """Write a block of samples with one slice assignment per column.
+
+        ``values`` has one row per sample and the ``Telemetry`` fields as
+        columns; samples get consecutive ``seq`` numbers from ``first_seq``.
+        Returns how many rows fit; the caller flushes and retries the rest
+        once the buffer is full.
+        """
+        i = self.size
+        n = min(len(timestamp_us), self.capacity - i)
+        self.seq[i : i + n] = np.arange(first_seq, first_seq + n)
+        self.timestamp[i : i + n] = timestamp_us[:n]
+        self.computer_code[i : i + n] = self._code_for(computer_id)
+        for name in FLOAT_FIELDS:
+            self.floats[name][i : i + n] = values[:n, _TELEMETRY_COLUMNS[name]]
+        self.status[i : i + n] = values[:n, _TELEMETRY_COLUMNS["status"]] != 0
+        # ufuncs instead of np.clip, whose Python wrapper dominates for small batches.
+        self.alert_status[i : i + n] = np.minimum(np.maximum(values[:n, _TELEMETRY_COLUMNS["alert_status"]], 0), 255)
+        self.size = i + n
+        return n
+
+    def to_frame(self) -> pl.DataFrame:
+        """Copy the filled slots into a DataFrame and reset the buffer for reuse."""
+        frame = buffered_frame([(self, 0, self.size)])
+        self.size = 0
+        return frame
+
+    def bounds(self, start_us: int | None = None, end_us: int | None = None) -> tuple[int, int]:
+        """Slots ``[lo, hi)`` holding rows with ``start_us <= timestamp < end_us``.
+
+        Samples are appended in timestamp order, so this is a binary search.
+        """
+        if start_us is None and end_us is None:
+            return 0, self.size
+        timestamps = self.timestamp[: self.size]
+        lo = 0 if start_us is None else int(np.searchsorted(timestamps, start_us, side="left"))
+        hi = self.size if end_us is None else int(np.searchsorted(timestamps, end_us, side="left"))
+        return lo, max(hi, lo)
+
+
+def buffered_frame(parts: Sequence[tuple[IngestBuffer, int, int]]) -> pl.DataFrame:
+    """Copy slots ``[lo, hi)`` of each buffer into one DataFrame, one allocation per column.
+
+    The buffers are left as they are; rows keep the order of ``parts``.
+    """
+    names: list[str] = []
+    codes: list[np.ndarray] = []
+    for buffer, lo, hi in parts:
+        codes.append(buffer.computer_code[lo:hi] + np.uint32(len(names)))
+        names.extend(buffer._computer_ids)  # pyright: ignore[reportPrivateUsage]
+
+    def column(values: Callable[[IngestBuffer], np.ndarray]) -> np.ndarray:
+        # concatenate copies, so the buffers can be overwritten right away.
+        return np.concatenate([values(buffer)[lo:hi] for buffer, lo, hi in parts])
+
+    columns: dict[str, pl.Series] = {
+        "timestamp": pl.Series("timestamp", column(lambda buffer: buffer.timestamp)).cast(pl.Datetime("us")),
+        "computer_id": pl.Series("computer_id", names, dtype=pl.String)
+        .gather(np.concatenate(codes))
+        .cast(pl.Categorical),
+    }
+    for name in FLOAT_FIELDS:
+        columns[name] = pl.Series(name, column(lambda buffer: buffer.floats[name]))  # noqa: B023
+    columns["status"] = pl.Series("status", column(lambda buffer: buffer.status))
+    columns["alert_status"] = pl.Series("alert_status", column(lambda buffer: buffer.alert_status))
+    columns["seq"] = pl.Series("seq", column(lambda buffer: buffer.seq))
+    return pl.DataFrame(columns).select(LOG_SCHEMA.keys())
@@ -1,28 +1,67 @@
 import asyncio
-import json
-import struct
+import gc
+import time
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager, suppress
-from datetime import datetime
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any
+from typing import Any, cast
+from urllib.parse import parse_qs
 
+import numpy as np
 import polars as pl
 import uvicorn
 from fastapi import (
     Depends,
     FastAPI,
+    Header,
     HTTPException,
     Query,
     WebSocket,
     WebSocketDisconnect,
+    status,
 )
+from fastapi.responses import Response, StreamingResponse
 from loguru import logger
 from pydantic import BaseModel
+from pydantic_core import to_json
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
 import socketio
 
+from commands import CommandDispatcher, parse_ack
+from compaction import LogCompactor
+from events import SampleBlock, SampleFeed, sample_event, sse_event
+from export import EXPORT_FORMATS, stream_export
+from index import Cursor, IndexSnapshot, TimeIndex, from_us, naive_local, page_bounds, sorted_range, to_us
+from ingest import (
+    MAX_COMPUTER_ID_BYTES,
+    DecodeStats,
+    IngestBuffer,
+    MalformedFrame,
+    SequencedTelemetry,
+    Telemetry,
+    TelemetryBatch,
+    buffered_frame,
+    decode_binary_frame,
+    decode_frame,
+    local_now_us,
+)
+from metrics import LoopLagMonitor, Stopwatch
+from broadcast import (
+    DISPLAY_FORMATS,
+    Broadcaster,
+    encode_display_frame,
+    hex_packet,
+    pack_display_record,
+)
+from dashboard import DashboardClient, DashboardHub
+from pipeline import PriorityGate, StageStats
+from rollups import RESOLUTIONS, RollupManager
+from storage import LOG_SCHEMA, ParquetWriter, PartitionedParquetStore
+from wal import WriteAheadLog, encode_block, encode_record
 
 _ = load_dotenv()
 
@@ -32,8 +71,25 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8765
     SECRET_KEY: str = "supersecretkey"  # Change this in your environment
-    LOG_FILE: Path = Path("reactor_log.parquet")
+    LOG_FILE: Path = Path("reactor_log.parquet")  # Legacy single-file log, migrated on startup
+    LOG_DIR: Path = Path("reactor_log")
     LOG_INTERVAL_SECONDS: int = 60
+    HOT_WINDOW_SECONDS: int = 3600  # History kept in memory; older rows are scanned from disk
+    INGEST_BUFFER_SIZE: int = 4096  # Samples buffered before a flush is forced
+    WAL_DIR: Path = Path("reactor_wal")
+    WAL_FSYNC_INTERVAL_MS: int = 50  # Group-commit window: max time a sample waits for fsync
+    INGEST_QUEUE_SIZE: int = 256  # Frames queued per ComputerCraft connection before receive waits
+    DISPLAY_MAX_RATE_HZ: float = 2.0  # Max updates per reactor sent to each display client per second
+    DASHBOARD_MAX_RATE_HZ: float = 4.0  # Max delta messages per second pushed to dashboards
+    DASHBOARD_QUEUE_SIZE: int = 32  # Messages queued per dashboard before it is resynced with a snapshot
+    SSE_FEED_SIZE: int = 100_000  # Recent samples /stream serves from memory; older resumes read the log
+    SSE_INTERVAL_MS: int = 100  # Min time between writes to one /stream client, so writes batch events
+    COMMAND_SEND_TIMEOUT_MS: int = 500  # Max time one command send may take before the target is given up on
+    COMMAND_ACK_TIMEOUT_MS: int = 2000  # Time a computer has to ack a command before it is resent
+    COMMAND_MAX_RETRIES: int = 3  # Resends of an unacked command before it is reported as expired
+    COMPACTION_FANOUT: int = 4  # Hot-log chunks of similar size merged into one
+    COMPACTION_MAX_AGE_SECONDS: int = 300  # Age after which as few as two similar chunks are merged
+    COMPACTION_MAX_ROWS: int = 1_000_000  # Chunks this large are not merged further
 
 
 settings = Settings()
@@ -41,94 +97,672 @@ print(settings)
 
 
 # --- Pydantic Models ---
-class ReactorDataModel(BaseModel):
-    timestamp: datetime | None = None
-    temperature: float = 0.0
-    fuel_level: float = 0.0
-    coolant_level: float = 0.0
-    waste_level: float = 0.0
-    status: bool | str = False
-    burn_rate: float = 0.0
-    actual_burn_rate: float = 0.0
-    alert_status: int = 0
-
-
+# Telemetry frames are decoded by ``ingest.decode_frame`` (JSON) or
+# ``ingest.decode_binary_frame`` into ``Telemetry``/``TelemetryBatch``.
 class ControlCommand(BaseModel):
     command: str
     value: str | int | float | bool | None = None
+    # Reactors to send the command to; every connected computer when omitted.
+    computer_ids: list[str] | None = None
 
 
 # --- State Management ---
+@dataclass(slots=True)
+class ReactorShard:
+    """Per-reactor state and ingest buffer, keyed by computer_id."""
+
+    computer_id: str
+    buffer: IngestBuffer
+    state: Telemetry = field(default_factory=Telemetry)
+    last_seen: datetime | None = None
+    samples: int = 0
+    # Batch bookkeeping: client sequence/tick of the newest batched sample.
+    last_seq: int = 0
+    last_tick_ms: int = 0
+    duplicates: int = 0  # batched samples dropped because they were already ingested
+    missed: int = 0  # sequence numbers skipped by the client
+    clock_offset_us: int | None = None  # server time minus client tick, in µs
+    last_timestamp_us: int = 0  # server timestamp of the newest sample
+
+    def track_sequence(self, first_seq: int, last_seq: int, count: int):
+        """Count sequence numbers skipped since the previous frame."""
+        if first_seq > self.last_seq > 0:
+            self.missed += max(last_seq - self.last_seq - count, 0)
+        self.last_seq = last_seq
+
+    def client_offset_us(self, newest_tick_ms: int, now_us: int) -> int:
+        """Offset mapping client ticks to server time, anchored on first use.
+
+        It only moves earlier (re-anchoring when a sample would land in the
+        future), so mapped timestamps stay in tick order.
+        """
+        newest_us = newest_tick_ms * 1000
+        if self.clock_offset_us is None or newest_us + self.clock_offset_us > now_us:
+            self.clock_offset_us = now_us - newest_us
+        return self.clock_offset_us
+
+
+ALL_REACTORS = "*"
+
+
+def parse_subscriptions(value: object) -> frozenset[str]:
+    """Subscription keys from a list of computer_ids or a comma-separated string.
+
+    A missing value or ``"*"`` follows every reactor.
+    """
+    if value is None:
+        return frozenset((ALL_REACTORS,))
+    items = value.split(",") if isinstance(value, str) else value
+    if not isinstance(items, list | tuple):
+        raise ValueError(f"computer_ids must be a list or a comma-separated string, got {value!r}")
+    keys = frozenset(str(item).strip() for item in items) - {""}  # pyright: ignore[reportUnknownVariableType, reportUnknownArgumentType]
+    return frozenset((ALL_REACTORS,)) if ALL_REACTORS in keys else keys
+
+
+@dataclass(slots=True)
+class DisplayClient:
+    """A Socket.IO display client: its wire format and the reactors it follows."""
+
+    wire_format: str
+    # Subscription keys: computer_ids, or ALL_REACTORS for every reactor.
+    subscriptions: frozenset[str]
+
+
+@dataclass(slots=True)
+class SaveStats:
+    rows: int
+    files: int
+    snapshot_ms: float
+    total_ms: float
+    merged_files: int = 0
+    loop_stall_ms: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class LogGeneration:
+    """One immutable state of the hot log.
+
+    Flushes and evictions publish a new generation instead of changing this
+    one, so a reader that holds it sees a consistent log, index and window
+    start without taking the lock.
+    """
+
+    number: int
+    data_log: pl.DataFrame
+    index: IndexSnapshot
+    hot_start: datetime
+
+
 class DataManager:
-    def __init__(self, log_file: Path):
-        self.reactor_data: ReactorDataModel = ReactorDataModel()
-        self.data_buffer: list[ReactorDataModel] = []
+    def __init__(
+        self,
+        log_file: Path,
+        log_dir: Path,
+        hot_window: timedelta,
+        buffer_size: int,
+        wal: WriteAheadLog,
+        feed_size: int,
+        compactor: LogCompactor | None = None,
+    ):
+        # Most recent sample from any reactor, kept for single-reactor clients.
+        self.reactor_data: Telemetry = Telemetry()
+        self.shards: dict[str, ReactorShard] = {}
+        self.buffer_size: int = buffer_size
         self._lock: asyncio.Lock = asyncio.Lock()
         self.log_file: Path = log_file
+        self.store: PartitionedParquetStore = PartitionedParquetStore(log_dir)
+        self.writer: ParquetWriter = ParquetWriter()
+        self.rollups: RollupManager = RollupManager(log_dir / "rollups")
+        self._save_lock: asyncio.Lock = asyncio.Lock()
+        self.last_save: SaveStats | None = None
+        self.wal: WriteAheadLog = wal
+        self.hot_window: timedelta = hot_window
+        # data_log holds every row with timestamp >= hot_start; older rows live only on disk.
+        self.hot_start: datetime = datetime.now() - hot_window
         self.data_log: pl.DataFrame = self._load_or_initialize_log()
+        self.index: TimeIndex = TimeIndex()
+        self.index.append(self.data_log)
+        self.compactor: LogCompactor = compactor or LogCompactor()
+        self.compactor.reset(self.data_log)
+        # What readers see; data_log, index and hot_start are only touched by writers.
+        self.generation: LogGeneration = LogGeneration(0, self.data_log, self.index.snapshot(), self.hot_start)
+        # Newest timestamp flushed into data_log; later rows must not sort before it.
+        self.flushed_until_us: int = self._last_timestamp_us(self.data_log)
+        # Rows at the tail of data_log that have not been persisted yet.
+        self.unsaved_rows: int = 0
+        # seq of the next sample; the hot log is loaded from the store, so the manifest knows the last one.
+        self.next_seq: int = (self.store.max_seq() or 0) + 1
+        self.rollups.rebuild_open(self.store)
+        self._replay_wal()
+        self.feed: SampleFeed = SampleFeed(feed_size, self.next_seq)
 
     def _load_or_initialize_log(self) -> pl.DataFrame:
-        """Load existing data log or initialize a new one."""
-        schema = {
-            "timestamp": pl.Datetime,
-            "temperature": pl.Float32,
-            "fuel_level": pl.Float32,
-            "coolant_level": pl.Float32,
-            "waste_level": pl.Float32,
-            "status": pl.Boolean,
-            "burn_rate": pl.Float32,
-            "actual_burn_rate": pl.Float32,
-            "alert_status": pl.UInt8,
-        }
+        """Load the hot window of the existing data log or initialize a new one."""
         if self.log_file.exists():
-            logger.info(f"Loading existing data log from {self.log_file}")
-            return pl.read_parquet(self.log_file)
+            logger.info(f"Migrating legacy data log {self.log_file} to {self.store.root}")
+            self.store.import_legacy_file(self.log_file)
+        if not self.store.is_empty():
+            logger.info(f"Loading data since {self.hot_start} from {self.store.root}")
+            return self.store.scan(start=self.hot_start).sort("timestamp").collect()
         logger.info("Initializing new data log")
-        return pl.DataFrame(schema=schema)
+        return pl.DataFrame(schema=LOG_SCHEMA)
 
-    async def add_log_entry(self, reactor_data: ReactorDataModel):
-        """Add a new entry to the data buffer."""
-        log_entry = reactor_data.model_copy(update={"timestamp": datetime.now()})
-        async with self._lock:
-            self.data_buffer.append(log_entry)
+    @staticmethod
+    def _last_timestamp_us(log: pl.DataFrame) -> int:
+        return int(log.get_column("timestamp").cast(pl.Int64).max() or 0)  # pyright: ignore[reportArgumentType]
+
+    def _replay_wal(self):
+        """Re-ingest samples that were logged to the WAL but never checkpointed.
+
+        Records keep the seq the sample was given. A save takes every sample
+        numbered before it, so the store holds exactly the seqs up to its
+        highest one, and any record at or below that was already persisted.
+        """
+        persisted = self.store.max_seq() or 0
+        replayed = 0
+        for record in self.wal.replay():
+            seq, computer_id = record[0], record[1]
+            # A crash between the Parquet write and WAL truncation leaves rows in both.
+            if seq <= persisted:
+                continue
+            if self.shard(computer_id).buffer.append(*record):
+                self._flush_locked()
+            self.next_seq = max(self.next_seq, seq + 1)
+            replayed += 1
+        if replayed:
+            self._flush_locked()
+            logger.info(f"Replayed {replayed} samples from the write-ahead log")
+
+    def _evict_cold_rows(self):
+        """Drop persisted rows that fell out of the hot window. Caller holds the lock."""
+        cutoff = datetime.now() - self.hot_window
+        keep_from = self.data_log.get_column("timestamp").search_sorted(cutoff, side="left")
+        # Never evict rows that are not on disk yet.
+        keep_from = min(keep_from, self.data_log.height - self.unsaved_rows)
+        if keep_from > 0:
+            self.hot_start = self.data_log.item(keep_from - 1, "timestamp") + timedelta(microseconds=1)
+            self.data_log = self.data_log.slice(keep_from)
+            self.index.evict(keep_from)
+            self.compactor.evict(keep_from)
+            self._publish()
+
+    def _publish(self):
+        """Make the current hot log the generation readers see. Caller holds the lock."""
+        self.generation = LogGeneration(
+            self.generation.number + 1, self.data_log, self.index.snapshot(), self.hot_start
+        )
+
+    def shard(self, computer_id: str) -> ReactorShard:
+        shard = self.shards.get(computer_id)
+        if shard is None:
+            shard = ReactorShard(computer_id, IngestBuffer(self.buffer_size))
+            self.shards[computer_id] = shard
+        return shard
+
+    @property
+    def buffered_rows(self) -> int:
+        return sum(len(shard.buffer) for shard in self.shards.values())
+
+    async def add_log_entry(
+        self, computer_id: str, reactor_data: Telemetry, timestamp_us: int | None = None
+    ):
+        """Record a sample in its reactor's shard, flushing all shards when it fills up.
+
+        The append touches only the reactor's own shard and never yields, so
+        ingest from different reactors does not take the data log lock.
+        ``Telemetry`` fields are already in column order, so the decoded tuple
+        is splatted straight into the WAL record and the ingest buffer.
+        """
+        shard = self.shard(computer_id)
+        shard.state = reactor_data
+        shard.last_seen = datetime.now()
+        shard.samples += 1
+        self.reactor_data = reactor_data
+        if timestamp_us is None:
+            timestamp_us = local_now_us()
+        shard.last_timestamp_us = timestamp_us
+        seq = self.next_seq
+        self.next_seq += 1
+        self.wal.append(encode_record(seq, computer_id, timestamp_us, *reactor_data))
+        self.feed.publish(SampleBlock(seq, computer_id, (timestamp_us,), (reactor_data,)))
+        if shard.buffer.append(seq, computer_id, timestamp_us, *reactor_data):
+            await self.flush_buffer_to_log()
+
+    async def add_log_batch(self, computer_id: str, batch: TelemetryBatch):
+        """Record a batch envelope with one vectorized append per buffer fill.
+
+        Client ticks are mapped to server time with a per-reactor offset
+        (``ReactorShard.client_offset_us``), so client clock skew does not
+        matter. Samples are taken in tick order, so the log stays sorted even
+        if the client sent them out of order. Samples already ingested
+        (retransmitted after a reconnect) are dropped by tick, and gaps in
+        ``seq`` are counted as missed samples.
+        """
+        batch = batch.by_tick()
+        shard = self.shard(computer_id)
+        now_us = local_now_us()
+        seq, tick_ms, values = batch.seq, batch.tick_ms, batch.values
+        shard.track_sequence(seq.item(0), seq.item(-1), len(seq))
+        # Ticks are sorted, and timestamps below follow them, so the ends are the extremes.
+        if tick_ms.item(0) <= shard.last_tick_ms:
+            fresh = tick_ms > shard.last_tick_ms
+            shard.duplicates += len(fresh) - int(np.count_nonzero(fresh))
+            seq, tick_ms, values = seq[fresh], tick_ms[fresh], values[fresh]
+            if len(seq) == 0:
+                return
+        shard.last_tick_ms = tick_ms.item(-1)
+        shard.state = batch.latest
+        shard.last_seen = datetime.now()
+        shard.samples += len(seq)
+        self.reactor_data = batch.latest
+
+        offset_us = shard.client_offset_us(shard.last_tick_ms, now_us)
+        timestamps = np.maximum(tick_ms * 1000 + offset_us, self._timestamp_floor(shard))
+        shard.last_timestamp_us = timestamps.item(-1)
+        written = 0
+        while written < len(timestamps):
+            # Number, log and buffer each chunk with no await in between, so a
+            # save always takes every sample numbered before it.
+            first_seq = self.next_seq
+            count = shard.buffer.extend(first_seq, computer_id, timestamps[written:], values[written:])
+            if count:
+                chunk = slice(written, written + count)
+                self.next_seq += count
+                self.wal.append(encode_block(first_seq, computer_id, timestamps[chunk], values[chunk]))
+                self.feed.publish(SampleBlock(first_seq, computer_id, timestamps[chunk], values[chunk]))
+                written += count
+            if shard.buffer.is_full:
+                await self.flush_buffer_to_log()
+
+    async def add_sequenced_entry(self, computer_id: str, sample: SequencedTelemetry):
+        """Scalar counterpart of ``add_log_batch`` for a frame holding one sample."""
+        shard = self.shard(computer_id)
+        shard.track_sequence(sample.seq, sample.seq, 1)
+        if sample.tick_ms <= shard.last_tick_ms:
+            shard.duplicates += 1
+            return
+        shard.last_tick_ms = sample.tick_ms
+        now_us = local_now_us()
+        timestamp_us = sample.tick_ms * 1000 + shard.client_offset_us(sample.tick_ms, now_us)
+        await self.add_log_entry(
+            computer_id, sample.telemetry, max(timestamp_us, self._timestamp_floor(shard))
+        )
+
+    def _timestamp_floor(self, shard: ReactorShard) -> int:
+        """Earliest timestamp a client-timed sample may get.
+
+        Rows older than the last flush would break the sorted log, and a
+        re-anchored clock offset must not put samples before the reactor's
+        previous one.
+        """
+        return max(self.flushed_until_us, shard.last_timestamp_us)
+
+    async def add_frame(
+        self, computer_id: str, frame: Telemetry | SequencedTelemetry | TelemetryBatch
+    ) -> Telemetry:
+        """Store any decoded frame; return the reactor's newest sample."""
+        if isinstance(frame, TelemetryBatch):
+            await self.add_log_batch(computer_id, frame)
+            return frame.latest
+        if isinstance(frame, SequencedTelemetry):
+            await self.add_sequenced_entry(computer_id, frame)
+            return frame.telemetry
+        await self.add_log_entry(computer_id, frame)
+        return frame
+
+    def _flush_locked(self):
+        """Move samples buffered in every shard into data_log. Caller holds the lock.
+
+        All shards are flushed together so the log stays sorted by timestamp.
+        """
+        frames = [shard.buffer.to_frame() for shard in self.shards.values() if shard.buffer]
+        if not frames:
+            return
+        new_data = pl.concat(frames).sort("timestamp")
+        # One new chunk; the compactor merges chunks in the background.
+        self.data_log = pl.concat([self.data_log, new_data])
+        self.index.append(new_data)
+        self.compactor.append(new_data.height)
+        self._publish()
+        self.flushed_until_us = max(self.flushed_until_us, self._last_timestamp_us(new_data))
+        self.rollups.update(new_data)
+        self.unsaved_rows += new_data.height
+        logger.info(f"Flushed {new_data.height} records from {len(frames)} reactors to data log.")
 
     async def flush_buffer_to_log(self):
         """Flush the data buffer to the main Polars DataFrame."""
         async with self._lock:
-            if not self.data_buffer:
-                return
-            new_data = pl.DataFrame([item.model_dump() for item in self.data_buffer])
-            self.data_log = pl.concat([self.data_log, new_data])
-            self.data_buffer.clear()
-        logger.info(f"Flushed {len(new_data)} records to data log.")
-
-    async def save_log_to_disk(self):
-        """Save the data log to a Parquet file."""
-        await self.flush_buffer_to_log()
+            self._flush_locked()
+
+    async def compact(self) -> bool:
+        """Merge the next group of hot-log chunks that is due; False if none is.
+
+        Rows are copied on a worker thread from an immutable frame; only the
+        splice, which copies nothing, happens under the lock.
+        """
+        compaction = self.compactor.plan()
+        if compaction is None:
+            return False
+        started = time.perf_counter()
+        merged = await asyncio.to_thread(self.data_log.slice(compaction.offset, compaction.rows).rechunk)
         async with self._lock:
-            if not self.data_log.is_empty():
-                self.data_log.write_parquet(self.log_file)
-                logger.info(f"Saved data log to {self.log_file}")
+            compacted = self.compactor.apply(self.data_log, compaction, merged)
+            if compacted is not None:
+                self.data_log = compacted
+                self._publish()
+        if compacted is not None:
+            self.compactor.merge_stats.observe(time.perf_counter() - started)
+        return True
+
+    def buffered(
+        self,
+        start_us: int | None = None,
+        end_us: int | None = None,
+        computer_id: str | None = None,
+        last: int | None = None,
+    ) -> pl.DataFrame:
+        """Copy unflushed rows in ``[start_us, end_us)``, timestamp-sorted, without flushing.
+
+        With ``last``, only the newest ``last`` rows (plus ties) are copied.
+        Call it with no await after taking ``generation``: every row is then
+        either in that generation or here, exactly once.
+        """
+        shards = self.shards.values() if computer_id is None else filter(None, [self.shards.get(computer_id)])
+        parts = [(shard.buffer, *shard.buffer.bounds(start_us, end_us)) for shard in shards if shard.buffer]
+        parts = [(buffer, lo, hi) for buffer, lo, hi in parts if hi > lo]
+        if last is not None and sum(hi - lo for _, lo, hi in parts) > last:
+            # The newest rows overall are at or after the last-th largest timestamp.
+            newest = np.concatenate([buffer.timestamp[max(lo, hi - last) : hi] for buffer, lo, hi in parts])
+            cutoff = int(np.partition(newest, len(newest) - last)[len(newest) - last])
+            parts = [
+                (buffer, max(lo, buffer.bounds(cutoff)[0]), hi)
+                for buffer, lo, hi in parts
+                if buffer.timestamp[hi - 1] >= cutoff
+            ]
+        if not parts:
+            return pl.DataFrame(schema=LOG_SCHEMA)
+        frame = buffered_frame(parts)
+        return frame if len(parts) == 1 else frame.sort("timestamp")
+
+    async def tail(self, limit: int, computer_id: str | None = None) -> pl.DataFrame:
+        """Return the newest ``limit`` rows (of ``computer_id``), reading from disk past the hot window."""
+        generation = self.generation
+        if computer_id is None:
+            log = generation.data_log.tail(limit)
+        else:
+            log = generation.data_log[generation.index.tail_rows(computer_id, limit)]
+        hot = pl.concat([log, self.buffered(computer_id=computer_id, last=limit)]).tail(limit)
+        if hot.height >= limit:
+            return hot
+        cold = await asyncio.to_thread(self.store.tail, limit - hot.height, generation.hot_start, computer_id)
+        return pl.concat([cold, hot])
+
+    async def rows_after_seq(self, after: int, computer_id: str | None, limit: int) -> pl.DataFrame:
+        """The first ``limit`` rows with ``seq > after`` in seq order.
+
+        Used by streams resuming from before the oldest sample in ``feed``;
+        files whose newest seq is not past ``after`` are never opened.
+        """
+        generation = self.generation
+        newer = pl.col("seq") > after
+        if computer_id is not None:
+            newer &= pl.col("computer_id") == computer_id
+        hot = (
+            pl.concat([generation.data_log.filter(newer), self.buffered(computer_id=computer_id).filter(newer)])
+            .sort("seq")
+            .head(limit)
+        )
+        cold = (
+            await self.store.scan_after_seq(after, computer_id)
+            .filter(pl.col("timestamp") < generation.hot_start)
+            .sort("seq")
+            .head(limit)
+            .collect_async()
+        )
+        return pl.concat([cold, hot]).sort("seq").head(limit)
+
+    async def query_range(
+        self,
+        start: datetime | None,
+        end: datetime | None,
+        computer_id: str | None = None,
+        limit: int | None = None,
+    ) -> pl.DataFrame:
+        """Return raw rows with ``start <= timestamp < end``, oldest first, at most ``limit``.
+
+        The hot window is served by binary search over the sorted timestamp
+        column (or the reactor's row offsets); only the part of the range
+        before ``hot_start`` is scanned from disk. Unflushed rows are read from
+        the shard buffers, so queries never flush or take the lock. With a
+        ``limit`` the rows are read as one forward ``page`` from ``start``, so
+        the cost is O(log n + limit) however much of the range lies after them.
+        """
+        start = naive_local(start) if start is not None else None
+        end = naive_local(end) if end is not None else None
+        if limit is not None:
+            cursor = Cursor.oldest() if start is None else Cursor.before(to_us(start) or 0)
+            rows = await self.page(cursor, limit, computer_id)
+            return rows if end is None else rows.filter(pl.col("timestamp") < end)
+        hot, cold_end = self._hot_range(start, end, computer_id)
+        if cold_end is None:
+            return hot
+        cold = await self.store.scan(start, cold_end, computer_id).sort("timestamp").collect_async()
+        return pl.concat([cold, hot])
+
+    def export_range(
+        self,
+        start: datetime | None,
+        end: datetime | None,
+        computer_id: str | None = None,
+    ) -> pl.LazyFrame:
+        """Rows with ``start <= timestamp < end`` as a lazy frame for streaming sinks.
+
+        Unlike ``query_range`` nothing is sorted or collected: the on-disk part
+        is read file by file from memory-mapped Parquet as the sink consumes it,
+        then the hot window follows. Rows are therefore ordered by save, and
+        only roughly by timestamp.
+        """
+        start = naive_local(start) if start is not None else None
+        end = naive_local(end) if end is not None else None
+        hot, cold_end = self._hot_range(start, end, computer_id)
+        if cold_end is None:
+            return hot.lazy()
+        return pl.concat([self.store.scan(start, cold_end, computer_id), hot.lazy()])
+
+    async def page(self, cursor: Cursor, limit: int, computer_id: str | None = None) -> pl.DataFrame:
+        """Up to ``limit`` rows just beyond ``cursor`` in ``(timestamp, seq)`` order, oldest first.
+
+        The hot window is searched with ``page_bounds`` on the timestamp column
+        (or the reactor's index), unflushed rows are copied only up to where
+        the page ends, and the store is read only when the page reaches back
+        past ``hot_start``. A page costs O(limit) wherever it lies.
+        """
+        generation = self.generation
+        log = generation.data_log
+        if computer_id is None:
+            lo, hi = page_bounds(log.get_column("timestamp").cast(pl.Int64), cursor, limit)
+            hot = log.slice(lo, hi - lo)
+        else:
+            hot = log[generation.index.page_rows(computer_id, cursor, limit)]
+        hot = hot.filter(cursor.beyond())
+        # A full page from the log leaves room only for unflushed rows up to its far end.
+        full = hot.height >= limit
+        if cursor.backward:
+            start_us = to_us(cast(datetime, hot.item(0, "timestamp"))) if full else None
+            buffered = pl.concat([
+                self.buffered(start_us, cursor.timestamp_us, computer_id, last=limit),
+                self.buffered(cursor.timestamp_us, cursor.timestamp_us + 1, computer_id),
+            ])
+        else:
+            end_us = to_us(cast(datetime, hot.item(-1, "timestamp"))) + 1 if full else None
+            buffered = self.buffered(cursor.timestamp_us, end_us, computer_id)
+        rows = pl.concat([hot, buffered.filter(cursor.beyond())])
+        # Stored rows all sort before the hot window, so going backward they only fill a short page.
+        if cursor.backward:
+            reaches_disk = rows.height < limit
+        else:
+            reaches_disk = cursor.timestamp_us < (to_us(generation.hot_start) or 0)
+        if reaches_disk:
+            cold = await asyncio.to_thread(self.store.page, cursor, limit, generation.hot_start, computer_id)
+            rows = pl.concat([cold, rows])
+        rows = rows.sort("timestamp", "seq", nulls_last=False)
+        return rows.tail(limit) if cursor.backward else rows.head(limit)
+
+    def _hot_range(
+        self, start: datetime | None, end: datetime | None, computer_id: str | None
+    ) -> tuple[pl.DataFrame, datetime | None]:
+        """In-memory rows in ``[start, end)``, and where the on-disk part ends (None if not needed)."""
+        generation = self.generation
+        log = generation.data_log
+        if computer_id is None:
+            hot = sorted_range(log, to_us(start), to_us(end))
+        else:
+            hot = log[generation.index.rows(computer_id, to_us(start), to_us(end))]
+        buffered = self.buffered(to_us(start), to_us(end), computer_id)
+        if buffered.height:
+            hot = pl.concat([hot, buffered])
+        if start is not None and start >= generation.hot_start:
+            return hot, None
+        return hot, generation.hot_start if end is None else min(end, generation.hot_start)
+
+    async def save_log_to_disk(self) -> SaveStats | None:
+        """Append rows flushed since the last save to the partitioned store.
+
+        Only the snapshot is taken under the lock; encoding and writing happen
+        on the writer thread while ingest continues. Rollup buckets that have
+        closed are persisted in the same pass, and partitions of either that
+        can no longer grow are merged afterwards.
+        """
+        async with self._save_lock:
+            watch = Stopwatch()
+            async with self._lock:
+                self._flush_locked()
+                # Polars frames are immutable, so the tail slice is a stable snapshot.
+                snapshot = self.data_log.tail(self.unsaved_rows)
+                # Every WAL record before this segment is now part of the snapshot.
+                checkpoint = self.wal.rotate()
+                finalized = self.rollups.take_finalized(datetime.now())
+            snapshot_ms = watch.elapsed_ms
+
+            entries = await self.writer.append(self.store, snapshot)
+            self.wal.truncate_before(checkpoint)
+            for tier, buckets in finalized:
+                _ = await self.writer.append(tier.store, buckets)
+
+            async with self._lock:
+                self.unsaved_rows -= snapshot.height
+                self._evict_cold_rows()
+            now = datetime.now()
+            merged = await self.writer.merge(self.store, now)
+            # A 1m tier gains a file per reactor every save too; merged, a day is one file.
+            for tier, _ in finalized:
+                merged += await self.writer.merge(tier.store, now)
+            if snapshot.is_empty():
+                return None
+            stats = SaveStats(
+                rows=snapshot.height,
+                files=len(entries),
+                snapshot_ms=snapshot_ms,
+                total_ms=watch.elapsed_ms,
+                merged_files=merged,
+            )
+            self.last_save = stats
+            logger.info(
+                f"Appended {stats.rows} rows in {stats.files} files to {self.store.root} "
+                f"({stats.total_ms:.1f} ms)"
+            )
+            return stats
+
+    def close(self):
+        self.writer.shutdown()
+        self.wal.close()
+
+
+# A received websocket frame and the perf_counter time it arrived.
+IngestItem = tuple[float, str | bytes]
 
 
 class ConnectionManager:
     def __init__(self):
         self.computercraft_connections: dict[str, WebSocket] = {}
-        self.esp8266_connected: bool = False
+        # Frame counters per ComputerCraft connection, kept after disconnect for /metrics.
+        self.computercraft_stats: dict[str, DecodeStats] = {}
+        self.computercraft_queues: dict[str, asyncio.Queue[IngestItem | None]] = {}
+        self.display_clients: dict[str, DisplayClient] = {}
+        self.display_counts: dict[str, int] = dict.fromkeys(DISPLAY_FORMATS, 0)
+        # Members per Socket.IO room ("<format>:<computer_id or *>") and per
+        # subscription key across formats. Keys with no members are removed,
+        # so the hot path only needs membership tests.
+        self.room_counts: dict[str, int] = {}
+        self.subscriber_counts: dict[str, int] = {}
         self._lock: asyncio.Lock = asyncio.Lock()
 
-    async def add_computercraft(self, computer_id: str, websocket: WebSocket):
+    @property
+    def esp8266_connected(self) -> bool:
+        return bool(self.display_clients)
+
+    async def add_computercraft(
+        self, computer_id: str, websocket: WebSocket, queue: asyncio.Queue[IngestItem | None]
+    ) -> DecodeStats:
         async with self._lock:
             self.computercraft_connections[computer_id] = websocket
+            self.computercraft_queues[computer_id] = queue
+            stats = self.computercraft_stats[computer_id] = DecodeStats()
+            return stats
 
-    async def remove_computercraft(self, computer_id: str):
+    async def remove_computercraft(
+        self, computer_id: str, websocket: WebSocket, queue: asyncio.Queue[IngestItem | None]
+    ):
+        """Forget this connection; a newer one that reconnected under the same id stays."""
         async with self._lock:
-            if computer_id in self.computercraft_connections:
+            if self.computercraft_connections.get(computer_id) is websocket:
                 del self.computercraft_connections[computer_id]
+            if self.computercraft_queues.get(computer_id) is queue:
+                del self.computercraft_queues[computer_id]
+
+    def has_subscribers(self, computer_id: str) -> bool:
+        """Whether any display follows ``computer_id``; called for every ingested frame."""
+        return ALL_REACTORS in self.subscriber_counts or computer_id in self.subscriber_counts
 
-    async def set_esp8266_connected(self, status: bool):
+    async def add_display(self, sid: str, wire_format: str, subscriptions: frozenset[str]):
         async with self._lock:
-            self.esp8266_connected = status
+            self.display_clients[sid] = DisplayClient(wire_format, frozenset())
+            self.display_counts[wire_format] += 1
+            await self._subscribe_locked(sid, subscriptions)
+
+    async def remove_display(self, sid: str):
+        async with self._lock:
+            if sid not in self.display_clients:
+                return
+            await self._subscribe_locked(sid, frozenset())
+            self.display_counts[self.display_clients.pop(sid).wire_format] -= 1
+
+    async def subscribe(self, sid: str, subscriptions: frozenset[str]):
+        """Replace the reactors ``sid`` follows."""
+        async with self._lock:
+            if sid in self.display_clients:
+                await self._subscribe_locked(sid, subscriptions)
+
+    async def _subscribe_locked(self, sid: str, subscriptions: frozenset[str]):
+        client = self.display_clients[sid]
+        for key in client.subscriptions - subscriptions:
+            room = f"{client.wire_format}:{key}"
+            await sio.leave_room(sid, room)
+            _decrement(self.room_counts, room)
+            _decrement(self.subscriber_counts, key)
+        for key in subscriptions - client.subscriptions:
+            room = f"{client.wire_format}:{key}"
+            await sio.enter_room(sid, room)
+            self.room_counts[room] = self.room_counts.get(room, 0) + 1
+            self.subscriber_counts[key] = self.subscriber_counts.get(key, 0) + 1
+        client.subscriptions = subscriptions
+
+
+def _decrement(counts: dict[str, int], key: str):
+    if counts[key] == 1:
+        del counts[key]
+    else:
+        counts[key] -= 1
 
 
 # --- Background Task for Data Logging ---
@@ -136,13 +770,30 @@ async def periodic_data_saver(interval: int):
     """Periodically save the data log to disk."""
     while True:
         await asyncio.sleep(interval)
-        await data_manager.save_log_to_disk()
+        await save_with_stall_report()
+
+
+async def periodic_log_compaction(interval: float):
+    """Keep merging the small chunks flushes leave in the hot log."""
+    while True:
+        await asyncio.sleep(interval)
+        while await data_manager.compact():
+            pass
+
+
+async def save_with_stall_report():
+    """Save the data log and record the worst event-loop stall during the save."""
+    loop_monitor.start_window()
+    stats = await data_manager.save_log_to_disk()
+    if stats is not None:
+        stats.loop_stall_ms = await loop_monitor.end_window() * 1000
+        logger.info(f"Event loop stalled at most {stats.loop_stall_ms:.1f} ms during save")
 
 
 # --- WebSocket Security ---
 async def get_secret_key(
-    secret: str = Query(..., title="Secret Key for WebSocket authentication"),
-):  # pyright: ignore[reportCallInDefaultInitializer]
+    secret: str = Query(..., title="Secret Key for WebSocket authentication"),  # pyright: ignore[reportCallInDefaultInitializer]
+):
     if secret != settings.SECRET_KEY:
         raise HTTPException(status_code=403, detail="Invalid secret key")
     return secret  # Return the validated secret
@@ -152,12 +803,27 @@ async def get_secret_key(
 async def lifespan(_app: FastAPI):
     """Handle application lifespan events."""
     # Startup
-    task = asyncio.create_task(periodic_data_saver(settings.LOG_INTERVAL_SECONDS))
+    # Modules, settings and the loaded log live for the whole process. Moving
+    # them out of the collector's reach keeps full collections, which stall the
+    # loop and with it safety commands, short.
+    _ = gc.collect()
+    gc.freeze()
+    tasks = [
+        asyncio.create_task(loop_monitor.run()),
+        asyncio.create_task(periodic_data_saver(settings.LOG_INTERVAL_SECONDS)),
+        asyncio.create_task(periodic_log_compaction(1.0)),
+        asyncio.create_task(broadcaster.run()),
+        asyncio.create_task(dashboard_hub.run()),
+        asyncio.create_task(command_dispatcher.run()),
+    ]
     yield
     # Shutdown
-    _cancelled = task.cancel()
-    with suppress(asyncio.CancelledError):
-        await task
+    for task in tasks:
+        _cancelled = task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    _ = await data_manager.save_log_to_disk()
+    data_manager.close()
 
 
 # --- FastAPI & SocketIO Setup ---
@@ -166,7 +832,30 @@ sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
 combined_app = socketio.ASGIApp(sio, app)
 
 conn_manager = ConnectionManager()
-data_manager = DataManager(log_file=settings.LOG_FILE)
+# Safety commands run while ingest and fan-out stages stand aside.
+priority_gate = PriorityGate()
+command_dispatcher = CommandDispatcher(
+    conn_manager.computercraft_connections,
+    send_timeout=settings.COMMAND_SEND_TIMEOUT_MS / 1000,
+    ack_timeout=settings.COMMAND_ACK_TIMEOUT_MS / 1000,
+    max_retries=settings.COMMAND_MAX_RETRIES,
+    gate=priority_gate,
+)
+loop_monitor = LoopLagMonitor()
+stage_stats: dict[str, StageStats] = {name: StageStats() for name in ("queue_wait", "decode", "store")}
+data_manager = DataManager(
+    log_file=settings.LOG_FILE,
+    log_dir=settings.LOG_DIR,
+    hot_window=timedelta(seconds=settings.HOT_WINDOW_SECONDS),
+    buffer_size=settings.INGEST_BUFFER_SIZE,
+    wal=WriteAheadLog(settings.WAL_DIR, settings.WAL_FSYNC_INTERVAL_MS / 1000),
+    feed_size=settings.SSE_FEED_SIZE,
+    compactor=LogCompactor(
+        fanout=settings.COMPACTION_FANOUT,
+        max_age=settings.COMPACTION_MAX_AGE_SECONDS,
+        max_rows=settings.COMPACTION_MAX_ROWS,
+    ),
+)
 
 
 # --- WebSocket Endpoint for ComputerCraft ---
@@ -176,108 +865,510 @@ async def websocket_endpoint(
     computer_id: str,
     _: str = Depends(get_secret_key),  # pyright: ignore[reportCallInDefaultInitializer]
 ):
+    # The id is stored with every sample; refuse it before anything is logged.
+    if len(computer_id.encode()) > MAX_COMPUTER_ID_BYTES:
+        logger.warning(f"Rejected ComputerCraft id of {len(computer_id.encode())} bytes")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
     await websocket.accept()
-    await conn_manager.add_computercraft(computer_id, websocket)
+    # Receive stage: frames are handed to the decode/store worker undecoded. When
+    # the worker falls behind, put() waits, so telemetry is never dropped and the
+    # client sees TCP backpressure instead.
+    queue: asyncio.Queue[IngestItem | None] = asyncio.Queue(settings.INGEST_QUEUE_SIZE)
+    stats = await conn_manager.add_computercraft(computer_id, websocket, queue)
+    worker = asyncio.create_task(process_frames(computer_id, queue, stats))
     logger.info(f"ComputerCraft {computer_id} connected")
 
     try:
         while True:
-            data = await websocket.receive_text()
-            logger.debug(f"Received from ComputerCraft {computer_id}: {data}")
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            # Binary websocket frames carry the compact protocol, text frames JSON.
+            payload: bytes | None = message.get("bytes")
+            if payload is None:
+                text: str = message["text"]
+                # Command acks skip the ingest queue so telemetry cannot delay them.
+                if (ack := parse_ack(text)) is not None:
+                    command_dispatcher.acknowledge(computer_id, ack)
+                    continue
+                await queue.put((time.perf_counter(), text))
+            else:
+                await queue.put((time.perf_counter(), payload))
 
-            try:
-                reactor_data = ReactorDataModel.model_validate_json(data)
-                data_manager.reactor_data = reactor_data
-                await data_manager.add_log_entry(reactor_data)
+    except WebSocketDisconnect:
+        logger.info(f"ComputerCraft {computer_id} disconnected")
+    finally:
+        # Let the worker finish the frames already received before it exits.
+        await queue.put(None)
+        await worker
+        await conn_manager.remove_computercraft(computer_id, websocket, queue)
 
-                if conn_manager.esp8266_connected:
-                    await send_to_esp8266(reactor_data)
 
-            except json.JSONDecodeError:
-                logger.error("Failed to parse JSON from ComputerCraft")
-                continue
+async def process_frames(
+    computer_id: str, queue: asyncio.Queue[IngestItem | None], stats: DecodeStats
+):
+    """Decode and store stages for one ComputerCraft connection, in arrival order.
 
-    except WebSocketDisconnect:
-        logger.info(f"ComputerCraft {computer_id} disconnected")
-        await conn_manager.remove_computercraft(computer_id)
+    Decoding and storing are in-memory steps that do not yield, so they run
+    back to back; the display and dashboard fan-outs only get the newest
+    sample through their broadcasters and never hold up ingest. Between
+    frames the worker passes ``priority_gate``, so a safety command never
+    waits behind a backlog of telemetry.
+    """
+    while (item := await queue.get()) is not None:
+        received_at, data = item
+        started = time.perf_counter()
+        stage_stats["queue_wait"].observe(started - received_at)
+        stats.received += 1
+        try:
+            frame = decode_binary_frame(data) if isinstance(data, bytes) else decode_frame(data)
+        except MalformedFrame as e:
+            # Invalid JSON and wrong field types are counted; the connection stays up.
+            stats.reject(e)
+            logger.warning(
+                f"Rejected frame {stats.received} from ComputerCraft {computer_id} "
+                f"({stats.rejected} rejected so far): {stats.last_error}"
+            )
+            continue
+        decoded = time.perf_counter()
+        stage_stats["decode"].observe(decoded - started)
+
+        try:
+            reactor_data = await data_manager.add_frame(computer_id, frame)
+        except Exception as e:
+            logger.error(f"Failed to store frame from ComputerCraft {computer_id}: {e}")
+            continue
+        stage_stats["store"].observe(time.perf_counter() - decoded)
+
+        if conn_manager.has_subscribers(computer_id):
+            broadcaster.offer(computer_id, reactor_data)
+        dashboard_hub.offer(computer_id, reactor_data)
+        await priority_gate.checkpoint()
 
 
 # --- ESP8266 Communication ---
-async def send_to_esp8266(data: ReactorDataModel):
-    """Send data to ESP8266 via SocketIO after packing it into a binary format."""
+async def send_to_esp8266(records: dict[str, bytes]):
+    """Send one tick of display records to the ESP8266s following each reactor.
+
+    Every record is encoded once per wire format and room. Clients following
+    every reactor get the whole tick in one binary frame; clients following
+    specific reactors get one frame per reactor.
+    """
+    rooms = conn_manager.room_counts
     try:
-        # Format: [Header:1byte][Temp:2B][Fuel:2B][Coolant:2B][Waste:2B][Status:1B][Alert:1B][Checksum:1B]
-        packet = struct.pack(
-            "!BHHHHBBB",
-            0xAA,  # Header
-            min(int(data.temperature * 10), 65535),
-            min(int(data.fuel_level * 10), 65535),
-            min(int(data.coolant_level * 10), 65535),
-            min(int(data.waste_level * 10), 65535),
-            1 if data.status is True else 0,
-            data.alert_status,
-            0x55,  # Checksum
-        )
         # The python-socketio library has limited type hints for its dynamic event system,
         # so we use pyright: ignore to suppress type checker warnings for sio.emit.
-        await sio.emit("reactor_data", {"data": packet.hex()})  # pyright: ignore[reportUnknownMemberType]
-        logger.debug("Sent data to ESP8266")
+        # bytes are sent as a Socket.IO binary attachment, not as text.
+        if "binary:*" in rooms:
+            await sio.emit("reactor_frame", encode_display_frame(list(records.values())), room="binary:*")  # pyright: ignore[reportUnknownMemberType]
+        for computer_id, record in records.items():
+            if f"binary:{computer_id}" in rooms:
+                await sio.emit("reactor_frame", encode_display_frame([record]), room=f"binary:{computer_id}")  # pyright: ignore[reportUnknownMemberType]
+            hex_rooms = [room for room in ("hex:*", f"hex:{computer_id}") if room in rooms]
+            if hex_rooms:
+                # A room list reaches each client once.
+                await sio.emit("reactor_data", {"data": hex_packet(record)}, room=hex_rooms)  # pyright: ignore[reportUnknownMemberType]
 
     except Exception as e:
         logger.error(f"Failed to send data to ESP8266: {e}")
 
 
+broadcaster = Broadcaster(settings.DISPLAY_MAX_RATE_HZ, pack_display_record, send_to_esp8266, priority_gate)
+
+
+# --- WebSocket Endpoint for Dashboards ---
+dashboard_hub = DashboardHub(settings.DASHBOARD_MAX_RATE_HZ, settings.DASHBOARD_QUEUE_SIZE, priority_gate)
+
+
+async def send_dashboard_updates(websocket: WebSocket, client: DashboardClient):
+    with suppress(WebSocketDisconnect, RuntimeError):
+        while True:
+            await websocket.send_text(await client.queue.get())
+
+
+@app.websocket("/ws/dashboard")
+async def dashboard_endpoint(
+    websocket: WebSocket,
+    _: str = Depends(get_secret_key),  # pyright: ignore[reportCallInDefaultInitializer]
+):
+    """Push a snapshot of every reactor, then field-level deltas as they change."""
+    await websocket.accept()
+    client = dashboard_hub.connect()
+    sender = asyncio.create_task(send_dashboard_updates(websocket, client))
+    try:
+        # Dashboards only listen; reading keeps the disconnect from going unnoticed.
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        dashboard_hub.disconnect(client)
+        _cancelled = sender.cancel()
+
+
 # --- SocketIO Event Handlers for ESP8266 ---
-# The @sio.event decorator is not fully recognized by static type checkers,
-# leading to `reportUntypedFunctionDecorator` warnings. We ignore them here.
-@sio.event  # pyright: ignore[reportUntypedFunctionDecorator, reportUnknownMemberType]
-async def connect(sid: str, _environ: dict[str, Any]):  # pyright: ignore[reportExplicitAny]
-    logger.info(f"ESP8266 connected with sid: {sid}")
-    await conn_manager.set_esp8266_connected(True)
+# socketio has no type stubs, so ``sio.event`` is a partially unknown member.
+@sio.event  # pyright: ignore[reportUnknownMemberType]
+async def connect(sid: str, environ: dict[str, Any], auth: Any = None):  # pyright: ignore[reportExplicitAny, reportAny]
+    # Clients pass options as Socket.IO auth ({"format": "binary", "computer_ids": ["1"]})
+    # or in the query string (?format=binary&computer_ids=1,2). Clients that ask for
+    # nothing get the original hex packets for every reactor.
+    query = parse_qs(environ.get("QUERY_STRING", ""))  # pyright: ignore[reportAny]
+    options: dict[str, Any] = {key: values[0] for key, values in query.items()}  # pyright: ignore[reportExplicitAny]
+    if isinstance(auth, dict):
+        options.update(auth)  # pyright: ignore[reportUnknownArgumentType]
+    wire_format = options.get("format", "hex")
+    if wire_format not in DISPLAY_FORMATS:
+        logger.warning(f"ESP8266 {sid} asked for unknown format {wire_format!r}, using hex")
+        wire_format = "hex"
+    try:
+        subscriptions = parse_subscriptions(options.get("computer_ids"))
+    except ValueError as e:
+        logger.warning(f"ESP8266 {sid} sent invalid subscriptions, following every reactor: {e}")
+        subscriptions = frozenset((ALL_REACTORS,))
+    await conn_manager.add_display(sid, wire_format, subscriptions)
+    logger.info(f"ESP8266 connected with sid: {sid} ({wire_format}, reactors: {sorted(subscriptions)})")
 
 
-@sio.event  # pyright: ignore[reportUntypedFunctionDecorator, reportUnknownMemberType]
+@sio.event  # pyright: ignore[reportUnknownMemberType]
 async def disconnect(sid: str):
     logger.info(f"ESP8266 disconnected with sid: {sid}")
-    await conn_manager.set_esp8266_connected(False)
+    await conn_manager.remove_display(sid)
 
 
-@sio.event  # pyright: ignore[reportUntypedFunctionDecorator, reportUnknownMemberType]
+@sio.event  # pyright: ignore[reportUnknownMemberType]
+async def subscribe(sid: str, data: dict[str, Any]):  # pyright: ignore[reportExplicitAny]
+    """Replace the reactors a display follows; acks with the resulting subscriptions."""
+    try:
+        subscriptions = parse_subscriptions(data.get("computer_ids"))
+    except (ValueError, AttributeError) as e:
+        logger.error(f"Invalid subscription from {sid}: {data}, error: {e}")
+        return {"error": str(e)}
+    await conn_manager.subscribe(sid, subscriptions)
+    return {"computer_ids": sorted(subscriptions)}
+
+
+@sio.event  # pyright: ignore[reportUnknownMemberType]
 async def control_command(sid: str, data: dict[str, Any]):  # pyright: ignore[reportExplicitAny]
+    """Send a command to the addressed computers; acks with the dispatch result."""
     try:
         command = ControlCommand.model_validate(data)
-        logger.info(f"Received control command from ESP8266: {command}")
-
-        command_data = command.model_dump_json()
-        for computer_id, websocket in conn_manager.computercraft_connections.items():
-            try:
-                await websocket.send_text(command_data)
-            except Exception as e:
-                logger.error(
-                    f"Failed to send command to ComputerCraft {computer_id}: {e}"
-                )
     except Exception as e:
         logger.error(f"Invalid control command from {sid}: {data}, error: {e}")
+        return {"error": str(e)}
+    logger.info(f"Received control command from ESP8266: {command}")
+    result = await command_dispatcher.dispatch(command.model_dump(exclude={"computer_ids"}), command.computer_ids)
+    if result.missing:
+        logger.warning(f"Control command for disconnected ComputerCraft {result.missing}")
+    return result.as_dict()
+
+
+# --- JSON Responses ---
+# As datetime.isoformat() writes it, which is what FastAPI's encoder sent before.
+_JSON_DATETIME = "%Y-%m-%dT%H:%M:%S%.f"
+JSON_LAYOUTS = ("rows", "columns")
+
+
+def frame_json(frame: pl.DataFrame, layout: str = "rows") -> str:
+    """Serialize ``frame`` to JSON in Polars, without a Python object per value.
+
+    ``rows`` is a list of objects, one per row; ``columns`` a single object
+    with one array per field.
+    """
+    frame = frame.with_columns(pl.col(pl.Datetime).dt.to_string(_JSON_DATETIME))
+    if layout == "columns":
+        # One row holding every column as a list; strip the enclosing [ ].
+        return frame.select(pl.all().implode()).write_json()[1:-1]
+    return frame.write_json()
+
+
+def frame_response(frame: pl.DataFrame, layout: str = "rows") -> Response:
+    return Response(frame_json(frame, layout), media_type="application/json")
 
 
 # --- REST API Endpoints ---
+_MAX_PAGE_ROWS = 100_000
+
+
 @app.get("/status")
 async def get_status():
     """Get current system status."""
-    return {
+    status = {
         "computercraft_connections": list(
             conn_manager.computercraft_connections.keys()
         ),
         "esp8266_connected": conn_manager.esp8266_connected,
-        "reactor_data": data_manager.reactor_data,
+        "esp8266_formats": conn_manager.display_counts,
+        "esp8266_subscribers": conn_manager.subscriber_counts,
+        "reactor_data": data_manager.reactor_data._asdict(),
+        "reactors": {
+            computer_id: {
+                "last_seen": shard.last_seen,
+                "samples": shard.samples,
+                "duplicates": shard.duplicates,
+                "missed": shard.missed,
+                "reactor_data": shard.state._asdict(),
+            }
+            for computer_id, shard in data_manager.shards.items()
+        },
+    }
+    # Encoded in one pass by pydantic-core instead of via jsonable_encoder.
+    return Response(to_json(status), media_type="application/json")
+
+
+@app.get("/commands")
+async def get_commands():
+    """Command round-trip latency (p50/p99 histograms) and outcomes per reactor."""
+    return {
+        **command_dispatcher.as_dict(),
+        "pending_commands": [
+            {
+                "id": command.command_id,
+                "computer_id": command.computer_id,
+                "attempts": command.attempts,
+                "age_ms": (time.perf_counter() - command.first_sent) * 1000,
+            }
+            for command in command_dispatcher.pending.values()
+        ],
     }
 
 
 @app.get("/data")
-async def get_data_log(limit: int = 100):
-    """Get recent data log entries."""
-    await data_manager.flush_buffer_to_log()
-    return data_manager.data_log.tail(limit).to_dicts()
+async def get_data_log(
+    limit: int = 100,
+    resolution: str = "raw",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    computer_id: str | None = None,
+    layout: str = "rows",
+):
+    """Get data log entries, or min/max/mean/last rollups at a coarser resolution.
+
+    Without ``start``/``end`` the newest ``limit`` raw rows (of ``computer_id``,
+    if given) are returned; with a time range, up to ``limit`` rows from the
+    start of the range. ``layout=columns`` returns one array per field instead
+    of one object per row.
+    """
+    if layout not in JSON_LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"layout must be one of: {', '.join(JSON_LAYOUTS)}")
+    if resolution == "raw":
+        if start is None and end is None:
+            return frame_response(await data_manager.tail(limit, computer_id), layout)
+        return frame_response(await data_manager.query_range(start, end, computer_id, limit), layout)
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"resolution must be one of: raw, {', '.join(RESOLUTIONS)}",
+        )
+    query = data_manager.rollups.query(resolution, start, end, computer_id)
+    return frame_response(await query.tail(limit).collect_async(), layout)
+
+
+@app.get("/export/{export_format}")
+async def export_data(
+    export_format: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    computer_id: str | None = None,
+):
+    """Stream raw rows in ``[start, end)`` as an Arrow IPC file (``arrow``) or Parquet file (``parquet``).
+
+    The body is sent as the sink writes it, so memory stays bounded however
+    long the range.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    media_type, suffix = EXPORT_FORMATS[export_format]
+    frame = data_manager.export_range(start, end, computer_id)
+    return StreamingResponse(
+        stream_export(frame, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="reactor_log.{suffix}"'},
+    )
+
+
+@app.get("/data/page")
+async def get_data_page(
+    cursor: str | None = None,
+    direction: str = "backward",
+    limit: int = 100,
+    computer_id: str | None = None,
+    layout: str = "rows",
+):
+    """Page through raw rows in ``(timestamp, seq)`` order with opaque cursors.
+
+    Without ``cursor`` the first page is the newest ``limit`` rows
+    (``direction=backward``) or the oldest (``direction=forward``). Every
+    response carries ``next`` and ``prev`` cursors for the pages after and
+    before it; rows within a page are always oldest first. An empty page means
+    there is nothing further that way yet, and its cursors stay where they
+    were. Pass the same ``computer_id`` with every cursor.
+    """
+    if layout not in JSON_LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"layout must be one of: {', '.join(JSON_LAYOUTS)}")
+    if direction not in ("forward", "backward"):
+        raise HTTPException(status_code=400, detail="direction must be one of: forward, backward")
+    if not 1 <= limit <= _MAX_PAGE_ROWS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {_MAX_PAGE_ROWS}")
+    if cursor is None:
+        position = Cursor.newest() if direction == "backward" else Cursor.oldest()
+    else:
+        try:
+            position = Cursor.decode(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+    rows = await data_manager.page(position, limit, computer_id)
+    if rows.is_empty():
+        # An empty log: the next forward page starts from the oldest row to arrive.
+        first = last = Cursor.oldest() if position == Cursor.newest() else position
+    else:
+        first, last = (
+            Cursor(
+                to_us(cast(datetime, rows.item(i, "timestamp"))),
+                -1 if (seq := cast(int | None, rows.item(i, "seq"))) is None else seq,
+            )
+            for i in (0, -1)
+        )
+    next_cursor = last.turned(backward=False).encode()
+    prev_cursor = first.turned(backward=True).encode()
+    # Tokens are URL-safe base64, so the rows Polars wrote can be spliced in as they are.
+    body = f'{{"data":{frame_json(rows, layout)},"next":"{next_cursor}","prev":"{prev_cursor}"}}'
+    return Response(body, media_type="application/json")
+
+
+# --- Server-Sent Events ---
+_SSE_BATCH = 1000  # events per write
+_SSE_KEEPALIVE_SECONDS = 15
+_ROLLUP_POLL_SECONDS = 1
+
+
+async def sample_events(after: int, computer_id: str | None) -> AsyncIterator[str]:
+    """Stream samples with ``seq > after`` from the feed, falling back to the log."""
+    feed = data_manager.feed
+    while True:
+        if not feed.covers(after):
+            rows = await data_manager.rows_after_seq(after, computer_id, _SSE_BATCH)
+            if rows.is_empty():
+                # Nothing (for this reactor) before the feed starts.
+                after = max(after, feed.oldest_seq - 1)
+                continue
+            yield "".join(
+                sample_event(
+                    cast(int, row.pop("seq")), cast(str, row.pop("computer_id")), cast(datetime, row.pop("timestamp")), row
+                )
+                for row in rows.to_dicts()
+            )
+            after = cast(int, rows.get_column("seq").max())
+            continue
+        await priority_gate.checkpoint()
+        events, after = feed.read(after, computer_id, _SSE_BATCH)
+        if events:
+            yield "".join(events)
+            # Let samples accumulate so the next write carries many events.
+            await asyncio.sleep(settings.SSE_INTERVAL_MS / 1000)
+            continue
+        try:
+            async with asyncio.timeout(_SSE_KEEPALIVE_SECONDS):
+                await feed.wait(after)
+        except TimeoutError:
+            yield ": keepalive\n\n"
+
+
+async def rollup_events(resolution: str, computer_id: str | None, after_us: int | None) -> AsyncIterator[str]:
+    """Stream rollup buckets that start after ``after_us`` once they are complete.
+
+    A bucket is complete when every row up to its end has been flushed into
+    the log (and so into the rollups), which happens at least every
+    ``LOG_INTERVAL_SECONDS``.
+    """
+    every_us = RESOLUTIONS[resolution] // timedelta(microseconds=1)
+    if after_us is None:
+        after_us = data_manager.flushed_until_us // every_us * every_us - every_us
+    idle = 0.0
+    while True:
+        # Buckets starting before end_us have ended by the newest flushed row.
+        end_us = data_manager.flushed_until_us // every_us * every_us
+        if end_us > after_us + every_us:
+            query = data_manager.rollups.query(resolution, from_us(after_us + 1), from_us(end_us), computer_id)
+            rows = (await query.collect_async()).to_dicts()
+            if rows:
+                yield "".join(sse_event("rollup", to_us(cast(datetime, row["timestamp"])), row) for row in rows)
+                idle = 0.0
+            after_us = end_us - every_us
+        if idle >= _SSE_KEEPALIVE_SECONDS:
+            yield ": keepalive\n\n"
+            idle = 0.0
+        await asyncio.sleep(_ROLLUP_POLL_SECONDS)
+        idle += _ROLLUP_POLL_SECONDS
+
+
+@app.get("/stream")
+async def stream_events(
+    computer_id: str | None = None,
+    resolution: str = "raw",
+    last_event_id: str | None = Header(default=None),  # pyright: ignore[reportCallInDefaultInitializer]
+):
+    """Server-Sent Events with raw samples or completed rollup buckets.
+
+    Sample events carry their ``seq`` as the event id, rollup events the bucket
+    start in microseconds. A reconnecting client sends ``Last-Event-ID`` and
+    resumes right after it; new clients start with live data.
+    """
+    try:
+        after = None if last_event_id is None else int(last_event_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Last-Event-ID must be an integer") from None
+    if resolution == "raw":
+        events = sample_events(data_manager.feed.end_seq - 1 if after is None else after, computer_id)
+    elif resolution in RESOLUTIONS:
+        events = rollup_events(resolution, computer_id, after)
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail=f"resolution must be one of: raw, {', '.join(RESOLUTIONS)}",
+        )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Get persistence and event-loop health metrics."""
+    return {
+        "event_loop": {
+            "max_lag_ms": loop_monitor.max_lag * 1000,
+            "last_lag_ms": loop_monitor.last_lag * 1000,
+        },
+        "persistence": {
+            "hot_rows": data_manager.generation.data_log.height,
+            "hot_chunks": data_manager.generation.data_log.n_chunks(),
+            "log_generation": data_manager.generation.number,
+            "compaction": data_manager.compactor.as_dict(),
+            "buffered_rows": data_manager.buffered_rows,
+            "reactors": len(data_manager.shards),
+            "unsaved_rows": data_manager.unsaved_rows,
+            "stored_files": len(data_manager.store.entries),
+            "wal_segment": data_manager.wal.segment,
+            "wal_fsyncs": data_manager.wal.fsyncs,
+            "last_save": data_manager.last_save,
+        },
+        "computercraft_frames": conn_manager.computercraft_stats,
+        "pipeline": {
+            "ingest_queue_capacity": settings.INGEST_QUEUE_SIZE,
+            "ingest_queue_depth": {
+                computer_id: queue.qsize()
+                for computer_id, queue in conn_manager.computercraft_queues.items()
+            },
+            "stages": {name: stats.as_dict() for name, stats in stage_stats.items()},
+            "broadcast": broadcaster.as_dict(),
+            "dashboard": dashboard_hub.as_dict(),
+            "sse_feed": data_manager.feed.as_dict(),
+            "commands": command_dispatcher.as_dict(),
+            "priority_deferrals": priority_gate.deferrals,
+        },
+    }
 
 
 # --- Main Entry Point ---
@@ -0,0 +1,96 @@
+import asyncio
+import math
+import time
+from bisect import bisect_left
+
+
+class LoopLagMonitor:
+    """Measure how long the event loop is blocked.
+
+    A background task sleeps for ``interval`` seconds at a time; whatever it
+    oversleeps by is time the loop spent running something else without
+    yielding. ``start_window``/``end_window`` bracket an operation (such as a
+    save) and report the worst stall observed in between.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval: float = interval
+        self.max_lag: float = 0.0
+        self.last_lag: float = 0.0
+        self._window_max: float = 0.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self._window_max = max(self._window_max, lag)
+
+    def start_window(self):
+        self._window_max = 0.0
+
+    async def end_window(self) -> float:
+        """Return the worst stall since ``start_window``, including the current tick."""
+        # Let the probe observe any stall that ended right before this call.
+        await asyncio.sleep(self.interval * 2)
+        return self._window_max
+
+
+class Stopwatch:
+    """Tiny helper for timing a block with ``time.perf_counter``."""
+
+    def __init__(self):
+        self.started: float = time.perf_counter()
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+
+class LatencyHistogram:
+    """Latency counts in log-spaced buckets, for percentiles without keeping samples.
+
+    Bucket ``i`` holds values up to ``lowest * growth**i`` seconds, so a
+    reported percentile overestimates the true value by at most ``growth``.
+    Values past the last bucket are counted in it.
+    """
+
+    def __init__(self, lowest: float = 0.0001, highest: float = 60.0, growth: float = 1.25):
+        self.bounds: list[float] = [lowest]
+        while self.bounds[-1] < highest:
+            self.bounds.append(self.bounds[-1] * growth)
+        self.counts: list[int] = [0] * len(self.bounds)
+        self.count: int = 0
+        self.max: float = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[min(bisect_left(self.bounds, seconds), len(self.bounds) - 1)] += 1
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q``-th percentile (0-100), in seconds."""
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(self.count * q / 100), 1)
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "count": self.count,
+            "p50_ms": self.percentile(50) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+            # Non-empty buckets as upper bound in ms -> count.
+            "buckets": {
+                f"{bound * 1000:.3g}": count for bound, count in zip(self.bounds, self.counts) if count
+            },
+        }
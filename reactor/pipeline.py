@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections.abc import Generator, Hashable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass(slots=True)
+class StageStats:
+    """Latency of one pipeline stage, in seconds."""
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    last: float = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+            "last_ms": self.last * 1000,
+        }
+
+
+class LatestValueQueue(Generic[K, V]):
+    """Bounded queue holding at most one pending item per key.
+
+    ``put`` replaces an item that has not been consumed yet (latest value
+    wins), so a slow consumer sees fewer, fresher items instead of a growing
+    backlog, and the producer never waits. Keys are served in the order they
+    first became pending.
+    """
+
+    def __init__(self):
+        self._items: dict[K, tuple[V, float]] = {}
+        self._ready: asyncio.Event = asyncio.Event()
+        self.dropped: int = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, key: K, item: V):
+        if key in self._items:
+            self.dropped += 1
+            # Keep the key's place in line and the original enqueue time.
+            self._items[key] = (item, self._items[key][1])
+        else:
+            self._items[key] = (item, time.perf_counter())
+        self._ready.set()
+
+    async def wait(self):
+        """Wait until at least one item is pending."""
+        while not self._items:
+            self._ready.clear()
+            _ = await self._ready.wait()
+
+    def drain(self) -> dict[K, tuple[V, float]]:
+        """Take every pending item with its enqueue time, oldest key first."""
+        items, self._items = self._items, {}
+        return items
+
+
+class PriorityGate:
+    """Let urgent work run ahead of bulk work that shares the event loop.
+
+    asyncio runs ready tasks first in, first out, and a task keeps the loop
+    until an ``await`` actually suspends it, so an ingest worker with a full
+    queue can hold the loop for many frames. Bulk stages call ``checkpoint``
+    between items: it yields once bulk work has run for ``time_slice``
+    seconds without a checkpoint yielding, and while any ``urgent`` block is
+    running it waits for all of them to finish.
+    """
+
+    def __init__(self, time_slice: float = 0.001):
+        self.time_slice: float = time_slice
+        self.active: int = 0
+        self.deferrals: int = 0  # checkpoints that waited for urgent work
+        self._yielded: float = 0.0
+        self._idle: asyncio.Event = asyncio.Event()
+        self._idle.set()
+
+    @contextmanager
+    def urgent(self) -> Generator[None, None, None]:
+        self.active += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            if not self.active:
+                self._idle.set()
+
+    async def checkpoint(self):
+        now = time.perf_counter()
+        if now - self._yielded >= self.time_slice:
+            self._yielded = now
+            await asyncio.sleep(0)
+        while self.active:
+            self.deferrals += 1
+            _ = await self._idle.wait()
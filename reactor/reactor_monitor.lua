@@ -89,26 +89,27 @@ local function getReactorData()
   return data
 end
 
--- Function to send data to server
-local function sendReactorData()
+-- Samples waiting to be sent, each tagged with a sequence number and tick
+local pending = {}
+local seq = 0
+local lastSend = 0
+
+-- Function to take one sample and queue it for the next batch
+local function sampleReactor()
   -- Try to reconnect if reactor is not connected
   if not reactor then
     print("Reactor disconnected. Attempting to reconnect...")
     connectToReactor()
   end
-  
+
   local success, data = pcall(getReactorData)
   if success then
-    local jsonData = textutils.serializeJSON(data)
-    local send_success, send_err = pcall(function()
-      ws.send(jsonData)
-      return true
-    end)
-    if not send_success then
-      print("Failed to send data: " .. tostring(send_err))
-      print("WebSocket connection lost. Attempting to reconnect...")
-      ws = nil
-      connectToServer()
+    seq = seq + 1
+    data.seq = seq
+    data.tick = os.epoch("utc") -- milliseconds
+    table.insert(pending, data)
+    if #pending > config.MAX_PENDING then
+      table.remove(pending, 1)
     end
   else
     print("Error getting reactor data: " .. tostring(data))
@@ -117,28 +118,169 @@ local function sendReactorData()
   end
 end
 
+-- CRC-16/CCITT (XModem) lookup table for binary frames
+local crcTable = {}
+for i = 0, 255 do
+  local crc = bit32.lshift(i, 8)
+  for _ = 1, 8 do
+    if bit32.band(crc, 0x8000) ~= 0 then
+      crc = bit32.bxor(bit32.lshift(crc, 1), 0x1021)
+    else
+      crc = bit32.lshift(crc, 1)
+    end
+  end
+  crcTable[i] = bit32.band(crc, 0xFFFF)
+end
+
+local function crc16(data)
+  local crc = 0
+  for i = 1, #data do
+    local index = bit32.bxor(bit32.rshift(crc, 8), data:byte(i))
+    crc = bit32.band(bit32.bxor(bit32.lshift(crc, 8), crcTable[index]), 0xFFFF)
+  end
+  return crc
+end
+
+-- Function to pack queued samples into a version 1 binary frame
+-- Header: magic, version, count, base seq, base tick (ms); 32 bytes per sample; CRC-16 trailer
+local function encodeBinaryFrame(samples)
+  local first = samples[1]
+  local parts = { string.pack("<BBHI4i8", 0xB7, 1, #samples, first.seq, first.tick) }
+  for _, sample in ipairs(samples) do
+    table.insert(parts, string.pack(
+      "<HI4ffffffBB",
+      sample.seq - first.seq,
+      sample.tick - first.tick,
+      sample.temperature,
+      sample.fuel_level,
+      sample.coolant_level,
+      sample.waste_level,
+      sample.burn_rate,
+      sample.actual_burn_rate,
+      sample.status == true and 1 or 0,
+      sample.alert_status
+    ))
+  end
+  local body = table.concat(parts)
+  return body .. string.pack("<H", crc16(body))
+end
+
+-- Function to send queued samples to server as one batch frame
+local function sendReactorData()
+  if #pending == 0 then
+    return
+  end
+
+  local send_success, send_err = pcall(function()
+    if config.PROTOCOL == "binary" then
+      -- A u16 count and seq delta per frame; MAX_PENDING keeps batches well below that
+      ws.send(encodeBinaryFrame(pending), true)
+    else
+      ws.send(textutils.serializeJSON({ batch = pending }))
+    end
+    return true
+  end)
+  if send_success then
+    pending = {}
+    lastSend = os.epoch("utc")
+  else
+    -- Samples stay queued; the server drops any it already received
+    print("Failed to send data: " .. tostring(send_err))
+    print("WebSocket connection lost. Attempting to reconnect...")
+    ws = nil
+    connectToServer()
+  end
+end
+
+-- Results of recently executed command ids; the server resends a command
+-- until it is acked, so a repeated id is acked again but not re-executed
+local handledCommands = {}
+local handledOrder = {}
+local HANDLED_COMMANDS_KEPT = 64
+
+-- Function to tell the server a command was executed (or why not)
+local function sendAck(id, ok, err)
+  if not ws then
+    return
+  end
+  local ack = { ack = id, ok = ok }
+  if err then
+    ack.error = err
+  end
+  pcall(ws.send, textutils.serializeJSON(ack))
+end
+
+-- Function to execute a command; returns ok and an error message
+local function executeCommand(data)
+  -- Check if reactor is still connected before executing commands
+  if not reactor then
+    print("Cannot execute command: Reactor not connected")
+    return false, "reactor not connected"
+  end
+
+  if data.command == "emergency_stop" then
+    reactor.setEmergencyShutdown(true)
+    print("Emergency stop activated")
+    return true
+  elseif data.command == "coolant_speed" and data.value then
+    reactor.setCoolantSpeed(data.value)
+    print("Coolant speed set to " .. data.value)
+    return true
+  end
+  return false, "unknown command: " .. tostring(data.command)
+end
+
 -- Function to handle incoming commands
 local function handleCommand(command_json)
   local success, data = pcall(textutils.unserialiseJSON, command_json)
   if success and type(data) == "table" then
-    -- Check if reactor is still connected before executing commands
-    if not reactor then
-      print("Cannot execute command: Reactor not connected")
+    local id = data.id
+    if id ~= nil and handledCommands[id] then
+      sendAck(id, handledCommands[id].ok, handledCommands[id].err)
       return
     end
-    
-    if data.command == "emergency_stop" then
-      reactor.setEmergencyShutdown(true)
-      print("Emergency stop activated")
-    elseif data.command == "coolant_speed" and data.value then
-      reactor.setCoolantSpeed(data.value)
-      print("Coolant speed set to " .. data.value)
+
+    local run_ok, ok, err = pcall(executeCommand, data)
+    if not run_ok then
+      ok, err = false, tostring(ok)
+      print("Command failed: " .. err)
+    end
+
+    if id ~= nil then
+      handledCommands[id] = { ok = ok, err = err }
+      table.insert(handledOrder, id)
+      if #handledOrder > HANDLED_COMMANDS_KEPT then
+        handledCommands[table.remove(handledOrder, 1)] = nil
+      end
+      sendAck(id, ok, err)
     end
   else
     print("Failed to parse command: " .. tostring(data))
   end
 end
 
+-- Function to wait until the next sample is due, handling commands as they arrive
+local function waitForCommands(seconds)
+  local deadline = os.epoch("utc") + seconds * 1000
+  while true do
+    local remaining = (deadline - os.epoch("utc")) / 1000
+    if remaining <= 0 then
+      return
+    end
+    if not ws then
+      sleep(remaining)
+      return
+    end
+    local received, response = pcall(ws.receive, remaining)
+    if not received then
+      print("WebSocket connection lost: " .. tostring(response))
+      ws = nil
+    elseif response then
+      handleCommand(response)
+    end
+  end
+end
+
 -- Main loop
 local function main()
   print("Starting reactor monitoring...")
@@ -150,19 +292,14 @@ local function main()
       connectToServer()
     end
 
-    -- Send reactor data
-    sendReactorData()
-
-    -- Check for incoming commands
-    if ws then
-      local response = ws.receive(0.1) -- Non-blocking receive
-      if response then
-        handleCommand(response)
-      end
+    -- Sample the reactor and send the batch once BATCH_INTERVAL has passed
+    sampleReactor()
+    if os.epoch("utc") - lastSend >= config.BATCH_INTERVAL * 1000 then
+      sendReactorData()
     end
 
-    -- Wait for next update
-    sleep(config.UPDATE_INTERVAL)
+    -- Wait for next update, executing commands as soon as they arrive
+    waitForCommands(config.UPDATE_INTERVAL)
   end
 end
 
@@ -0,0 +1,190 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import polars as pl
+from loguru import logger
+
+from ingest import FLOAT_FIELDS
+from storage import PartitionedParquetStore
+
+ROLLUP_FIELDS: tuple[str, ...] = (*FLOAT_FIELDS, "alert_status")
+
+# Partial aggregates: min/max/sum/last per field plus the row count, so buckets
+# can be merged again at any time (mean = sum / count).
+ROLLUP_SCHEMA: dict[str, pl.DataType] = {
+    "bucket": pl.Datetime(),
+    "computer_id": pl.Categorical(),
+    "count": pl.UInt32(),
+    "last_timestamp": pl.Datetime(),
+    **{
+        f"{field}_{stat}": pl.Float64() if stat == "sum" else pl.Float32()
+        for field in ROLLUP_FIELDS
+        for stat in ("min", "max", "sum", "last")
+    },
+}
+
+RESOLUTIONS: dict[str, timedelta] = {
+    "1m": timedelta(minutes=1),
+    "1h": timedelta(hours=1),
+}
+
+
+def aggregate(raw: pl.DataFrame | pl.LazyFrame, every: timedelta) -> pl.LazyFrame:
+    """Aggregate raw log rows into partial rollup buckets of width ``every``."""
+    return (
+        raw.lazy()
+        .sort("timestamp")
+        .group_by(pl.col("timestamp").dt.truncate(every).alias("bucket"), "computer_id")
+        .agg(
+            pl.len().alias("count"),
+            pl.col("timestamp").max().alias("last_timestamp"),
+            *(
+                expr
+                for field in ROLLUP_FIELDS
+                for expr in (
+                    pl.col(field).min().alias(f"{field}_min"),
+                    pl.col(field).max().alias(f"{field}_max"),
+                    pl.col(field).cast(pl.Float64).sum().alias(f"{field}_sum"),
+                    pl.col(field).last().alias(f"{field}_last"),
+                )
+            ),
+        )
+        .cast(ROLLUP_SCHEMA)  # pyright: ignore[reportArgumentType]
+    )
+
+
+def merge(partials: pl.DataFrame | pl.LazyFrame, every: timedelta | None = None) -> pl.LazyFrame:
+    """Combine partial buckets sharing a key, optionally re-bucketing to ``every``."""
+    lf = partials.lazy()
+    if every is not None:
+        lf = lf.with_columns(pl.col("bucket").dt.truncate(every))
+    return (
+        lf.sort("last_timestamp")
+        .group_by("bucket", "computer_id")
+        .agg(
+            pl.col("count").sum(),
+            pl.col("last_timestamp").max(),
+            *(
+                expr
+                for field in ROLLUP_FIELDS
+                for expr in (
+                    pl.col(f"{field}_min").min(),
+                    pl.col(f"{field}_max").max(),
+                    pl.col(f"{field}_sum").sum(),
+                    pl.col(f"{field}_last").last(),
+                )
+            ),
+        )
+        .cast(ROLLUP_SCHEMA)  # pyright: ignore[reportArgumentType]
+    )
+
+
+def finish(partials: pl.LazyFrame) -> pl.LazyFrame:
+    """Turn partial aggregates into the min/max/mean/last shape served by the API."""
+    return partials.sort("bucket", "computer_id").select(
+        pl.col("bucket").alias("timestamp"),
+        "computer_id",
+        "count",
+        *(
+            expr
+            for field in ROLLUP_FIELDS
+            for expr in (
+                pl.col(f"{field}_min"),
+                pl.col(f"{field}_max"),
+                (pl.col(f"{field}_sum") / pl.col("count")).alias(f"{field}_mean"),
+                pl.col(f"{field}_last"),
+            )
+        ),
+    )
+
+
+class RollupTier:
+    """One rollup resolution: open buckets in memory, finalized buckets on disk."""
+
+    def __init__(self, name: str, every: timedelta, root: Path):
+        self.name: str = name
+        self.every: timedelta = every
+        self.store: PartitionedParquetStore = PartitionedParquetStore(
+            root, schema=ROLLUP_SCHEMA, time_column="bucket"
+        )
+        self.open: pl.DataFrame = pl.DataFrame(schema=ROLLUP_SCHEMA)
+
+    @property
+    def persisted_until(self) -> datetime | None:
+        """End of the newest bucket on disk; rows after it only live in ``open``."""
+        newest = self.store.max_timestamp()
+        return None if newest is None else newest + self.every
+
+    def update(self, partials: pl.DataFrame):
+        """Fold new partial buckets into the open buckets."""
+        if partials.is_empty():
+            return
+        self.open = merge(pl.concat([self.open, partials])).collect()
+
+    def take_finalized(self, now: datetime) -> pl.DataFrame:
+        """Remove and return open buckets that ended before ``now``."""
+        done = pl.col("bucket") + self.every <= now
+        finalized = self.open.filter(done)
+        self.open = self.open.filter(~done)
+        return finalized
+
+    def query(
+        self,
+        start: datetime | None,
+        end: datetime | None,
+        computer_id: str | None,
+    ) -> pl.LazyFrame:
+        open_buckets = self.open.lazy()
+        if start is not None:
+            open_buckets = open_buckets.filter(pl.col("bucket") >= start)
+        if end is not None:
+            open_buckets = open_buckets.filter(pl.col("bucket") < end)
+        if computer_id is not None:
+            open_buckets = open_buckets.filter(pl.col("computer_id") == computer_id)
+        # Late samples can add a partial for a bucket already on disk; merging fixes that up.
+        return finish(merge(pl.concat([self.store.scan(start, end, computer_id), open_buckets])))
+
+
+class RollupManager:
+    """Maintain every rollup tier incrementally from flushed raw rows.
+
+    Each flush is aggregated once at the finest resolution; coarser tiers are
+    built by re-bucketing those partials, so the work per flush is
+    proportional to the flushed rows, not to the history.
+    """
+
+    def __init__(self, root: Path):
+        self.tiers: dict[str, RollupTier] = {
+            name: RollupTier(name, every, root / name) for name, every in RESOLUTIONS.items()
+        }
+
+    def update(self, new_rows: pl.DataFrame):
+        if new_rows.is_empty():
+            return
+        finest: pl.DataFrame | None = None
+        for tier in self.tiers.values():
+            partials = (
+                aggregate(new_rows, tier.every) if finest is None else merge(finest, tier.every)
+            ).collect()
+            tier.update(partials)
+            finest = partials
+
+    def rebuild_open(self, raw_store: PartitionedParquetStore):
+        """Recompute buckets newer than what each tier persisted from the raw store."""
+        for tier in self.tiers.values():
+            since = tier.persisted_until
+            raw = raw_store.scan(start=since)
+            tier.update(aggregate(raw, tier.every).collect(engine="streaming"))
+            logger.info(f"Rebuilt {tier.open.height} open {tier.name} rollup buckets since {since}")
+
+    def take_finalized(self, now: datetime) -> list[tuple[RollupTier, pl.DataFrame]]:
+        return [(tier, tier.take_finalized(now)) for tier in self.tiers.values()]
+
+    def query(
+        self,
+        resolution: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        computer_id: str | None = None,
+    ) -> pl.LazyFrame:
+        return self.tiers[resolution].query(start, end, computer_id)
@@ -0,0 +1,647 @@
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import TypeVar, cast
+from urllib.parse import quote
+
+import polars as pl
+from loguru import logger
+
+from index import Cursor, to_us
+
+
+# --- Log Schema ---
+LOG_SCHEMA: dict[str, pl.DataType] = {
+    "timestamp": pl.Datetime(),
+    "computer_id": pl.Categorical(),
+    "temperature": pl.Float32(),
+    "fuel_level": pl.Float32(),
+    "coolant_level": pl.Float32(),
+    "waste_level": pl.Float32(),
+    "status": pl.Boolean(),
+    "burn_rate": pl.Float32(),
+    "actual_burn_rate": pl.Float32(),
+    "alert_status": pl.UInt8(),
+    # Server-wide ingest order, increasing by one per sample. Null for rows
+    # stored before the column existed.
+    "seq": pl.Int64(),
+}
+
+# Rows written before the log tracked which computer sent them.
+LEGACY_COMPUTER_ID = "unknown"
+
+
+# --- Manifest ---
+_T = TypeVar("_T")
+# A parsed JSON object; its keys are always strings.
+_JsonObject = dict[str, object]
+# json.loads is typed to return Any; manifest lines are narrowed field by field.
+_loads: Callable[[str], object] = json.loads
+
+
+def _json_object(value: object) -> _JsonObject:
+    if not isinstance(value, dict):
+        raise TypeError(f"expected a JSON object, got {type(value).__name__}")
+    return cast(_JsonObject, value)
+
+
+def _field(record: _JsonObject, key: str, kind: type[_T]) -> _T:
+    """``record[key]``, raising ``TypeError`` unless it is a ``kind``."""
+    value = record[key]
+    if not isinstance(value, kind):
+        raise TypeError(f"manifest field {key!r} is not a {kind.__name__}")
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class ManifestEntry:
+    path: str
+    date: str
+    computer_id: str
+    rows: int
+    min_ts: datetime
+    max_ts: datetime
+    max_seq: int | None = None
+
+    @classmethod
+    def from_json(cls, record: _JsonObject) -> "ManifestEntry":
+        """Parse one manifest line, timestamps included, so lookups never parse again."""
+        return cls(
+            path=_field(record, "path", str),
+            date=_field(record, "date", str),
+            computer_id=_field(record, "computer_id", str),
+            rows=_field(record, "rows", int),
+            min_ts=datetime.fromisoformat(_field(record, "min_timestamp", str)),
+            max_ts=datetime.fromisoformat(_field(record, "max_timestamp", str)),
+            max_seq=None if record.get("max_seq") is None else _field(record, "max_seq", int),
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "path": self.path,
+                "date": self.date,
+                "computer_id": self.computer_id,
+                "rows": self.rows,
+                "min_timestamp": self.min_ts.isoformat(),
+                "max_timestamp": self.max_ts.isoformat(),
+                "max_seq": self.max_seq,
+            }
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ManifestStats:
+    """Totals over all entries, kept up to date instead of recomputed per call."""
+
+    rows: int = 0
+    max_seq: int | None = None
+    max_ts: datetime | None = None
+
+    def added(self, entries: Iterable[ManifestEntry]) -> "ManifestStats":
+        rows, max_seq, max_ts = self.rows, self.max_seq, self.max_ts
+        for entry in entries:
+            rows += entry.rows
+            if entry.max_seq is not None and (max_seq is None or entry.max_seq > max_seq):
+                max_seq = entry.max_seq
+            if max_ts is None or entry.max_ts > max_ts:
+                max_ts = entry.max_ts
+        return ManifestStats(rows, max_seq, max_ts)
+
+    @classmethod
+    def from_json(cls, record: _JsonObject) -> "ManifestStats":
+        return cls(
+            _field(record, "rows", int),
+            None if record["max_seq"] is None else _field(record, "max_seq", int),
+            None if record["max_timestamp"] is None else datetime.fromisoformat(_field(record, "max_timestamp", str)),
+        )
+
+    def to_json(self) -> _JsonObject:
+        return {
+            "rows": self.rows,
+            "max_seq": self.max_seq,
+            "max_timestamp": None if self.max_ts is None else self.max_ts.isoformat(),
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class ManifestIndex:
+    """Manifest entries sorted by min timestamp, bisected on their µs bounds.
+
+    Appends and merges build a new index and swap it in whole, so a reader
+    that took one sees a consistent set of files without a lock.
+    """
+
+    entries: list[ManifestEntry] = field(default_factory=list)
+    min_us: list[int] = field(default_factory=list)
+    max_us: list[int] = field(default_factory=list)
+    widest_us: int = 0  # longest time span of a single file
+    stats: ManifestStats = ManifestStats()
+
+    @classmethod
+    def build(cls, entries: Iterable[ManifestEntry], stats: ManifestStats) -> "ManifestIndex":
+        ordered = sorted(entries, key=lambda entry: entry.min_ts)
+        min_us = [to_us(entry.min_ts) or 0 for entry in ordered]
+        max_us = [to_us(entry.max_ts) or 0 for entry in ordered]
+        widest_us = max((hi - lo for lo, hi in zip(min_us, max_us)), default=0)
+        return cls(ordered, min_us, max_us, widest_us, stats)
+
+    def added(self, new: list[ManifestEntry]) -> "ManifestIndex":
+        entries, min_us, max_us = self.entries.copy(), self.min_us.copy(), self.max_us.copy()
+        widest_us = self.widest_us
+        for entry in new:
+            lo, hi = to_us(entry.min_ts) or 0, to_us(entry.max_ts) or 0
+            i = bisect_right(min_us, lo)
+            entries.insert(i, entry)
+            min_us.insert(i, lo)
+            max_us.insert(i, hi)
+            widest_us = max(widest_us, hi - lo)
+        return ManifestIndex(entries, min_us, max_us, widest_us, self.stats.added(new))
+
+    def replaced(self, old: list[ManifestEntry], new: list[ManifestEntry]) -> "ManifestIndex":
+        """Swap ``old`` entries for ``new`` ones holding the same rows."""
+        gone = {entry.path for entry in old}
+        return ManifestIndex.build([e for e in self.entries if e.path not in gone] + new, self.stats)
+
+    def first_overlapping(self, start_us: int) -> int:
+        """Position of the first entry that can reach ``start_us``; no file spans more than ``widest_us``."""
+        return bisect_left(self.min_us, start_us - self.widest_us)
+
+    def matching(self, start_us: int | None, end_us: int | None, computer_id: str | None) -> list[ManifestEntry]:
+        lo = 0 if start_us is None else self.first_overlapping(start_us)
+        hi = len(self.entries) if end_us is None else bisect_left(self.min_us, end_us)
+        return [
+            self.entries[i]
+            for i in range(lo, hi)
+            if (start_us is None or self.max_us[i] >= start_us)
+            and (computer_id is None or self.entries[i].computer_id == computer_id)
+        ]
+
+
+class PartitionedParquetStore:
+    """Append-only Parquet store partitioned by date and computer_id.
+
+    Each append writes the new rows as fresh files under
+    ``date=YYYY-MM-DD/computer_id=<id>/`` and appends one line per file to
+    ``manifest.jsonl``, so the cost of an append depends only on the rows
+    being appended. ``merge_closed`` later folds the files of partitions that
+    can no longer grow into one file each and rewrites the manifest, which
+    keeps the file count at about one per reactor and day.
+
+    Appends and merges must come from a single thread (see ``ParquetWriter``);
+    readers may run anywhere.
+    """
+
+    MANIFEST_NAME: str = "manifest.jsonl"
+    # Files merged away but not yet deleted, so a restart can finish the job.
+    RETIRED_NAME: str = "retired.json"
+    # Merged files are read by time range, so small row groups let the reader skip most of a day.
+    MERGED_ROW_GROUP_ROWS: int = 16_384
+    # Files replaced by a merge stay this long for readers still holding an older index.
+    RETIRE_SECONDS: float = 3600.0
+
+    def __init__(
+        self,
+        root: Path,
+        schema: dict[str, pl.DataType] = LOG_SCHEMA,
+        time_column: str = "timestamp",
+    ):
+        self.root: Path = root
+        self.schema: dict[str, pl.DataType] = schema
+        self.time_column: str = time_column
+        self.manifest_path: Path = root / self.MANIFEST_NAME
+        self.retired_path: Path = root / self.RETIRED_NAME
+        self.index: ManifestIndex = ManifestIndex()
+        self._counter: int = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._load_manifest()
+        # (time retired, paths) of merged-away files awaiting deletion. Nothing
+        # reads the store yet, so those left by the last run can go now.
+        self._retired: list[tuple[float, list[str]]] = self._load_retired()
+        self._delete_retired(float("inf"))
+
+    def _load_manifest(self):
+        """Read the manifest, skipping a torn trailing line from a crash.
+
+        A merge rewrites the manifest headed by a checkpoint holding the totals
+        of the entries written with it, so only entries appended since are
+        folded into the totals here.
+        """
+        if not self.manifest_path.exists():
+            return
+        entries: list[ManifestEntry] = []
+        stats = ManifestStats()
+        covered = 0
+        with self.manifest_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = _json_object(_loads(line))
+                    if "checkpoint" in record:
+                        checkpoint = _json_object(record["checkpoint"])
+                        stats = ManifestStats.from_json(checkpoint)
+                        covered = _field(checkpoint, "entries", int)
+                        continue
+                    entries.append(ManifestEntry.from_json(record))
+                except (KeyError, TypeError, ValueError):
+                    logger.warning(f"Skipping corrupt manifest line in {self.manifest_path}")
+        self.index = ManifestIndex.build(entries, stats.added(entries[covered:]))
+
+    @property
+    def entries(self) -> list[ManifestEntry]:
+        """Current manifest entries in min-timestamp order."""
+        return self.index.entries
+
+    @property
+    def row_count(self) -> int:
+        return self.index.stats.rows
+
+    def is_empty(self) -> bool:
+        return not self.index.entries
+
+    def max_seq(self) -> int | None:
+        """Highest persisted ``seq``, from the manifest alone."""
+        return self.index.stats.max_seq
+
+    def max_timestamp(self) -> datetime | None:
+        """Newest persisted timestamp, from the manifest alone."""
+        return self.index.stats.max_ts
+
+    def append(self, df: pl.DataFrame) -> list[ManifestEntry]:
+        """Write ``df`` as new partition files and record them in the manifest."""
+        if df.is_empty():
+            return []
+        partitions = df.with_columns(
+            pl.col(self.time_column).dt.date().alias("_date"),
+        ).partition_by(["_date", "computer_id"], as_dict=True)
+
+        new_entries: list[ManifestEntry] = []
+        for key, part in partitions.items():
+            day, computer_id = cast(tuple[date, object], key)
+            new_entries.append(self._write_partition(part.drop("_date"), day, str(computer_id)))
+
+        with self.manifest_path.open("a", encoding="utf-8") as f:
+            for entry in new_entries:
+                _ = f.write(entry.to_json() + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.index = self.index.added(new_entries)
+        return new_entries
+
+    def _write_partition(
+        self, part: pl.DataFrame, day: date, computer_id: str, row_group_size: int | None = None
+    ) -> ManifestEntry:
+        """Write one partition file atomically and describe it for the manifest."""
+        relative_dir = Path(f"date={day.isoformat()}") / f"computer_id={quote(computer_id, safe='')}"
+        (self.root / relative_dir).mkdir(parents=True, exist_ok=True)
+        self._counter += 1
+        relative_path = relative_dir / f"part-{time.time_ns()}-{self._counter}.parquet"
+
+        final_path = self.root / relative_path
+        tmp_path = final_path.with_suffix(".parquet.tmp")
+        part.write_parquet(tmp_path, row_group_size=row_group_size)
+        _ = tmp_path.replace(final_path)
+
+        timestamps = part.get_column(self.time_column)
+        max_seq = part.get_column("seq").max() if "seq" in part.columns else None
+        return ManifestEntry(
+            path=relative_path.as_posix(),
+            date=day.isoformat(),
+            computer_id=computer_id,
+            rows=part.height,
+            min_ts=timestamps.min(),  # pyright: ignore[reportArgumentType]
+            max_ts=timestamps.max(),  # pyright: ignore[reportArgumentType]
+            max_seq=None if max_seq is None else int(max_seq),  # pyright: ignore[reportArgumentType]
+        )
+
+    def merge_closed(self, now: datetime, max_files: int = 4096) -> int:
+        """Merge the files of partitions that can no longer grow; return how many were replaced.
+
+        Past days become one file per computer; today's files are merged per
+        finished hour, and those into the day's file once the day is over. At
+        most about ``max_files`` files are merged per call, so a large backlog
+        is worked off over several saves.
+        """
+        self._delete_retired(time.time() - self.RETIRE_SECONDS)
+        today = now.date().isoformat()
+        this_hour = now.replace(minute=0, second=0, microsecond=0)
+        groups: dict[tuple[str, str, datetime | None], list[ManifestEntry]] = {}
+        for entry in self.index.entries:
+            if entry.date < today:
+                key = (entry.date, entry.computer_id, None)
+            elif entry.max_ts < this_hour:
+                key = (entry.date, entry.computer_id, entry.min_ts.replace(minute=0, second=0, microsecond=0))
+            else:
+                continue
+            groups.setdefault(key, []).append(entry)
+
+        old: list[ManifestEntry] = []
+        new: list[ManifestEntry] = []
+        for group in groups.values():
+            if len(group) < 2:
+                continue
+            if old and len(old) + len(group) > max_files:
+                break
+            new.append(self._merge_files(group))
+            old.extend(group)
+        if not new:
+            return 0
+
+        index = self.index.replaced(old, new)
+        self._write_manifest(index)
+        self.index = index
+        # Recorded only once the manifest no longer names them.
+        self._retired.append((time.time(), [entry.path for entry in old]))
+        self._write_retired()
+        logger.info(f"Merged {len(old)} files into {len(new)} in {self.root}")
+        return len(old)
+
+    def _merge_files(self, group: list[ManifestEntry]) -> ManifestEntry:
+        merged = (
+            self._scan_files([self.root / entry.path for entry in group])
+            .sort(self.time_column, maintain_order=True)
+            .cast(self.schema)  # pyright: ignore[reportArgumentType]
+            .collect()
+        )
+        first = group[0]
+        return self._write_partition(
+            merged, date.fromisoformat(first.date), first.computer_id, self.MERGED_ROW_GROUP_ROWS
+        )
+
+    def _write_manifest(self, index: ManifestIndex):
+        """Atomically replace the manifest with ``index``, headed by a checkpoint of its totals."""
+        tmp_path = self.manifest_path.with_suffix(".jsonl.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            _ = f.write(json.dumps({"checkpoint": {**index.stats.to_json(), "entries": len(index.entries)}}) + "\n")
+            for entry in index.entries:
+                _ = f.write(entry.to_json() + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        _ = tmp_path.replace(self.manifest_path)
+
+    def _write_retired(self):
+        tmp_path = self.retired_path.with_suffix(".json.tmp")
+        _ = tmp_path.write_text(json.dumps(self._retired), encoding="utf-8")
+        _ = tmp_path.replace(self.retired_path)
+
+    def _load_retired(self) -> list[tuple[float, list[str]]]:
+        if not self.retired_path.exists():
+            return []
+        try:
+            # Written by _write_retired as a list of [retired at, paths] pairs.
+            retired = cast(list[tuple[float, list[str]]], json.loads(self.retired_path.read_text(encoding="utf-8")))
+            return [(at, paths) for at, paths in retired]
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring corrupt {self.retired_path}")
+            return []
+
+    def _delete_retired(self, before: float):
+        """Delete merged-away files retired before ``before``."""
+        due = [paths for at, paths in self._retired if at < before]
+        if not due:
+            return
+        for paths in due:
+            for path in paths:
+                (self.root / path).unlink(missing_ok=True)
+        self._retired = [(at, paths) for at, paths in self._retired if at >= before]
+        self._write_retired()
+
+    def files(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        computer_id: str | None = None,
+    ) -> list[Path]:
+        """Paths of files that may hold rows in ``[start, end)``, pruned by the manifest."""
+        return [self.root / entry.path for entry in self._matching(start, end, computer_id)]
+
+    def _scan_files(self, paths: list[Path]) -> pl.LazyFrame:
+        # Files written before a column was added to the schema read it as null.
+        return pl.scan_parquet(
+            paths, schema=self.schema, missing_columns="insert", hive_partitioning=False
+        )
+
+    def _matching(
+        self,
+        start: datetime | None,
+        end: datetime | None,
+        computer_id: str | None,
+    ) -> list[ManifestEntry]:
+        return self.index.matching(to_us(start), to_us(end), computer_id)
+
+    def scan(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        computer_id: str | None = None,
+    ) -> pl.LazyFrame:
+        """Lazily scan rows in ``[start, end)``.
+
+        Files outside the range are skipped using the manifest; the remaining
+        predicate is pushed down into the Parquet reader.
+        """
+        files = self.files(start, end, computer_id)
+        if not files:
+            return pl.LazyFrame(schema=self.schema)
+        lf = self._scan_files(files)
+        if start is not None:
+            lf = lf.filter(pl.col(self.time_column) >= start)
+        if end is not None:
+            lf = lf.filter(pl.col(self.time_column) < end)
+        if computer_id is not None:
+            lf = lf.filter(pl.col("computer_id") == computer_id)
+        return lf.cast(self.schema)  # pyright: ignore[reportArgumentType]
+
+    def tail(self, n: int, end: datetime | None = None, computer_id: str | None = None) -> pl.DataFrame:
+        """Return the newest ``n`` rows (of ``computer_id``) before ``end`` reading only the newest files."""
+        index = self.index
+        end_us = to_us(end)
+        rows = 0
+        oldest: int | None = None
+        # Walk back from the newest file start; all rows of the files passed lie after ``oldest``.
+        for i in range((len(index.entries) if end_us is None else bisect_left(index.min_us, end_us)) - 1, -1, -1):
+            if rows >= n:
+                break
+            entry = index.entries[i]
+            if computer_id is not None and entry.computer_id != computer_id:
+                continue
+            oldest = index.min_us[i]
+            if end_us is None or index.max_us[i] < end_us:
+                rows += entry.rows
+        if oldest is None:
+            return pl.DataFrame(schema=self.schema)
+        # Partitions overlap in time, so any file reaching back past ``oldest``
+        # may also hold some of the newest n rows.
+        selected = index.matching(oldest, end_us, computer_id)
+        lf = self._scan_files([self.root / e.path for e in selected])
+        if end is not None:
+            lf = lf.filter(pl.col(self.time_column) < end)
+        if computer_id is not None:
+            lf = lf.filter(pl.col("computer_id") == computer_id)
+        return lf.sort(self.time_column).tail(n).cast(self.schema).collect()  # pyright: ignore[reportArgumentType]
+
+    def scan_after_seq(self, after: int, computer_id: str | None = None) -> pl.LazyFrame:
+        """Lazily scan rows with ``seq > after``, skipping files the manifest rules out."""
+        files = [
+            self.root / entry.path
+            for entry in self.index.entries
+            if entry.max_seq is not None
+            and entry.max_seq > after
+            and (computer_id is None or entry.computer_id == computer_id)
+        ]
+        if not files:
+            return pl.LazyFrame(schema=self.schema)
+        lf = self._scan_files(files).filter(pl.col("seq") > after)
+        if computer_id is not None:
+            lf = lf.filter(pl.col("computer_id") == computer_id)
+        return lf.cast(self.schema)  # pyright: ignore[reportArgumentType]
+
+    def page(self, cursor: Cursor, limit: int, end: datetime, computer_id: str | None = None) -> pl.DataFrame:
+        """Up to ``limit`` rows before ``end`` just beyond ``cursor``, in ``(timestamp, seq)`` order.
+
+        Files are taken from the manifest in timestamp order, starting at the
+        cursor, until they are sure to hold the whole page. A page therefore
+        reads about ``limit`` rows plus what the Parquet reader cannot skip of
+        the files straddling its ends, however deep in the history it lies.
+        """
+        index = self.index
+        end_us = to_us(end) or 0
+        selected: list[int] = []
+        counted = 0  # rows in selected files that are all beyond the cursor
+        horizon: int | None = None  # no row further out than this can make the page
+        if cursor.backward:
+            for i in range(bisect_right(index.min_us, cursor.timestamp_us) - 1, -1, -1):
+                file_min, file_max, entry = index.min_us[i], index.max_us[i], index.entries[i]
+                if horizon is not None and file_min + index.widest_us < horizon:
+                    break  # every file from here on ends before the horizon
+                if file_min >= end_us or (computer_id is not None and entry.computer_id != computer_id):
+                    continue
+                if horizon is not None and file_max < horizon:
+                    continue
+                selected.append(i)
+                if file_max < cursor.timestamp_us and file_max < end_us:
+                    counted += entry.rows
+                    if horizon is None and counted >= limit:
+                        horizon = min(index.min_us[j] for j in selected)
+        else:
+            # Files overlapping the cursor start at most the widest file's span before it.
+            for i in range(index.first_overlapping(cursor.timestamp_us), len(index.entries)):
+                file_min, file_max, entry = index.min_us[i], index.max_us[i], index.entries[i]
+                if file_min >= end_us or (horizon is not None and file_min > horizon):
+                    break
+                if file_max < cursor.timestamp_us or (computer_id is not None and entry.computer_id != computer_id):
+                    continue
+                selected.append(i)
+                if file_min > cursor.timestamp_us:
+                    counted += entry.rows
+                    if horizon is None and counted >= limit:
+                        horizon = max(index.max_us[j] for j in selected)
+        if not selected:
+            return pl.DataFrame(schema=self.schema)
+        paths = [self.root / index.entries[i].path for i in selected]
+        if horizon is not None:
+            # A merged file can span a whole day, so first read only as far as
+            # should hold the page twice over. If that holds a full page, no row
+            # further out can belong to it.
+            reach = self._reach(index, selected, cursor.timestamp_us, horizon, 2 * limit)
+            if reach != horizon:
+                rows = self._read_page(paths, cursor, limit, end, computer_id, reach)
+                if rows.height >= limit:
+                    return rows
+        return self._read_page(paths, cursor, limit, end, computer_id, horizon)
+
+    @staticmethod
+    def _reach(index: ManifestIndex, selected: list[int], cursor_us: int, horizon: int, rows: int) -> int:
+        """The point between the cursor and ``horizon`` that about ``rows`` rows of the files lie before.
+
+        Assumes each file's rows are spread evenly over its span.
+        """
+
+        def expected(reach: int) -> float:
+            lo, hi = min(cursor_us, reach), max(cursor_us, reach)
+            total = 0.0
+            for i in selected:
+                file_min, file_max = index.min_us[i], index.max_us[i]
+                overlap = min(hi, file_max) - max(lo, file_min)
+                if overlap >= 0:
+                    total += index.entries[i].rows * (overlap + 1) / (file_max - file_min + 1)
+            return total
+
+        near, far = cursor_us, horizon
+        while abs(far - near) > 1_000_000:
+            middle = (near + far) // 2
+            if expected(middle) >= rows:
+                far = middle
+            else:
+                near = middle
+        return far
+
+    def _read_page(
+        self,
+        paths: list[Path],
+        cursor: Cursor,
+        limit: int,
+        end: datetime,
+        computer_id: str | None,
+        reach: int | None,
+    ) -> pl.DataFrame:
+        # Plain timestamp bounds let the reader skip row groups; beyond() alone cannot.
+        # Cursors may sit outside the range of Python datetimes, so the bounds stay µs.
+        timestamp = pl.col(self.time_column)
+        at = pl.lit(cursor.timestamp_us).cast(pl.Datetime("us"))
+        bounds = timestamp <= at if cursor.backward else timestamp >= at
+        if reach is not None:
+            far = pl.lit(reach).cast(pl.Datetime("us"))
+            bounds &= timestamp >= far if cursor.backward else timestamp <= far
+        lf = self._scan_files(paths).filter(bounds & (timestamp < end) & cursor.beyond())
+        if computer_id is not None:
+            lf = lf.filter(pl.col("computer_id") == computer_id)
+        lf = lf.sort(self.time_column, "seq", nulls_last=False)
+        lf = lf.tail(limit) if cursor.backward else lf.head(limit)
+        return lf.cast(self.schema).collect()  # pyright: ignore[reportArgumentType]
+
+    def read_all(self) -> pl.DataFrame:
+        """Read the whole store into memory."""
+        return self.scan().collect()
+
+    def import_legacy_file(self, legacy_file: Path):
+        """Import a single-file log written before partitioned storage existed."""
+        legacy = pl.read_parquet(legacy_file)
+        if "computer_id" not in legacy.columns:
+            legacy = legacy.with_columns(pl.lit(LEGACY_COMPUTER_ID).alias("computer_id"))
+        if "seq" not in legacy.columns:
+            legacy = legacy.with_columns(pl.lit(None, dtype=pl.Int64).alias("seq"))
+        _ = self.append(legacy.select(LOG_SCHEMA.keys()).cast(LOG_SCHEMA))  # pyright: ignore[reportArgumentType]
+        _ = legacy_file.rename(legacy_file.with_name(legacy_file.name + ".migrated"))
+        logger.info(f"Migrated {legacy.height} rows from {legacy_file} into {self.root}")
+
+
+# --- Background Writer ---
+class ParquetWriter:
+    """Run store appends and merges on a dedicated thread.
+
+    Polars releases the GIL while encoding and writing Parquet, so handing an
+    immutable DataFrame snapshot to this thread keeps the event loop free for
+    the whole encode-and-write. Being the only thread that writes a store, it
+    also keeps appends and merges from interleaving.
+    """
+
+    def __init__(self):
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="parquet-writer"
+        )
+
+    async def append(self, store: PartitionedParquetStore, snapshot: pl.DataFrame) -> list[ManifestEntry]:
+        return await asyncio.wrap_future(self._executor.submit(store.append, snapshot))
+
+    async def merge(self, store: PartitionedParquetStore, now: datetime) -> int:
+        return await asyncio.wrap_future(self._executor.submit(store.merge_closed, now))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,271 @@
+import asyncio
+import os
+import struct
+import threading
+import zlib
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import cast
+
+import numpy as np
+from loguru import logger
+
+from ingest import FLOAT_FIELDS, MAX_COMPUTER_ID_BYTES, Telemetry
+
+# Record: [crc32:4][length:2][payload], payload = [seq:8] + fixed fields + computer_id bytes.
+# The CRC covers the payload, so a torn write at the tail is detected on replay.
+# A block record sets the top bit of the length; its payload is
+# [id length:1][computer_id][first seq:8][n x fixed fields] for a batch from one
+# reactor with consecutive seqs.
+_HEADER = struct.Struct("<IH")
+_SEQ = struct.Struct("<q")
+_FIELDS = struct.Struct("<qq6f?B")
+_BLOCK_FLAG = 0x8000
+_COLUMNS: dict[str, int] = {name: i for i, name in enumerate(Telemetry._fields)}
+_BLOCK_DTYPE: np.dtype[np.void] = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        *((name, "<f4") for name in FLOAT_FIELDS),
+        ("status", "?"),
+        ("alert_status", "u1"),
+    ]
+)
+# Keeps the payload length below the flag bit.
+_BLOCK_ROWS = (_BLOCK_FLAG - 256 - _SEQ.size) // _BLOCK_DTYPE.itemsize
+
+# (seq, computer_id, timestamp_us, *Telemetry), the arguments of IngestBuffer.append.
+WalRecord = tuple[int, str, int, float, float, float, float, bool, float, float, int]
+
+# struct and ndarray.tolist type what they unpack as Any; these name the fields
+# of the layouts above.
+_unpack_header: Callable[[bytes, int], tuple[int, int]] = _HEADER.unpack_from
+_unpack_seq: Callable[[bytes, int], tuple[int]] = _SEQ.unpack_from
+_unpack_fields: Callable[[bytes], tuple[int, int, float, float, float, float, float, float, bool, int]] = (
+    _FIELDS.unpack_from
+)
+_BlockRow = tuple[int, float, float, float, float, float, float, bool, int]
+
+
+def encode_record(
+    seq: int,
+    computer_id: str,
+    timestamp_us: int,
+    temperature: float,
+    fuel_level: float,
+    coolant_level: float,
+    waste_level: float,
+    status: bool,
+    burn_rate: float,
+    actual_burn_rate: float,
+    alert_status: int,
+) -> bytes:
+    payload = _FIELDS.pack(
+        seq,
+        timestamp_us,
+        temperature,
+        fuel_level,
+        coolant_level,
+        waste_level,
+        burn_rate,
+        actual_burn_rate,
+        status,
+        min(max(alert_status, 0), 255),
+    ) + computer_id.encode()
+    # A longer payload would set the block flag and end replay of its segment;
+    # ids are capped at MAX_COMPUTER_ID_BYTES when the computer connects.
+    assert len(payload) < _BLOCK_FLAG, f"WAL record payload of {len(payload)} bytes"
+    return _HEADER.pack(zlib.crc32(payload), len(payload)) + payload
+
+
+def encode_block(first_seq: int, computer_id: str, timestamp_us: np.ndarray, values: np.ndarray) -> bytes:
+    """Encode a batch of samples as block records, one CRC per block.
+
+    ``values`` has one row per sample with the ``Telemetry`` fields as
+    columns, and samples have consecutive seqs from ``first_seq``, as in
+    ``IngestBuffer.extend``.
+    """
+    name = computer_id.encode()
+    # A cut-down name would replay the rows under another reactor's id.
+    if len(name) > MAX_COMPUTER_ID_BYTES:
+        raise ValueError(f"computer_id is {len(name)} bytes, at most {MAX_COMPUTER_ID_BYTES} fit a WAL block")
+    chunks: list[bytes] = []
+    for start in range(0, len(timestamp_us), _BLOCK_ROWS):
+        rows = values[start : start + _BLOCK_ROWS]
+        block = np.empty(len(rows), dtype=_BLOCK_DTYPE)
+        block["timestamp"] = timestamp_us[start : start + _BLOCK_ROWS]
+        for field in FLOAT_FIELDS:
+            block[field] = rows[:, _COLUMNS[field]]
+        block["status"] = rows[:, _COLUMNS["status"]] != 0
+        block["alert_status"] = np.minimum(np.maximum(rows[:, _COLUMNS["alert_status"]], 0), 255)
+        payload = bytes([len(name)]) + name + _SEQ.pack(first_seq + start) + block.tobytes()
+        chunks.append(_HEADER.pack(zlib.crc32(payload), len(payload) | _BLOCK_FLAG) + payload)
+    return b"".join(chunks)
+
+
+def _decode_block(payload: bytes) -> Iterator[WalRecord]:
+    computer_id = payload[1 : 1 + payload[0]].decode(errors="replace")
+    (first_seq,) = _unpack_seq(payload, 1 + payload[0])
+    block = np.frombuffer(payload, dtype=_BLOCK_DTYPE, offset=1 + payload[0] + _SEQ.size)
+    # tolist() converts the fields to Python int, float and bool in one pass.
+    rows = cast(list[_BlockRow], block.tolist())
+    for i, (ts, temp, fuel, coolant, waste, burn, actual, status, alert) in enumerate(rows):
+        yield (first_seq + i, computer_id, ts, temp, fuel, coolant, waste, status, burn, actual, alert)
+
+
+def decode_records(data: bytes) -> Iterator[WalRecord]:
+    """Yield records until the end of ``data`` or the first torn/corrupt record."""
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        crc, length = _unpack_header(data, offset)
+        is_block = bool(length & _BLOCK_FLAG)
+        length &= ~_BLOCK_FLAG
+        start = offset + _HEADER.size
+        payload = data[start : start + length]
+        minimum = 1 + payload[0] + _SEQ.size if is_block and payload else _FIELDS.size
+        if len(payload) < length or length < minimum or zlib.crc32(payload) != crc:
+            logger.warning(f"WAL: stopping replay at corrupt record (offset {offset})")
+            return
+        offset = start + length
+        if is_block:
+            yield from _decode_block(payload)
+            continue
+        seq, ts, temp, fuel, coolant, waste, burn, actual, status, alert = _unpack_fields(payload)
+        computer_id = payload[_FIELDS.size :].decode(errors="replace")
+        yield (seq, computer_id, ts, temp, fuel, coolant, waste, status, burn, actual, alert)
+
+
+class WriteAheadLog:
+    """Append-only binary log with group commit.
+
+    ``append`` only copies the encoded record into an in-memory batch. A commit
+    thread writes the batch and calls ``fsync`` at most every
+    ``fsync_interval`` seconds, so one fsync covers every sample received in
+    that window. Callers that need durability can ``await wait_durable()``.
+
+    The log is split into numbered segments. ``rotate`` starts a new segment
+    when a checkpoint begins; once the checkpoint is safely in Parquet,
+    ``truncate_before`` deletes the segments it covered.
+    """
+
+    def __init__(self, directory: Path, fsync_interval: float):
+        self.directory: Path = directory
+        self.fsync_interval: float = fsync_interval
+        self.directory.mkdir(parents=True, exist_ok=True)
+        existing = self._segments()
+        self.segment: int = (existing[-1] + 1) if existing else 1
+
+        self._lock: threading.Lock = threading.Lock()
+        self._wakeup: threading.Event = threading.Event()
+        self._pending: list[tuple[int, bytearray]] = [(self.segment, bytearray())]
+        self._appended: int = 0  # records handed to append()
+        self._durable: int = 0  # records written and fsynced
+        self._truncated_below: int = 0
+        self._closed: bool = False
+        self._waiters: list[tuple[int, asyncio.Future[None]]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        self.fsyncs: int = 0
+        self._thread: threading.Thread = threading.Thread(
+            target=self._commit_loop, name="wal-commit", daemon=True
+        )
+        self._thread.start()
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f"wal-{segment:08d}.log"
+
+    def _segments(self) -> list[int]:
+        return sorted(int(path.stem.removeprefix("wal-")) for path in self.directory.glob("wal-*.log"))
+
+    # --- Replay ---
+    def replay(self) -> Iterator[WalRecord]:
+        """Yield every record left over from before the last shutdown or crash."""
+        for segment in self._segments():
+            if segment >= self.segment:
+                continue
+            yield from decode_records(self._segment_path(segment).read_bytes())
+
+    # --- Append path (event loop) ---
+    def append(self, record: bytes):
+        with self._lock:
+            self._pending[-1][1].extend(record)
+            self._appended += 1
+
+    async def wait_durable(self):
+        """Wait until every record appended so far has been fsynced."""
+        with self._lock:
+            target = self._appended
+            if self._durable >= target:
+                return
+            self._loop = asyncio.get_running_loop()
+            future: asyncio.Future[None] = self._loop.create_future()
+            self._waiters.append((target, future))
+        await future
+
+    def rotate(self) -> int:
+        """Start a new segment; return its number. Older segments are sealed."""
+        with self._lock:
+            self.segment += 1
+            self._pending.append((self.segment, bytearray()))
+        return self.segment
+
+    def truncate_before(self, segment: int):
+        """Delete segments older than ``segment`` once their rows are checkpointed."""
+        with self._lock:
+            self._truncated_below = max(self._truncated_below, segment)
+        for old in self._segments():
+            if old < segment:
+                self._segment_path(old).unlink(missing_ok=True)
+
+    def close(self):
+        """Commit everything still pending and stop the commit thread."""
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+
+    # --- Commit thread ---
+    def _commit_loop(self):
+        files: dict[int, int] = {}
+        try:
+            while True:
+                _ = self._wakeup.wait(self.fsync_interval)
+                self._wakeup.clear()
+                closing = self._closed
+                with self._lock:
+                    batches, self._pending = self._pending, [(self.segment, bytearray())]
+                    target = self._appended
+                    truncated_below = self._truncated_below
+                written: set[int] = set()
+                for segment, data in batches:
+                    if not data or segment < truncated_below:
+                        continue
+                    fd = files.get(segment)
+                    if fd is None:
+                        fd = os.open(self._segment_path(segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+                        files[segment] = fd
+                    _ = os.write(fd, data)
+                    written.add(segment)
+                for segment in written:
+                    os.fsync(files[segment])
+                    self.fsyncs += 1
+                for segment in [s for s in files if s < self.segment]:
+                    os.close(files.pop(segment))
+                self._mark_durable(target)
+                if closing:
+                    return
+        finally:
+            for fd in files.values():
+                os.close(fd)
+
+    def _mark_durable(self, target: int):
+        with self._lock:
+            self._durable = target
+            ready = [future for t, future in self._waiters if t <= target]
+            self._waiters = [(t, future) for t, future in self._waiters if t > target]
+        if ready and self._loop is not None:
+            _ = self._loop.call_soon_threadsafe(_resolve_all, ready)
+
+
+def _resolve_all(futures: list[asyncio.Future[None]]):
+    for future in futures:
+        if not future.done():
+            future.set_result(None)